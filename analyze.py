@@ -1,131 +1,509 @@
-import stanza
-from extract_clean import clean_for_scoring
+from extract_clean import clean_many, normalize_nouns
+from models import get_pipeline
+from parse_cache import doc_to_rows, rows_to_doc
+from artifacts import recording_parses
+from instrument import null_stage
+from results import (MEASURES, NOTE_COPULAR_EXCLUSION, NOTE_NA, NOTE_NADS, NOTE_NO_VERB_OR_AUX,
+                     NOTE_QUESTION, NOTE_UNINTELLIGIBLE, Reason, UtteranceResult,
+                     partial_result_type)
+from lexicon import (ARTICLES, CONTRACTION_FORMS, DEFAULT_VERB_LIST, EXCLUDE_SUBJECTS,
+                     POSSESSIVES, PREPOSITIONS, QUESTION_STARTERS, VERB_OVERRIDES,
+                     load_verb_lexicon)
+from inference import (DEFAULT_INFERENCE_MODE, INFERENCE_MODES, PRETAGGED_OPTIONS,
+                       PRETAGGED_PROCESSORS, PRETOKENIZED_OPTIONS, PretaggedPipeline,
+                       PretokenizedPipeline)
+from parse_pool import DEFAULT_PARSE_EXECUTOR, batch_mapper
 import re
+import time
+from functools import partial
+from itertools import islice
 
-def load_verb_master_list(path):
-    """Load verb compendium from file, returning a set of known verb forms."""
-    try:
-        with open(path, "r") as f:
-            return {line.strip().lower() for line in f if line.strip()}
-    except FileNotFoundError:
-        print(f"Warning: Verb master list file not found at {path}. Continuing without verb overrides. NOT RECOMMENDED")
-        return set()
+DEFAULT_PARSE_BATCH_SIZE = 64
+DEFAULT_CHUNK_SIZE = 512
 
+# is_ads_result() reads these measures only
+ADS_MEASURES = frozenset({"art", "aux", "active_prog"})
 
-def analyze_utterances(utterances, require_rr_code=False,
-                       verb_master_list_path="verb_master_list_present.txt"):
-    stanza.download('en', logging_level='ERROR')
-    nlp = stanza.Pipeline('en', processors='tokenize,pos,lemma,depparse', logging_level='ERROR')
 
-    verb_compendium = load_verb_master_list(verb_master_list_path)
-    
-    VERB_OVERRIDES = {
-        "rolling","spilling","closing","stopping","moving","breaking",
-        "cooking","turning","drinking","washing","riding","driving",
-        "drawing","throwing","holding","climbing","building","feeding",
-        "pulling","chasing","falling","coming","going","getting"
-    }
-    
-    ARTICLES = {"a", "an", "the"}
-    CONTRACTION_FORMS = {"'s", "\u2019s"}
-    EXCLUDE_SUBJECTS = {"that", "it", "he", "she", "they", "this", "those"}
-    QUESTION_STARTERS = {"when", "what", "where", "who", "whom", "whose", "why", "which", "how"}
-    POSSESSIVES = {"her", "his", "my", "their", "our", "your", "its"}
-    PREPOSITIONS = {
-        "in", "on", "at", "to", "of", "for", "with", "by", "from", "about",
-        "into", "onto", "over", "under", "through", "between", "behind",
-        "beside", "near", "around", "along", "across", "after", "before"
-    }
-    NORMALIZE_NOUNS = {
-        "horsie": "horse", "doggie": "dog", "kitty": "cat",
-        "bunny": "rabbit", "birdie": "bird", "piggie": "pig",
-        "truckie": "truck", "mommy": "mom", "daddy": "dad",
-        "grandma": "grandmother", "grandpa": "grandfather",
-    }
+def load_verb_master_list(path=DEFAULT_VERB_LIST):
+    """Load the verb compendium, compiled once per process (see lexicon.py)."""
+    return load_verb_lexicon(path)
 
-    per_utt_results = []
-    seen_article_contexts = set()
-    seen_aux_contexts = set()
-    seen_progressive_lemmas = set()
-    seen_active_progressive_lemmas = set()
 
-    for utt in utterances:
-        if require_rr_code and "[+rr]" not in utt.lower():
-            continue
+def parse_texts(nlp, texts, batch_size=DEFAULT_PARSE_BATCH_SIZE, bucket_by_length=True,
+                cache=None, map_batches=None, deferred=False):
+    """Parse texts with bulk Stanza calls, returning one Document per text in input order.
 
-        raw = utt.strip()
-        enni_clean = clean_for_scoring(raw)
-        if not enni_clean:
-            continue
+    With a ParseCache, cached texts are served without touching Stanza, repeated texts are
+    parsed once, and every new parse is stored before the scoring rules can retag it.
+    map_batches, if given, parses the list of batches instead of nlp (see parse_pool.py).
 
-        for k, v in NORMALIZE_NOUNS.items():
-            enni_clean = re.sub(rf"\b{k}\b", v, enni_clean, flags=re.IGNORECASE)
-
-        if "NADS" in enni_clean:
-            note = "NADS: non-active declarative structure"
-            per_utt_results.append({
-                "utterance": raw, "cleaned": enni_clean,
-                "art_exists": 0, "art_productive": 0, "art_notes": note,
-                "aux_exists": 0, "aux_productive": 0, "aux_notes": note,
-                "prog_exists": 0, "prog_productive": 0, "prog_notes": note,
-                "active_prog_exists": 0, "active_prog_productive": 0, "active_prog_notes": note
-            })
-            continue
+    With deferred, returns a function that returns the documents instead: the batches are
+    handed to map_batches right away, so a pool parses them while the caller does other work.
+    """
+    docs = [None] * len(texts)
+    if cache is None:
+        todo = [(text, [i]) for i, text in enumerate(texts)]
+    else:
+        pending = {}
+        for i, text in enumerate(texts):
+            if text in pending:
+                pending[text].append(i)
+                continue
+            doc = cache.get(text)
+            if doc is None:
+                pending[text] = [i]
+            else:
+                docs[i] = doc
+        todo = list(pending.items())
+
+    if bucket_by_length:
+        # similar lengths in the same batch keep padding (and wasted compute) low
+        todo.sort(key=lambda item: len(item[0]))
+
+    batches = [todo[start:start + batch_size] for start in range(0, len(todo), batch_size)]
+    texts_per_batch = [[text for text, _ in batch] for batch in batches]
+    if map_batches is None:
+        parsed_batches = map(nlp.bulk_process, texts_per_batch)
+    else:
+        parsed_batches = map_batches(texts_per_batch)
+
+    def finish():
+        for batch, parsed in zip(batches, parsed_batches):
+            for (text, indices), doc in zip(batch, parsed):
+                if cache is not None:
+                    cache.put(text, doc)
+                    if len(indices) > 1:
+                        rows = doc_to_rows(doc)
+                        for i in indices[1:]:
+                            docs[i] = rows_to_doc(text, rows)
+                docs[indices[0]] = doc
+        return docs
+    return finish if deferred else finish()
+
+
+def mode_pipeline(inference_mode=DEFAULT_INFERENCE_MODE, nlp=None,
+                  verb_master_list_path=DEFAULT_VERB_LIST):
+    """Return the pipeline (anything with bulk_process) one inference mode parses with.
+
+    An explicit nlp is used for every stage the mode needs; otherwise the shared
+    pipelines the mode needs are loaded from models.py.
+    """
+    if inference_mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown inference mode {inference_mode!r}; expected one of {INFERENCE_MODES}")
+    if inference_mode == "full":
+        return nlp or get_pipeline()
+    if inference_mode == "pretokenized":
+        return PretokenizedPipeline(nlp or get_pipeline(**PRETOKENIZED_OPTIONS))
+    return PretaggedPipeline(
+        nlp or get_pipeline(**PRETOKENIZED_OPTIONS),
+        nlp or get_pipeline(processors=PRETAGGED_PROCESSORS, **PRETAGGED_OPTIONS),
+        load_verb_master_list(verb_master_list_path)
+    )
 
-        tokens = enni_clean.lower().split()
-        first_token_base = re.sub(r"'.*$", "", tokens[0]) if tokens else ""
-        if tokens and first_token_base in QUESTION_STARTERS:
-            note = "Question: non-active declarative structure"
-            per_utt_results.append({
-                "utterance": raw, "cleaned": enni_clean,
-                "art_exists": 0, "art_productive": 0, "art_notes": note,
-                "aux_exists": 0, "aux_productive": 0, "aux_notes": note,
-                "prog_exists": 0, "prog_productive": 0, "prog_notes": note,
-                "active_prog_exists": 0, "active_prog_productive": 0, "active_prog_notes": note
-            })
-            continue
 
-        if re.search(r"\b[xX]{2,}\b", enni_clean):
-            prog_notes = "contains unintelligible words (xxx)"
-            per_utt_results.append({
-                "utterance": raw, "cleaned": enni_clean,
-                "art_exists": 0, "art_productive": 0, "art_notes": "N/A",
-                "aux_exists": 0, "aux_productive": 0, "aux_notes": "N/A",
-                "prog_exists": 0, "prog_productive": 0, "prog_notes": prog_notes,
-                "active_prog_exists": 0, "active_prog_productive": 0, "active_prog_notes": prog_notes
-            })
-            continue
+def mode_parser(inference_mode=DEFAULT_INFERENCE_MODE, nlp=None,
+                batch_size=DEFAULT_PARSE_BATCH_SIZE, cache=None,
+                verb_master_list_path=DEFAULT_VERB_LIST, parse_workers=None,
+                parse_executor=DEFAULT_PARSE_EXECUTOR):
+    """Return a texts -> documents parser for one of the inference modes in inference.py.
+
+    With parse_workers > 1 the batches of each call are parsed in parallel by a pool of
+    that many parse_executor ("process" or "thread") workers, see parse_pool.py. The parser
+    also takes deferred=True (see parse_texts()).
+    """
+    if cache is not None and cache.inference_mode != inference_mode:
+        raise ValueError(f"Parse cache holds {cache.inference_mode!r} parses, "
+                         f"not {inference_mode!r} ones")
+    pipeline = mode_pipeline(inference_mode, nlp=nlp, verb_master_list_path=verb_master_list_path)
+    map_batches = None
+    if parse_workers and parse_workers > 1:
+        map_batches = batch_mapper(pipeline, parse_workers, executor=parse_executor,
+                                   inference_mode=inference_mode, nlp=nlp,
+                                   verb_master_list_path=verb_master_list_path)
+    return lambda texts, deferred=False: parse_texts(pipeline, texts, batch_size=batch_size,
+                                                     cache=cache, map_batches=map_batches,
+                                                     deferred=deferred)
 
-        content_tokens = [t for t in enni_clean.lower().split() if re.match(r"[a-z]", t)]
-        is_sole_verb_utterance = (
-            (len(content_tokens) == 1 and content_tokens[0].endswith("ing"))
-            or
-            (
-                len(content_tokens) >= 2
-                and content_tokens[0].endswith("ing")
-                and not any(t in {"a", "an", "the", "he", "she", "they", "it",
-                                  "i", "we", "you", "this", "that"}
-                            for t in content_tokens)
+
+def analyze_utterances(utterances, require_rr_code=False,
+                       verb_master_list_path=DEFAULT_VERB_LIST,
+                       nlp=None, batch_size=DEFAULT_PARSE_BATCH_SIZE, cache=None,
+                       chunk_size=DEFAULT_CHUNK_SIZE, parse_artifact_path=None, parser=None,
+                       metrics=None, inference_mode=DEFAULT_INFERENCE_MODE, parse_workers=None,
+                       parse_executor=DEFAULT_PARSE_EXECUTOR, measures=None, notes=True):
+    return list(iter_analysis(
+        utterances,
+        require_rr_code=require_rr_code,
+        verb_master_list_path=verb_master_list_path,
+        nlp=nlp,
+        batch_size=batch_size,
+        cache=cache,
+        chunk_size=chunk_size,
+        parse_artifact_path=parse_artifact_path,
+        parser=parser,
+        metrics=metrics,
+        inference_mode=inference_mode,
+        parse_workers=parse_workers,
+        parse_executor=parse_executor,
+        measures=measures,
+        notes=notes
+    ))
+
+
+def iter_analysis(utterances, require_rr_code=False,
+                  verb_master_list_path=DEFAULT_VERB_LIST,
+                  nlp=None, batch_size=DEFAULT_PARSE_BATCH_SIZE, cache=None,
+                  chunk_size=DEFAULT_CHUNK_SIZE, parse_artifact_path=None, parser=None,
+                  metrics=None, inference_mode=DEFAULT_INFERENCE_MODE, skip=0, state=None,
+                  parse_workers=None, parse_executor=DEFAULT_PARSE_EXECUTOR, measures=None,
+                  notes=True):
+    """Yield one result per scored utterance; utterances may be any (lazy) iterable.
+
+    With parse_artifact_path, the parses are also saved there (see artifacts.py) so the
+    transcript can later be rescored without Stanza. parser replaces the parse step, see
+    iter_parsed(). metrics, an instrument.Instrumentation, collects stage times and rule
+    branch statistics. inference_mode trades parse fidelity for speed, see inference.py.
+    skip and state resume a transcript from a checkpoint (see checkpoint.py): the first
+    skip utterances are dropped before parsing and scoring continues from state.
+    parse_workers > 1 parses in parallel while scoring stays in order (see parse_pool.py).
+    measures and notes limit what is scored, see iter_scores().
+    """
+    parsed = iter_parsed(
+        utterances,
+        require_rr_code=require_rr_code,
+        nlp=nlp,
+        batch_size=batch_size,
+        cache=cache,
+        chunk_size=chunk_size,
+        parse_all=parse_artifact_path is not None,
+        parser=parser,
+        metrics=metrics,
+        inference_mode=inference_mode,
+        verb_master_list_path=verb_master_list_path,
+        skip=skip,
+        parse_workers=parse_workers,
+        parse_executor=parse_executor
+    )
+    if parse_artifact_path is not None:
+        parsed = recording_parses(parsed, parse_artifact_path, require_rr_code=require_rr_code,
+                                  inference_mode=inference_mode)
+    return iter_scores(parsed, verb_master_list_path=verb_master_list_path, metrics=metrics,
+                       state=state, measures=measures, notes=notes)
+
+
+def early_exit_branch(enni_clean, lowered=None):
+    """Which early exit settles this utterance before parsing, if any. lowered is
+    enni_clean.lower(), for callers that have it already."""
+    if "NADS" in enni_clean:
+        return "nads"
+    if lowered is None:
+        lowered = enni_clean.lower()
+    tokens = lowered.split(None, 1)  # only the first token is read
+    first_token_base = re.sub(r"'.*$", "", tokens[0]) if tokens else ""
+    if tokens and first_token_base in QUESTION_STARTERS:
+        return "question"
+    if "xx" in lowered and re.search(r"\b[xX]{2,}\b", enni_clean):
+        return "unintelligible"
+    return None
+
+
+def early_exit_result(raw, enni_clean, branch=None, make_result=UtteranceResult):
+    """Result for utterances settled before parsing (NADS, questions, xxx), else None."""
+    if branch is None:
+        branch = early_exit_branch(enni_clean)
+
+    if branch == "nads":
+        return make_result(raw, enni_clean, 0, 0, NOTE_NADS, 0, 0, NOTE_NADS,
+                           0, 0, NOTE_NADS, 0, 0, NOTE_NADS)
+
+    if branch == "question":
+        return make_result(raw, enni_clean, 0, 0, NOTE_QUESTION, 0, 0, NOTE_QUESTION,
+                           0, 0, NOTE_QUESTION, 0, 0, NOTE_QUESTION)
+
+    if branch == "unintelligible":
+        return make_result(raw, enni_clean, 0, 0, NOTE_NA, 0, 0, NOTE_NA,
+                           0, 0, NOTE_UNINTELLIGIBLE, 0, 0, NOTE_UNINTELLIGIBLE)
+
+    return None
+
+
+def iter_parsed(utterances, require_rr_code=False, nlp=None,
+                batch_size=DEFAULT_PARSE_BATCH_SIZE, cache=None,
+                chunk_size=DEFAULT_CHUNK_SIZE, parse_all=False, parser=None, metrics=None,
+                inference_mode=DEFAULT_INFERENCE_MODE,
+                verb_master_list_path=DEFAULT_VERB_LIST, skip=0, parse_workers=None,
+                parse_executor=DEFAULT_PARSE_EXECUTOR):
+    """Parse phase: yield (raw, cleaned, doc) for every utterance that survives cleaning.
+
+    doc is None for utterances that exit before parsing (NADS, questions, xxx) unless
+    parse_all is set, which parses those too so that a saved parse artifact can still be
+    rescored after the early-exit rules change.
+
+    parser, if given, is called with a list of cleaned texts and must return one fresh
+    document per text in the same order (e.g. server.MicroBatcher.parse, which shares
+    Stanza batches between concurrent requests); nlp, batch_size, cache, inference_mode and
+    parse_workers are then unused. The first skip utterances that survive cleaning are
+    dropped unparsed.
+
+    With parse_workers > 1, chunk_size is rounded up to a multiple of parse_workers *
+    batch_size so every worker gets whole batches, and the next chunk is handed to the pool
+    before the current one is yielded, so parsing goes on while the caller scores.
+    """
+    overlap = parser is None and parse_workers and parse_workers > 1
+    if parser is None:
+        parser = mode_parser(inference_mode, nlp=nlp, batch_size=batch_size, cache=cache,
+                             verb_master_list_path=verb_master_list_path,
+                             parse_workers=parse_workers, parse_executor=parse_executor)
+    if overlap:
+        span = parse_workers * batch_size
+        chunk_size = -(-chunk_size // span) * span
+    stage = metrics.stage if metrics is not None else null_stage
+
+    # Consume the input chunk_size utterances at a time so that arbitrarily long
+    # (streamed) inputs are parsed in bounded batches while staying in order.
+    utterance_iter = iter(utterances)
+
+    def submitted_chunks():
+        # (prepared, to_parse, finish) per chunk; finish() returns the chunk's parses
+        while True:
+            with stage("extract"):
+                chunk = list(islice(utterance_iter, chunk_size))
+            if not chunk:
+                return
+            yield submit(chunk)
+
+    def submit(chunk):
+        nonlocal skip
+        with stage("clean"):
+            raws = [
+                utt.strip() for utt in chunk
+                if not require_rr_code or "[+rr]" in utt.lower()
+            ]
+            prepared = [
+                (raw, normalize_nouns(enni_clean))
+                for raw, enni_clean in zip(raws, clean_many(raws))
+                if enni_clean
+            ]
+            if skip:
+                skipped = min(skip, len(prepared))
+                prepared = prepared[skipped:]
+                skip -= skipped
+        # Settle the early exits before parsing, so that everything left to parse
+        # can be sent to Stanza in a few large batches.
+        to_parse = [
+            parse_all or early_exit_branch(enni_clean) is None
+            for raw, enni_clean in prepared
+        ]
+        texts = [enni_clean for (_, enni_clean), wanted in zip(prepared, to_parse) if wanted]
+        if not overlap:
+            return prepared, to_parse, partial(parser, texts)
+        with stage("parse"):
+            return prepared, to_parse, parser(texts, deferred=True)
+
+    chunks = submitted_chunks()
+    current = next(chunks, None)
+    while current is not None:
+        prepared, to_parse, finish = current
+        with stage("parse"):
+            docs = iter(finish())
+        if overlap:
+            # the pool parses the next chunk while this one is scored
+            current = next(chunks, None)
+        for (raw, enni_clean), wanted in zip(prepared, to_parse):
+            yield raw, enni_clean, (next(docs) if wanted else None)
+        if not overlap:
+            current = next(chunks, None)
+
+
+def new_scoring_state():
+    """What the rules remember across utterances: contexts and lemmas already seen."""
+    return {
+        "article_contexts": set(),
+        "aux_contexts": set(),
+        "progressive_lemmas": set(),
+        "active_progressive_lemmas": set(),
+    }
+
+
+def resolve_measures(measures=None):
+    """The set of MEASURES to score for a request that may also name "ads"; None is all."""
+    if measures is None:
+        return frozenset(MEASURES)
+    measures = set(measures)
+    if "ads" in measures:
+        measures.discard("ads")
+        measures |= ADS_MEASURES
+    unknown = measures - set(MEASURES)
+    if unknown:
+        raise ValueError(f"Unknown measures {sorted(unknown)}; expected some of "
+                         f"{MEASURES + ('ads',)}")
+    return frozenset(measures)
+
+
+# a sole -ing verb is not scored as productive when any of these tokens is with it
+SOLE_VERB_BLOCKERS = frozenset({"a", "an", "the", "he", "she", "they", "it",
+                                "i", "we", "you", "this", "that"})
+# deprels the passive rule takes a "be" auxiliary from; the active rule skips aux:pass
+BE_DEPRELS = frozenset({"aux", "aux:pass", "cop"})
+
+def _is_vbg(w):
+    return w.xpos == "VBG" or "VerbForm=Part" in (w.feats or "")
+
+
+class SentenceFeatures:
+    """What the scoring rules look up in one sentence: its words' lowercased texts and
+    deprels pulled out once as columns, the -ing and VERB_OVERRIDES positions, the root,
+    and positions by deprel or head (found on first lookup). Positions index sent.words.
+
+    Texts, lemmas, heads and deprels stay fixed while an utterance is scored; upos, xpos and
+    feats do not (the retagging passes rewrite them in place), so the rules read tags from
+    the words themselves.
+    """
+    __slots__ = ("words", "lower", "deprels", "root", "ing", "overrides", "_by_deprel",
+                 "_by_head", "_be_aux")
+
+    def __init__(self, sent):
+        words = self.words = sent.words
+        lower = self.lower = [w.text.lower() for w in words]
+        self.deprels = [w.deprel for w in words]
+        self.root = None  # position of the first word with head 0
+        for i, w in enumerate(words):
+            if w.head == 0:
+                self.root = i
+                break
+        ing = self.ing = [i for i, t in enumerate(lower) if t[-3:] == "ing"]
+        # every VERB_OVERRIDES form ends in "ing"
+        self.overrides = [i for i in ing if lower[i] in VERB_OVERRIDES]
+        self._by_deprel = {}
+        self._by_head = self._be_aux = None  # only the copular and auxiliary rules ask
+
+    def lemma(self, i):
+        lemma = self.words[i].lemma
+        return lemma.lower() if lemma else None
+
+    def first(self, deprel):
+        """The first word with this deprel, or None."""
+        if deprel in self.deprels:
+            return self.words[self.deprels.index(deprel)]
+        return None
+
+    def with_deprel(self, deprel):
+        """Positions of the words with this deprel."""
+        found = self._by_deprel.get(deprel)
+        if found is None:
+            found = self._by_deprel[deprel] = [i for i, d in enumerate(self.deprels)
+                                               if d == deprel]
+        return found
+
+    def children(self, head_id):
+        """Positions of the words whose head is head_id."""
+        if self._by_head is None:
+            self._by_head = {}
+        found = self._by_head.get(head_id)
+        if found is None:
+            found = self._by_head[head_id] = [i for i, w in enumerate(self.words)
+                                              if w.head == head_id]
+        return found
+
+    def be_aux(self):
+        """Positions of the words with lemma "be" and a deprel in BE_DEPRELS."""
+        if self._be_aux is None:
+            self._be_aux = [i for i, d in enumerate(self.deprels)
+                            if d in BE_DEPRELS and self.lemma(i) == "be"]
+        return self._be_aux
+
+    def first_vbg_like(self):
+        """Position of the first word ending in "ing" or tagged as a participle, or None."""
+        end = self.ing[0] if self.ing else len(self.words)
+        for i in range(end):
+            if _is_vbg(self.words[i]):
+                return i
+        return self.ing[0] if self.ing else None
+
+    def participles(self):
+        """Positions of the words tagged as participles, as tagged now."""
+        return (i for i, w in enumerate(self.words) if _is_vbg(w))
+
+
+def iter_scores(parsed, verb_master_list_path=DEFAULT_VERB_LIST, metrics=None, state=None,
+                measures=None, notes=True):
+    """Scoring phase: apply the productivity rules, in order, to (raw, cleaned, doc) items.
+
+    Needs no Stanza: doc may be a live stanza Document or a ParsedDocument restored from the
+    parse cache or a parse artifact. With metrics, every utterance's rule time is recorded
+    under the branches it took (see instrument.py). state (see new_scoring_state()) is
+    updated in place, so a caller can checkpoint it between results or resume from it.
+
+    measures, some of MEASURES (or "ads" for what is_ads_result() reads), skips the rule
+    passes of the other measures; the results then only have the requested measures' keys,
+    plus their notes unless notes is False (then no notes are built). The requested values
+    are the same as in a full run. The state of a partial run only suits resuming a run with
+    the same measures.
+    """
+    verb_compendium = load_verb_master_list(verb_master_list_path)
+    measures = resolve_measures(measures)
+    want_art = "art" in measures
+    want_aux = "aux" in measures
+    want_active = "active_prog" in measures
+    # recovered progressives score active progressives against the general progressive lemmas
+    want_prog = want_active or "prog" in measures
+    # the tokens only settle sole-verb utterances (progressives) and the article fallbacks
+    want_tokens = want_prog or want_art
+    if measures == frozenset(MEASURES) and notes:
+        make_result = UtteranceResult
+    else:
+        make_result = partial_result_type(measures, notes)
+
+    if state is None:
+        state = new_scoring_state()
+    seen_article_contexts = state["article_contexts"]
+    seen_aux_contexts = state["aux_contexts"]
+    seen_progressive_lemmas = state["progressive_lemmas"]
+    seen_active_progressive_lemmas = state["active_progressive_lemmas"]
+
+    for raw, enni_clean, doc in parsed:
+        if metrics is not None:
+            started = time.perf_counter()
+            branches = []
+        lowered = enni_clean.lower()
+        branch = early_exit_branch(enni_clean, lowered)
+        if branch is not None:
+            if metrics is not None:
+                metrics.record_rules((branch,), started)
+            yield early_exit_result(raw, enni_clean, branch, make_result)
+            continue
+        if doc is None:
+            raise ValueError(f"No parse available for utterance {raw!r}; re-run the parse phase")
+        tokens = content_tokens = ()
+        is_sole_verb_utterance = False
+        if want_tokens:
+            tokens = lowered.split()
+            # the rules only look at the first three tokens starting with a letter
+            content_tokens = list(islice((t for t in tokens if "a" <= t[0] <= "z"), 3))
+            is_sole_verb_utterance = (
+                (len(content_tokens) == 1 and content_tokens[0].endswith("ing"))
+                or
+                (
+                    len(content_tokens) >= 2
+                    and content_tokens[0].endswith("ing")
+                    and SOLE_VERB_BLOCKERS.isdisjoint(tokens)
+                )
             )
-        )
 
         art_exists = art_productive = aux_exists = aux_productive = 0
         prog_exists = prog_productive = 0
         active_prog_exists = active_prog_productive = 0
-        art_notes = aux_notes = prog_notes = active_prog_notes = "N/A"
+        art_notes = aux_notes = prog_notes = active_prog_notes = NOTE_NA
 
-        doc = nlp(enni_clean)
+        features = [SentenceFeatures(sent) for sent in doc.sentences]
 
-        for sent in doc.sentences:
-            for w in sent.words:
-                if not w.text.lower().endswith("ing"):
+        for f in features:
+            for i in f.ing:
+                w = f.words[i]
+                if w.upos == "VERB" and _is_vbg(w):
                     continue
-                if w.upos in {"VERB"} and (w.xpos == "VBG" or "VerbForm=Part" in (w.feats or "")):
-                    continue  
-                candidate = w.lemma.lower() if w.lemma else w.text.lower()
-                naive_base = re.sub(r"ing$", "", w.text.lower())
-                ing_form = w.text.lower()
-                if candidate in verb_compendium or naive_base in verb_compendium or ing_form in verb_compendium:
+                if verb_compendium.is_verb_ing(f.lower[i], f.lemma(i)):
                     if w.upos == "NOUN" and w.deprel == "compound":
                         continue
                     w.upos = "VERB"
@@ -135,58 +513,49 @@ def analyze_utterances(utterances, require_rr_code=False,
         exclude_this = False
         recovered_progressive = False
 
-        for sent in doc.sentences:
-            root = next((w for w in sent.words if w.head == 0), None)
-            if not root:
+        for f in features:
+            if f.root is None:
                 continue
+            root = f.words[f.root]
 
-            if any(w.deprel == "acl:relcl" for w in sent.words):
+            if "acl:relcl" in f.deprels:
                 exclude_this = True
                 break
 
-            cop_children = [w for w in sent.words if w.deprel == "cop" and w.head == root.id]
-            has_cop = len(cop_children) > 0
+            has_cop = any(f.words[i].head == root.id for i in f.with_deprel("cop"))
 
             if not has_cop:
                 continue
 
-            vbg_like = [
-                w for w in sent.words
-                if (
-                    w.text.lower().endswith("ing")
-                    or w.xpos == "VBG"
-                    or (w.feats and "VerbForm=Part" in w.feats)
-                )
-            ]
-
-            if vbg_like:
-                vbg_word = vbg_like[0]
-                word_idx = next((i for i, w in enumerate(sent.words) if w.id == vbg_word.id), None)
-                if word_idx and word_idx > 0:
-                    prev_word = sent.words[word_idx - 1]
-                    if prev_word.text.lower() in POSSESSIVES:
-                        exclude_this = True
-                        break
+            word_idx = f.first_vbg_like()
+            if word_idx is not None:
+                if word_idx > 0 and f.lower[word_idx - 1] in POSSESSIVES:
+                    exclude_this = True
+                    break
 
                 recovered_progressive = True
-                lemma = vbg_like[0].lemma.lower()
+                if metrics is not None:
+                    branches.append("recovered_progressive")
 
-                prog_exists = active_prog_exists = 1
-                if not is_sole_verb_utterance:
-                    if lemma not in seen_progressive_lemmas:
-                        seen_progressive_lemmas.add(lemma)
-                        prog_productive = active_prog_productive = 1
-                        prog_notes = active_prog_notes = f"Recovered misparsed progressive: {lemma}"
-                    else:
-                        prog_notes = active_prog_notes = f"Recovered repeated progressive: {lemma}"
-                else:
-                    prog_notes = active_prog_notes = f"Sole-verb utterance: progressive exists but not productive ({lemma})"
-
-                dets = [w for w in sent.words if w.deprel == "det"]
+                if want_prog:
+                    lemma = f.lemma(word_idx)
+                    prog_exists = active_prog_exists = 1
+                    if not is_sole_verb_utterance:
+                        if lemma not in seen_progressive_lemmas:
+                            seen_progressive_lemmas.add(lemma)
+                            prog_productive = active_prog_productive = 1
+                            if notes:
+                                prog_notes = active_prog_notes = (Reason.RECOVERED_PROGRESSIVE, lemma)
+                        elif notes:
+                            prog_notes = active_prog_notes = (Reason.RECOVERED_REPEATED_PROGRESSIVE, lemma)
+                    elif notes:
+                        prog_notes = active_prog_notes = (Reason.SOLE_VERB_PROGRESSIVE, lemma)
+
+                dets = f.with_deprel("det") if want_art else None
                 if dets:
-                    det = dets[0].lemma.lower()
-                    subj = [w for w in sent.words if w.deprel == "nsubj"]
-                    subj_lemma = subj[0].lemma.lower() if subj else root.lemma.lower()
+                    det = f.lemma(dets[0])
+                    subj = f.with_deprel("nsubj")
+                    subj_lemma = f.lemma(subj[0]) if subj else f.lemma(f.root)
                     ctx = (det, subj_lemma)
 
                     if det in ARTICLES:
@@ -194,187 +563,189 @@ def analyze_utterances(utterances, require_rr_code=False,
                         if ctx not in seen_article_contexts:
                             seen_article_contexts.add(ctx)
                             art_productive = 1
-                            art_notes = f"Recovered: first time {ctx}"
-                        else:
-                            art_notes = f"Recovered: duplicate {ctx}"
+                            if notes:
+                                art_notes = (Reason.RECOVERED_FIRST_ARTICLE, ctx)
+                        elif notes:
+                            art_notes = (Reason.RECOVERED_DUPLICATE_ARTICLE, ctx)
                 break
 
             if root.upos == "ADJ" or root.upos == "NOUN":
                 exclude_this = True
                 break
 
-            if any(w.upos == "ADP" and w.head == root.id for w in sent.words):
+            if any(f.words[i].upos == "ADP" for i in f.children(root.id)):
                 exclude_this = True
                 break
 
         if exclude_this and not recovered_progressive:
-            note = "Excluded: true copular clause (adj/nominal/PP predicate)"
-            per_utt_results.append({
-                "utterance": raw,
-                "cleaned": enni_clean,
-                "art_exists": 0, "art_productive": 0, "art_notes": note,
-                "aux_exists": 0, "aux_productive": 0, "aux_notes": note,
-                "prog_exists": 0, "prog_productive": 0, "prog_notes": note,
-                "active_prog_exists": 0, "active_prog_productive": 0, "active_prog_notes": note
-            })
+            if metrics is not None:
+                branches.append("copular_exclusion")
+                metrics.record_rules(branches, started)
+            note = NOTE_COPULAR_EXCLUSION
+            yield make_result(raw, enni_clean, 0, 0, note, 0, 0, note, 0, 0, note, 0, 0, note)
             continue
 
-        for sent in doc.sentences:
-            for w in sent.words:
-                if w.text.lower() in VERB_OVERRIDES and w.upos == "VERB":
-                    w.upos = "VERB"
+        for f in features:
+            for i in f.overrides:
+                w = f.words[i]
+                if w.upos == "VERB":
                     w.xpos = "VBG"
                     w.feats = (w.feats or "") + "|VerbForm=Part"
 
-        has_verb = any(w.upos in {"VERB", "AUX"} for s in doc.sentences for w in s.words)
+        has_verb = any(w.upos in {"VERB", "AUX"} for f in features for w in f.words)
 
         if not has_verb:
-            for s in doc.sentences:
-                words = s.words
-                for i in range(len(words) - 1):
-                    w1, w2 = words[i], words[i + 1]
-                    if w1.upos in {"DET", "NOUN"} and w2.text.lower().endswith("ing") and \
-                            w2.text.lower() in VERB_OVERRIDES:
+            for f in features:
+                for i in f.overrides:
+                    if i == 0 or not f.lower[i].endswith("ing"):
+                        continue
+                    w1 = f.words[i - 1]
+                    if w1.upos in {"DET", "NOUN"}:
                         prog_exists = active_prog_exists = 1
-                        lemma = w2.text.lower().rstrip("ing")
+                        lemma = f.lower[i].rstrip("ing")
                         if not is_sole_verb_utterance:
                             prog_productive = active_prog_productive = 1
-                            prog_notes = active_prog_notes = f"Heuristic forced verb ({lemma})"
-                        else:
-                            prog_notes = active_prog_notes = f"Sole-verb utterance: exists but not productive ({lemma})"
-                        art_exists = 1
-                        ctx = (w1.text.lower(), (w1.lemma or w1.text).lower())
-                        if ctx not in seen_article_contexts:
-                            seen_article_contexts.add(ctx)
-                            art_productive = 1
-                            art_notes = f"Heuristic: first time {ctx}"
-                        else:
-                            art_notes = f"Heuristic: duplicate article {ctx}"
+                            if notes:
+                                prog_notes = active_prog_notes = (Reason.FORCED_VERB, lemma)
+                        elif notes:
+                            prog_notes = active_prog_notes = (Reason.SOLE_VERB, lemma)
+                        if want_art:
+                            art_exists = 1
+                            ctx = (f.lower[i - 1], (w1.lemma or w1.text).lower())
+                            if ctx not in seen_article_contexts:
+                                seen_article_contexts.add(ctx)
+                                art_productive = 1
+                                if notes:
+                                    art_notes = (Reason.HEURISTIC_FIRST_ARTICLE, ctx)
+                            elif notes:
+                                art_notes = (Reason.HEURISTIC_DUPLICATE_ARTICLE, ctx)
                         has_verb = True
+                        if metrics is not None:
+                            branches.append("forced_verb_heuristic")
                         break
                 if has_verb:
                     break
 
         if not has_verb:
             _art_exists = _art_productive = 0
-            _art_notes = "no verb or aux"
-            _t2 = re.sub(r"^\s*and\s+", "", enni_clean, flags=re.IGNORECASE)
-            _m = re.match(r"^(a|an|the)\s+([A-Za-z]+)", _t2, flags=re.IGNORECASE)
-            _content_tok_count = len([t for t in enni_clean.lower().split() if re.match(r"[a-z]", t)])
-            _has_prep = any(t in PREPOSITIONS for t in enni_clean.lower().split())
-            if _m and _content_tok_count >= 3 and not _has_prep:
+            _art_notes = NOTE_NO_VERB_OR_AUX
+            _m = None
+            if want_art:
+                _t2 = re.sub(r"^\s*and\s+", "", enni_clean, flags=re.IGNORECASE)
+                _m = re.match(r"^(a|an|the)\s+([A-Za-z]+)", _t2, flags=re.IGNORECASE)
+            if _m and len(content_tokens) >= 3 and \
+                    not any(t in PREPOSITIONS for t in tokens):
                 _art_exists = 1
                 _det, _subj_cand = _m.group(1).lower(), _m.group(2).lower()
                 _ctx = (_det, _subj_cand)
                 if _ctx not in seen_article_contexts:
                     seen_article_contexts.add(_ctx)
                     _art_productive = 1
-                    _art_notes = f"First time {_ctx} used"
-                else:
-                    _art_notes = f"Duplicate article context {_ctx}"
-            per_utt_results.append({
-                "utterance": raw, "cleaned": enni_clean,
-                "art_exists": _art_exists, "art_productive": _art_productive, "art_notes": _art_notes,
-                "aux_exists": 0, "aux_productive": 0, "aux_notes": "no verb or aux",
-                "prog_exists": 0, "prog_productive": 0, "prog_notes": "no verb or aux",
-                "active_prog_exists": 0, "active_prog_productive": 0, "active_prog_notes": "no verb or aux"
-            })
+                    if notes:
+                        _art_notes = (Reason.FIRST_ARTICLE, _ctx)
+                elif notes:
+                    _art_notes = (Reason.DUPLICATE_ARTICLE, _ctx)
+            if metrics is not None:
+                branches.append("no_verb_fallback")
+                metrics.record_rules(branches, started)
+            yield make_result(raw, enni_clean, _art_exists, _art_productive, _art_notes,
+                              0, 0, NOTE_NO_VERB_OR_AUX, 0, 0, NOTE_NO_VERB_OR_AUX,
+                              0, 0, NOTE_NO_VERB_OR_AUX)
             continue
 
-        for sent in doc.sentences:
-            for w in sent.words:
-                xpos = getattr(w, 'xpos', "") or ""
-                feats = getattr(w, 'feats', "") or ""
-                word_text = w.text.lower()
-                lemma = w.lemma.lower()
-                vbgse = (xpos == 'VBG' or 'VerbForm=Part' in feats)
-                if vbgse and word_text.endswith("ing") and lemma != "be":
+        for f in features:
+            words = f.words
+            # the first -ing participle other than "be" is the progressive, and the active
+            # progressive too once the sentence turns out to be an active declarative
+            progressive = None
+            for i in (f.ing if want_prog else ()):
+                lemma = f.lemma(i)
+                if _is_vbg(words[i]) and lemma != "be":
+                    progressive = i
                     prog_exists = 1
                     if not is_sole_verb_utterance:
                         if lemma not in seen_progressive_lemmas:
                             seen_progressive_lemmas.add(lemma)
-                            prog_productive, prog_notes = 1, f"/ing combined with new verb ({lemma})"
-                        else:
-                            prog_notes = f"Lexical verb ({lemma}) repeated"
-                    else:
-                        prog_notes = f"Sole-verb utterance: progressive exists but not productive ({lemma})"
+                            prog_productive = 1
+                            if notes:
+                                prog_notes = (Reason.NEW_PROGRESSIVE, lemma)
+                        elif notes:
+                            prog_notes = (Reason.REPEATED_PROGRESSIVE, lemma)
+                    elif notes:
+                        prog_notes = (Reason.SOLE_VERB_PROGRESSIVE, lemma)
                     break
 
-            subj = None
-            has_passive = False
-            aux = None
-
-            for w in sent.words:
-                if w.deprel == "nsubj" and subj is None:
-                    subj = w
-                elif w.deprel in {"nsubj:pass", "aux:pass"}:
-                    has_passive = True
-                elif w.deprel == "aux" and aux is None:
-                    aux = w
-
-            if has_passive and aux_exists == 0:
-                passive_subj = next(
-                    (w for w in sent.words if w.deprel == "nsubj:pass"), None
-                )
+            subj = f.first("nsubj")
+            has_passive = "nsubj:pass" in f.deprels or "aux:pass" in f.deprels
+            aux = f.first("aux")
+
+            if want_aux and has_passive and aux_exists == 0:
+                passive_subj = f.first("nsubj:pass")
                 if passive_subj:
                     passive_subj_lemma = passive_subj.lemma.lower()
                     if passive_subj_lemma not in EXCLUDE_SUBJECTS:
-                        for w in sent.words:
-                            if w.lemma.lower() == "be" and w.deprel in {"aux", "aux:pass", "cop"}:
-                                if w.text.lower() in CONTRACTION_FORMS and passive_subj.upos == "PRON":
-                                    continue
-                                aux_exists = 1
-                                ctx = (w.text.lower(), passive_subj_lemma)
-                                if ctx not in seen_aux_contexts:
-                                    seen_aux_contexts.add(ctx)
-                                    aux_productive = 1
-                                    aux_notes = f"Passive aux: new context {ctx}"
-                                else:
-                                    aux_notes = f"Passive aux: duplicate context {ctx}"
-                                break
+                        for i in f.be_aux():
+                            if f.lower[i] in CONTRACTION_FORMS and passive_subj.upos == "PRON":
+                                continue
+                            aux_exists = 1
+                            ctx = (f.lower[i], passive_subj_lemma)
+                            if ctx not in seen_aux_contexts:
+                                seen_aux_contexts.add(ctx)
+                                aux_productive = 1
+                                if notes:
+                                    aux_notes = (Reason.PASSIVE_AUX_NEW, ctx)
+                            elif notes:
+                                aux_notes = (Reason.PASSIVE_AUX_DUPLICATE, ctx)
+                            break
 
             if not subj or has_passive:
-                tokens_sent = sent.words
                 heuristic_fired = False
-                for i in range(len(tokens_sent) - 2):
-                    w1, w2, w3 = tokens_sent[i], tokens_sent[i + 1], tokens_sent[i + 2]
+                for i in f.participles():
+                    if i < 2:
+                        continue
+                    w1, w2, w3 = words[i - 2], words[i - 1], words[i]
                     if (w1.upos == "DET" and w2.upos == "NOUN" and
-                            w3.upos == "VERB" and (w3.xpos == "VBG" or "VerbForm=Part" in (w3.feats or "")) and
-                            w3.lemma.lower() != "be"):
+                            w3.upos == "VERB" and f.lemma(i) != "be"):
                         heuristic_fired = True
+                        if metrics is not None:
+                            branches.append("det_noun_vbg_heuristic")
                         subj = w2
-                        subj_lemma = subj.lemma.lower()
+                        subj_lemma = f.lemma(i - 1)
 
                         active_prog_exists = 1
-                        lemma = w3.lemma.lower()
+                        lemma = f.lemma(i)
                         if not is_sole_verb_utterance:
-                            if lemma not in seen_active_progressive_lemmas:
-                                seen_active_progressive_lemmas.add(lemma)
-                                active_prog_productive = 1
-                                active_prog_notes = f"Heuristic: DET+NOUN+VBG new verb ({lemma})"
-                            else:
-                                active_prog_notes = f"Heuristic: DET+NOUN+VBG repeated ({lemma})"
+                            if want_active:
+                                if lemma not in seen_active_progressive_lemmas:
+                                    seen_active_progressive_lemmas.add(lemma)
+                                    active_prog_productive = 1
+                                    if notes:
+                                        active_prog_notes = (Reason.DET_NOUN_VBG_NEW, lemma)
+                                elif notes:
+                                    active_prog_notes = (Reason.DET_NOUN_VBG_REPEATED, lemma)
 
                             prog_exists = 1
-                            if lemma not in seen_progressive_lemmas:
-                                seen_progressive_lemmas.add(lemma)
-                                prog_productive = 1
-                                prog_notes = f"Heuristic: DET+NOUN+VBG new verb ({lemma})"
-                            else:
-                                prog_notes = f"Heuristic: DET+NOUN+VBG repeated ({lemma})"
-                        else:
-                            active_prog_notes = f"Sole-verb utterance: exists but not productive ({lemma})"
-                            prog_notes = f"Sole-verb utterance: exists but not productive ({lemma})"
-
-                        if w1.upos == "DET" and w1.lemma.lower() in ARTICLES:
+                            if want_prog:
+                                if lemma not in seen_progressive_lemmas:
+                                    seen_progressive_lemmas.add(lemma)
+                                    prog_productive = 1
+                                    if notes:
+                                        prog_notes = (Reason.DET_NOUN_VBG_NEW, lemma)
+                                elif notes:
+                                    prog_notes = (Reason.DET_NOUN_VBG_REPEATED, lemma)
+                        elif notes:
+                            active_prog_notes = prog_notes = (Reason.SOLE_VERB, lemma)
+
+                        if want_art and w1.upos == "DET" and f.lemma(i - 2) in ARTICLES:
                             art_exists = 1
-                            ctx = (w1.lemma.lower(), w2.lemma.lower())
+                            ctx = (f.lemma(i - 2), f.lemma(i - 1))
                             if ctx not in seen_article_contexts:
                                 seen_article_contexts.add(ctx)
                                 art_productive = 1
-                                art_notes = f"Heuristic: first time {ctx}"
-                            else:
-                                art_notes = f"Heuristic: duplicate article {ctx}"
+                                if notes:
+                                    art_notes = (Reason.HEURISTIC_FIRST_ARTICLE, ctx)
+                            elif notes:
+                                art_notes = (Reason.HEURISTIC_DUPLICATE_ARTICLE, ctx)
                         break
                 if not heuristic_fired:
                     continue
@@ -385,57 +756,56 @@ def analyze_utterances(utterances, require_rr_code=False,
             subj_lemma = subj.lemma.lower()
             subj_upos = subj.upos
 
-            for w in sent.words:
-                xpos = getattr(w, 'xpos', "") or ""
-                feats = getattr(w, 'feats', "") or ""
-                word_text = w.text.lower()
-                lemma = w.lemma.lower()
-                vbgse = (xpos == 'VBG' or 'VerbForm=Part' in feats)
-                if vbgse and word_text.endswith("ing") and lemma != "be":
-                    active_prog_exists = 1
-                    if not is_sole_verb_utterance:
-                        if lemma not in seen_active_progressive_lemmas:
-                            seen_active_progressive_lemmas.add(lemma)
-                            active_prog_productive = 1
-                            active_prog_notes = f"/ing in active declarative with new verb ({lemma})"
-                        else:
-                            active_prog_notes = f"/ing in active declarative repeated verb ({lemma})"
-                    else:
-                        active_prog_notes = f"Sole-verb utterance: exists but not productive ({lemma})"
-                    break
-
-            for w in sent.words:
-                if w.deprel == "det" and w.head == subj.id:
+            if want_active and progressive is not None:
+                lemma = f.lemma(progressive)
+                active_prog_exists = 1
+                if not is_sole_verb_utterance:
+                    if lemma not in seen_active_progressive_lemmas:
+                        seen_active_progressive_lemmas.add(lemma)
+                        active_prog_productive = 1
+                        if notes:
+                            active_prog_notes = (Reason.ACTIVE_PROGRESSIVE_NEW, lemma)
+                    elif notes:
+                        active_prog_notes = (Reason.ACTIVE_PROGRESSIVE_REPEATED, lemma)
+                elif notes:
+                    active_prog_notes = (Reason.SOLE_VERB, lemma)
+
+            for i in (f.with_deprel("det") if want_art else ()):
+                if words[i].head == subj.id:
                     art_exists = 1
-                    det = w.lemma.lower()
+                    det = f.lemma(i)
                     if det in ARTICLES:
                         ctx = (det, subj_lemma)
                         if ctx not in seen_article_contexts:
                             seen_article_contexts.add(ctx)
                             art_productive = 1
-                            art_notes = f"First time {ctx} used"
-                        else:
-                            art_notes = f"Duplicate article context {ctx}"
+                            if notes:
+                                art_notes = (Reason.FIRST_ARTICLE, ctx)
+                        elif notes:
+                            art_notes = (Reason.DUPLICATE_ARTICLE, ctx)
                     break
 
-            for w in sent.words:
-                if w.lemma.lower() == "be" and w.deprel in {"aux", "cop"}:
-                    if w.text.lower() in CONTRACTION_FORMS and subj_upos == "PRON":
-                        continue
-                    if subj_lemma in EXCLUDE_SUBJECTS:
-                        aux_notes = f"Aux on excluded subject ({subj_lemma})"
-                        break
-                    aux_exists = 1
-                    ctx = (w.text.lower(), subj_lemma)
-                    if ctx not in seen_aux_contexts:
-                        seen_aux_contexts.add(ctx)
-                        aux_productive = 1
-                        aux_notes = f"New aux context {ctx}"
-                    else:
-                        aux_notes = f"Duplicate aux context {ctx}"
+            for i in (f.be_aux() if want_aux else ()):
+                if words[i].deprel == "aux:pass":
+                    continue
+                if f.lower[i] in CONTRACTION_FORMS and subj_upos == "PRON":
+                    continue
+                if subj_lemma in EXCLUDE_SUBJECTS:
+                    if notes:
+                        aux_notes = (Reason.AUX_EXCLUDED_SUBJECT, subj_lemma)
                     break
+                aux_exists = 1
+                ctx = (f.lower[i], subj_lemma)
+                if ctx not in seen_aux_contexts:
+                    seen_aux_contexts.add(ctx)
+                    aux_productive = 1
+                    if notes:
+                        aux_notes = (Reason.AUX_NEW, ctx)
+                elif notes:
+                    aux_notes = (Reason.AUX_DUPLICATE, ctx)
+                break
 
-        if art_exists == 0:
+        if want_art and art_exists == 0:
             t2 = re.sub(r"^\s*and\s+", "", enni_clean, flags=re.IGNORECASE)
             m = re.match(r"^(a|an|the)\s+([A-Za-z]+)", t2, flags=re.IGNORECASE)
             if m:
@@ -445,22 +815,20 @@ def analyze_utterances(utterances, require_rr_code=False,
                 if ctx not in seen_article_contexts:
                     seen_article_contexts.add(ctx)
                     art_productive = 1
-                    art_notes = f"First time {ctx} used"
-                else:
-                    art_notes = f"Duplicate article context {ctx}"
-
-        per_utt_results.append({
-            "utterance": raw,
-            "cleaned": enni_clean,
-            "art_exists": art_exists, "art_productive": art_productive, "art_notes": art_notes,
-            "aux_exists": aux_exists, "aux_productive": aux_productive, "aux_notes": aux_notes,
-            "prog_exists": prog_exists, "prog_productive": prog_productive, "prog_notes": prog_notes,
-            "active_prog_exists": active_prog_exists,
-            "active_prog_productive": active_prog_productive,
-            "active_prog_notes": active_prog_notes
-        })
-
-    return per_utt_results
+                    if notes:
+                        art_notes = (Reason.FIRST_ARTICLE, ctx)
+                elif notes:
+                    art_notes = (Reason.DUPLICATE_ARTICLE, ctx)
+
+        if metrics is not None:
+            branches.append("scored")
+            metrics.record_rules(branches, started)
+        yield make_result(raw, enni_clean,
+                          art_exists, art_productive, art_notes,
+                          aux_exists, aux_productive, aux_notes,
+                          prog_exists, prog_productive, prog_notes,
+                          active_prog_exists, active_prog_productive, active_prog_notes)
+
 
 def is_ads_result(result):
     cleaned = result.get("cleaned", "").lower()
@@ -479,12 +847,36 @@ def is_ads_result(result):
 
 def analyze_ads_only(utterances,
                      require_rr_code=False,
-                     verb_master_list_path="verb_master_list_present.txt"):
+                     verb_master_list_path=DEFAULT_VERB_LIST,
+                     nlp=None,
+                     batch_size=DEFAULT_PARSE_BATCH_SIZE,
+                     cache=None,
+                     chunk_size=DEFAULT_CHUNK_SIZE,
+                     parse_artifact_path=None,
+                     parser=None,
+                     metrics=None,
+                     inference_mode=DEFAULT_INFERENCE_MODE,
+                     parse_workers=None,
+                     parse_executor=DEFAULT_PARSE_EXECUTOR,
+                     measures=ADS_MEASURES,
+                     notes=False):
 
     results = analyze_utterances(
         utterances,
         require_rr_code=require_rr_code,
-        verb_master_list_path=verb_master_list_path
+        verb_master_list_path=verb_master_list_path,
+        nlp=nlp,
+        batch_size=batch_size,
+        cache=cache,
+        chunk_size=chunk_size,
+        parse_artifact_path=parse_artifact_path,
+        parser=parser,
+        metrics=metrics,
+        inference_mode=inference_mode,
+        parse_workers=parse_workers,
+        parse_executor=parse_executor,
+        measures=measures,
+        notes=notes
     )
 
     for r in results:
@@ -0,0 +1,81 @@
+# Parse artifacts: the output of the parse phase for one transcript, saved so the
+# productivity rules can be re-run later without Stanza.
+#
+# Format: gzip-compressed JSON lines. The first line is a header
+#   {"format": "aps-parse", "version": 1, "stanza": ..., "processors": ..., ...}
+# and every following line is one utterance: [raw, cleaned, rows], where rows is the
+# serialized parse (see parse_cache.doc_to_rows) or null if it was never parsed.
+# Readers reject other formats and versions instead of guessing.
+
+import gzip
+import json
+import os
+
+from parse_cache import doc_to_rows, rows_to_doc, stanza_version
+from models import DEFAULT_LANG, DEFAULT_PROCESSORS
+
+ARTIFACT_FORMAT = "aps-parse"
+ARTIFACT_VERSION = 1
+ARTIFACT_SUFFIX = ".parse.jsonl.gz"
+
+
+def artifact_path_for(name, artifact_dir):
+    base_name = os.path.splitext(os.path.basename(name))[0]
+    return os.path.join(artifact_dir, base_name + ARTIFACT_SUFFIX)
+
+
+def recording_parses(parsed, artifact_path, **metadata):
+    """Pass (raw, cleaned, doc) items through unchanged while writing them to an artifact.
+
+    Each parse is serialized as it goes by, i.e. before the scoring rules retag it.
+    The artifact is only moved into place once the input is exhausted.
+    """
+    header = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "stanza": stanza_version(),
+        "lang": DEFAULT_LANG,
+        "processors": DEFAULT_PROCESSORS,
+        **metadata,
+    }
+    tmp_path = artifact_path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for raw, enni_clean, doc in parsed:
+            rows = doc_to_rows(doc) if doc is not None else None
+            f.write(json.dumps([raw, enni_clean, rows], separators=(",", ":")) + "\n")
+            yield raw, enni_clean, doc
+    os.replace(tmp_path, artifact_path)
+
+
+def write_parse_artifact(parsed, artifact_path, **metadata):
+    """Write every (raw, cleaned, doc) item to an artifact; returns the number of utterances."""
+    count = 0
+    for _ in recording_parses(parsed, artifact_path, **metadata):
+        count += 1
+    return count
+
+
+def read_artifact_header(artifact_path):
+    with gzip.open(artifact_path, "rt", encoding="utf-8") as f:
+        return _check_header(json.loads(f.readline()), artifact_path)
+
+
+def _check_header(header, artifact_path):
+    if header.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{artifact_path} is not a parse artifact")
+    if header.get("version") != ARTIFACT_VERSION:
+        raise ValueError(
+            f"{artifact_path} has parse artifact version {header.get('version')}, "
+            f"expected {ARTIFACT_VERSION}; re-run the parse phase"
+        )
+    return header
+
+
+def iter_parse_artifact(artifact_path):
+    """Yield (raw, cleaned, doc) items from an artifact, ready for analyze.iter_scores()."""
+    with gzip.open(artifact_path, "rt", encoding="utf-8") as f:
+        _check_header(json.loads(f.readline()), artifact_path)
+        for line in f:
+            raw, enni_clean, rows = json.loads(line)
+            yield raw, enni_clean, (rows_to_doc(enni_clean, rows) if rows is not None else None)
@@ -0,0 +1,1185 @@
+# Benchmarks and output-equivalence checks for the scoring pipeline.
+#
+#   python benchmark.py clean                  # golden check + speed of the cleaning engine
+#   python benchmark.py clean --update-golden  # regenerate benchmarks/clean_golden.json
+#   python benchmark.py pipeline               # per-stage time and peak memory vs the baseline
+#   python benchmark.py pipeline --save-baseline
+#   python benchmark.py golden                 # totals and notes of the golden corpus unchanged?
+#   python benchmark.py modes                  # speed and accuracy of each inference mode vs full
+#   python benchmark.py parallel -u 5000       # one long transcript on 1..N parse workers
+#   python benchmark.py startup                # import and --help times; no heavy imports
+#   python benchmark.py quantize               # int8 vs fp32 Stanza: speed and score totals
+#   python benchmark.py measures               # partial scoring matches the full run?
+#   python benchmark.py rules                  # rules stage by utterance length vs the baseline
+#   python benchmark.py rules --save-baseline
+#   python benchmark.py chatindex              # indexed [+rr] reads match the line scan?
+#   python benchmark.py sqlite                 # compact totals from the SQLite store match?
+#   python benchmark.py corpus out/ -n 20      # write synthetic CHAT transcripts
+#
+# pipeline, golden, modes, parallel, measures and rules take --parser stub (default: fast, no models needed, see
+# stub_parser.py) or --parser stanza. Stub and Stanza results are never compared with
+# each other: each parser has its own golden file and baseline.
+#
+# Exits non-zero when an equivalence check fails, so it can gate changes.
+
+import argparse
+import datetime
+import gc
+import glob
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from extract_clean import clean_for_scoring, clean_many, normalize_nouns
+from parse_cache import WORD_FIELDS, doc_to_rows
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(BASE_DIR, "benchmarks")
+CLEAN_GOLDEN_PATH = os.path.join(BENCH_DIR, "clean_golden.json")
+GOLDEN_CORPUS_DIR = os.path.join(BENCH_DIR, "golden_corpus")
+VERB_LIST_PATH = os.path.join(BASE_DIR, "verb_master_list_present.txt")
+
+STAGES = ("extract", "clean", "parse", "rules", "write", "compact")
+PRODUCTIVITY_KEYS = ("art_productive", "aux_productive", "prog_productive",
+                     "active_prog_productive")
+NOTE_KEYS = ("art_notes", "aux_notes", "prog_notes", "active_prog_notes")
+
+
+def legacy_clean_for_scoring(text):
+    # Frozen copy of the original per-call regex chain: the speed baseline, and the
+    # reference the golden outputs were generated from.
+    text = re.sub(r"\bisp@x\b", "NADS", text, flags=re.IGNORECASE)
+    text = re.sub(r"\b0aux\b", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"&\+t", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"&\+s", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\b0p\b", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\[\+\s*rr\]", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"(\w)[\$@]\w+", r"\1", text)
+    text = re.sub(r"<[^>]*>", "", text)
+
+    replacements = dict()
+    def extract_and_replace(match):
+        word, replacement = match.group(1), match.group(2)
+        replacements[word] = replacement
+        return word
+    text = re.sub(r"\b(\w+)\s*\[\s*:\s*([^\]]+)\]", extract_and_replace, text)
+
+    text = re.sub(r"\[[^\]]*\]", "", text)
+    text = re.sub(r"\([^)]*\)", "", text)
+    text = re.sub(r"[^\w\s\.\?!']", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+
+    for original, replacement in replacements.items():
+        text = re.sub(rf"\b{re.escape(original)}\b", replacement, text)
+
+    text = re.sub(r'\..*$', '.', text)
+    text = text.rstrip('.')
+    text = re.sub(r"\b([A-Za-z]+)'s\s+([a-zA-Z]+ing)\b", r"\1 is \2", text)
+    text = re.sub(r"\bit is\b", "its", text, flags=re.IGNORECASE)
+    text = re.sub(r'\b(uh+|um+)\b[\s,.]*', '', text, flags=re.IGNORECASE).strip()
+    text = re.sub(
+        r"^\s*(and\s+then?|but\s+then?|then|and|but)\s+(a|an|the)\s+",
+        r"\2 ",
+        text, flags=re.IGNORECASE
+    )
+    text = re.sub(
+        r"^\s*(and\s+then?|but\s+then?|then|and|but)\s+",
+        "", text, flags=re.IGNORECASE
+    ).strip()
+    chi_match = re.compile(r'^CHI\s*(.*)').match(text)
+    if chi_match:
+        text = chi_match.group(1).strip()
+    return text
+
+
+# ---------------------------------------------------------------------------
+# Synthetic ENNI-style utterances
+
+SUBJECTS = ["the dog", "a dog", "the doggie", "the elephant", "a giraffe", "the horsie",
+            "he", "she", "they", "it", "the bunny", "an elephant", "mommy", "the lifeguard"]
+AUXILIARIES = ["is", "are", "was", "'s", ""]
+ING_VERBS = ["running", "falling", "swimming", "rolling", "building", "cooking", "crying",
+             "jumping", "going", "getting", "pulling", "chasing", "holding", "playing", "flying"]
+OBJECTS = ["the ball", "a plane", "in the water", "into the pool", "the box", "happy",
+           "to the doctor", "with the ball", "his plane", "over there", ""]
+PREFIXES = ["", "", "", "and ", "and then ", "but ", "then ", "uh ", "um ", "&+t ",
+            "and [/] ", "<the dog> [/] ", "&-uh ", "(be)cause "]
+SUFFIXES = ["", " .", " ?", " !", " [+ rr]", " [+rr] .", " xxx .", " (.) .", " [: went] .",
+            " isp@x .", " 0aux .", " [*] .", " dog@x .", " [//] the ball ."]
+QUESTIONS = ["what is he doing", "where's the ball", "who is running", "what's in the box"]
+
+
+def synthetic_utterance(rng):
+    k = rng.random()
+    if k < 0.08:
+        core = rng.choice(QUESTIONS)
+    elif k < 0.14:
+        core = rng.choice(ING_VERBS)
+    elif k < 0.20:
+        core = "the goed [: went] dog " + rng.choice(ING_VERBS)
+    elif k < 0.25:
+        core = rng.choice(SUBJECTS) + " who is " + rng.choice(ING_VERBS) + " fell"
+    else:
+        core = " ".join(filter(None, [rng.choice(SUBJECTS), rng.choice(AUXILIARIES),
+                                      rng.choice(ING_VERBS), rng.choice(OBJECTS)]))
+    return rng.choice(PREFIXES) + core + rng.choice(SUFFIXES)
+
+
+def synthetic_transcript(rng, n_utterances, rr_rate=0.3):
+    """A CHAT transcript with n_utterances child/examiner utterances.
+
+    Mixes inline and standalone [+rr] codes, continuation lines and dependent tiers the
+    way real ENNI transcripts do; utterance bodies come from synthetic_utterance().
+    """
+    lines = ["@UTF8", "@Begin", "@Languages:\teng",
+             "@Participants:\tCHI Target_Child, EXA Investigator",
+             "@ID:\teng|ENNI|CHI|5;06.||||Target_Child|||"]
+    for _ in range(n_utterances):
+        speaker = "*CHI:" if rng.random() < 0.85 else "*EXA:"
+        utterance = synthetic_utterance(rng)
+        rr = rng.random() < rr_rate
+        if rr and rng.random() < 0.5 and "[+" not in utterance:
+            utterance += " [+ rr]"
+            rr = False
+        if " " in utterance and rng.random() < 0.1:
+            first, rest = utterance.split(" ", 1)
+            lines.append(f"{speaker}\t{first}")
+            lines.append(f"\t{rest}")
+        else:
+            lines.append(f"{speaker}\t{utterance}")
+        if rr:
+            lines.append("[+rr]")
+        if rng.random() < 0.2:
+            lines.append("%mor:\tdet:art|the n|dog aux|be&3S part|run-PRESP .")
+        if rng.random() < 0.05:
+            lines.append("@Comment:\tchild points at the picture")
+    lines.append("@End")
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_corpus(n_transcripts, n_utterances, seed=0):
+    """(name, text) pairs of synthetic transcripts."""
+    rng = random.Random(seed)
+    return [(f"synthetic_{i:03d}", synthetic_transcript(rng, n_utterances))
+            for i in range(n_transcripts)]
+
+
+# Inputs that exercise the ordering subtleties of the cleaning chain
+CLEAN_EDGE_CASES = [
+    "", "   ", "CHI: the dog is running", "&+&+ts the dog", "&+s&+t", " &+t0p the ball",
+    "the [: a] dog and a [: the] cat", "goed [: went] and goed",
+    "isp@x the dog", "ISP@X", "it is running", "IT IS raining", "the cat's running away",
+    "uh uhh um the dog .", "and then the boy is swimming", "but then a dog . and more",
+    "<and the> [/] the dog is closing", "the (.) dog (be)cause", "the dog@x is run$ing",
+    "the dog is running [+ rr] [*] .", "what's that ?", "a [: the] [: an] dog",
+    "the doggie's chasing the kitty", "0aux the 0p dog 0auxiliary", "the ... dog",
+    "the dog , the cat ; the bird", "xxx yyy the dog", "the dog’s running",
+]
+
+
+def _clean_golden_inputs():
+    rng = random.Random(1234)
+    return CLEAN_EDGE_CASES + [synthetic_utterance(rng) for _ in range(300)]
+
+
+def check_clean_golden(update=False):
+    """Compare clean_many() with the stored golden outputs; returns the number of mismatches."""
+    if update:
+        inputs = _clean_golden_inputs()
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(CLEAN_GOLDEN_PATH, "w", encoding="utf-8") as f:
+            json.dump([{"input": u, "cleaned": legacy_clean_for_scoring(u)} for u in inputs],
+                      f, indent=1, ensure_ascii=False)
+        print(f"[OK] Golden outputs written: {CLEAN_GOLDEN_PATH}")
+
+    with open(CLEAN_GOLDEN_PATH, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    outputs = clean_many([g["input"] for g in golden])
+    mismatches = 0
+    for g, out in zip(golden, outputs):
+        if out != g["cleaned"]:
+            mismatches += 1
+            print(f"MISMATCH {g['input']!r}: expected {g['cleaned']!r}, got {out!r}")
+    print(f"Golden cleaning check: {len(golden) - mismatches}/{len(golden)} identical")
+    return mismatches
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_clean(n=20000, repeat=3, seed=0):
+    rng = random.Random(seed)
+    utterances = [synthetic_utterance(rng) for _ in range(n)]
+
+    mismatches = sum(legacy_clean_for_scoring(u) != c
+                     for u, c in zip(utterances, clean_many(utterances)))
+
+    legacy = _best_of(lambda: [legacy_clean_for_scoring(u) for u in utterances], repeat)
+    per_call = _best_of(lambda: [clean_for_scoring(u) for u in utterances], repeat)
+    batch = _best_of(lambda: clean_many(utterances), repeat)
+
+    print(f"Cleaning {n} utterances (best of {repeat}):")
+    print(f"  legacy regex chain : {legacy * 1e6 / n:7.2f} us/utt")
+    print(f"  clean_for_scoring  : {per_call * 1e6 / n:7.2f} us/utt ({legacy / per_call:.2f}x)")
+    print(f"  clean_many         : {batch * 1e6 / n:7.2f} us/utt ({legacy / batch:.2f}x)")
+    print(f"  outputs differing from legacy: {mismatches}")
+    return mismatches
+
+
+# ---------------------------------------------------------------------------
+# End-to-end pipeline: stage timings, peak memory, golden corpus
+
+def make_parser(name):
+    if name == "stub":
+        from stub_parser import StubPipeline
+        return StubPipeline()
+    from models import get_pipeline
+    return get_pipeline()
+
+
+def run_stages(corpus, nlp, output_dir, extract_rr=False, batch_size=None, memory=False):
+    """Run the pipeline stage by stage over corpus; returns {stage: {"seconds", "peak_kb"}}.
+
+    Mirrors interface.run_full_pipeline() + compact.py, but with each stage timed on its
+    own. peak_kb (the largest traced allocation during a stage, from tracemalloc) is only
+    measured with memory=True, as tracing slows everything down.
+    """
+    from interface import source_utterances
+    from analyze import DEFAULT_PARSE_BATCH_SIZE, early_exit_result, iter_scores, parse_texts
+    from score import write_analysis_to_csv
+    from compact import transcript_totals
+
+    totals = {stage: {"seconds": 0.0, "peak_kb": 0.0} for stage in STAGES}
+    counts = {"utterances": 0, "parsed": 0}
+
+    def timed(stage, fn, *args):
+        if memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = fn(*args)
+        totals[stage]["seconds"] += time.perf_counter() - start
+        if memory:
+            peak_kb = (tracemalloc.get_traced_memory()[1] - before) / 1024.0
+            totals[stage]["peak_kb"] = max(totals[stage]["peak_kb"], peak_kb)
+        return result
+
+    def clean(utterances):
+        raws = [u.strip() for u in utterances]
+        return [(raw, normalize_nouns(c)) for raw, c in zip(raws, clean_many(raws)) if c]
+
+    def parse(prepared):
+        wanted = [early_exit_result(raw, c) is None for raw, c in prepared]
+        docs = iter(parse_texts(nlp, [c for (_, c), w in zip(prepared, wanted) if w],
+                                batch_size=batch_size or DEFAULT_PARSE_BATCH_SIZE))
+        return [(raw, c, next(docs) if w else None) for (raw, c), w in zip(prepared, wanted)]
+
+    if memory:
+        tracemalloc.start()
+    csv_paths = []
+    try:
+        for name, text in corpus:
+            utterances = timed("extract", lambda: list(source_utterances(text, extract_rr)))
+            prepared = timed("clean", clean, utterances)
+            parsed = timed("parse", parse, prepared)
+            results = timed("rules", lambda: list(iter_scores(parsed, VERB_LIST_PATH)))
+            csv_path = os.path.join(output_dir, f"{name}_results.csv")
+            timed("write", write_analysis_to_csv, results, csv_path)
+            csv_paths.append(csv_path)
+            counts["utterances"] += len(results)
+            counts["parsed"] += sum(doc is not None for _, _, doc in parsed)
+        timed("compact", lambda: [transcript_totals(p) for p in csv_paths])
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return totals, counts
+
+
+def baseline_path(parser_name):
+    return os.path.join(BENCH_DIR, f"pipeline_baseline_{parser_name}.json")
+
+
+def bench_pipeline(parser_name="stub", n_transcripts=20, n_utterances=300, repeat=3,
+                   extract_rr=False, memory=True, save_baseline=False):
+    corpus = synthetic_corpus(n_transcripts, n_utterances)
+    nlp = make_parser(parser_name)
+
+    best = None
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            totals, counts = run_stages(corpus, nlp, output_dir, extract_rr=extract_rr)
+            if best is None:
+                best = totals
+            for stage in STAGES:
+                best[stage]["seconds"] = min(best[stage]["seconds"], totals[stage]["seconds"])
+        if memory:
+            peaks, _ = run_stages(corpus, nlp, output_dir, extract_rr=extract_rr, memory=True)
+            for stage in STAGES:
+                best[stage]["peak_kb"] = peaks[stage]["peak_kb"]
+
+    n = max(counts["utterances"], 1)
+    report = {
+        "parser": parser_name,
+        "transcripts": n_transcripts,
+        "utterances_per_transcript": n_utterances,
+        "extract_rr": extract_rr,
+        "scored_utterances": counts["utterances"],
+        "parsed_utterances": counts["parsed"],
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "stages": {
+            stage: {
+                "seconds": round(best[stage]["seconds"], 4),
+                "us_per_utterance": round(best[stage]["seconds"] * 1e6 / n, 2),
+                "peak_kb": round(best[stage]["peak_kb"], 1),
+            }
+            for stage in STAGES
+        },
+    }
+    report["total_seconds"] = round(sum(s["seconds"] for s in report["stages"].values()), 4)
+
+    baseline = None
+    path = baseline_path(parser_name)
+    if os.path.exists(path) and not save_baseline:
+        with open(path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        config = ("transcripts", "utterances_per_transcript", "extract_rr")
+        if any(baseline.get(k) != report[k] for k in config):
+            print(f"Baseline {path} used a different corpus; not comparing")
+            baseline = None
+
+    print(f"Pipeline with {parser_name} parser: {n_transcripts} transcripts, "
+          f"{report['scored_utterances']} scored utterances ({report['parsed_utterances']} parsed), "
+          f"best of {repeat}")
+    print(f"  {'stage':<8} {'seconds':>9} {'us/utt':>9} {'peak KB':>10}   vs baseline")
+    for stage in STAGES:
+        st = report["stages"][stage]
+        line = f"  {stage:<8} {st['seconds']:>9.4f} {st['us_per_utterance']:>9.2f} {st['peak_kb']:>10.1f}"
+        if baseline:
+            old = baseline["stages"][stage]["seconds"]
+            line += f"   {st['seconds'] / old:.2f}x" if old else "   -"
+        print(line)
+    print(f"  {'total':<8} {report['total_seconds']:>9.4f}")
+
+    if save_baseline:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"[OK] Baseline written: {path}")
+    return report
+
+
+def golden_path(parser_name):
+    return os.path.join(BENCH_DIR, f"pipeline_golden_{parser_name}.json")
+
+
+def summarize_results(results):
+    """Totals and per-utterance notes: everything a scoring change could move."""
+    return {
+        "utterances": len(results),
+        "totals": {k: sum(r[k] for r in results) for k in PRODUCTIVITY_KEYS},
+        "rows": [[r["cleaned"]] + [r[k] for k in PRODUCTIVITY_KEYS] + [r[k] for k in NOTE_KEYS]
+                 for r in results],
+    }
+
+
+def golden_corpus_files():
+    return sorted(glob.glob(os.path.join(GOLDEN_CORPUS_DIR, "*.cha")))
+
+
+def score_golden_corpus(nlp):
+    from interface import run_full_pipeline
+
+    summary = {}
+    for path in golden_corpus_files():
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        name = os.path.basename(path)
+        for extract_rr in (False, True):
+            results = run_full_pipeline(text, extract_rr=extract_rr, nlp=nlp,
+                                        verb_master_list_path=VERB_LIST_PATH)
+            summary[f"{name}{' -rr' if extract_rr else ''}"] = summarize_results(results)
+    return summary
+
+
+def _dump_golden(summary, f):
+    # one utterance per line keeps the file small and its diffs readable
+    f.write("{\n")
+    for i, (key, run) in enumerate(summary.items()):
+        f.write(f' {json.dumps(key)}: {{"utterances": {run["utterances"]}, '
+                f'"totals": {json.dumps(run["totals"])}, "rows": [\n')
+        f.write(",\n".join("  " + json.dumps(row, ensure_ascii=False) for row in run["rows"]))
+        f.write("\n ]}" + ("," if i < len(summary) - 1 else "") + "\n")
+    f.write("}\n")
+
+
+def check_pipeline_golden(parser_name="stub", update=False):
+    """Compare golden-corpus totals and notes with the stored ones; returns the number of differences."""
+    path = golden_path(parser_name)
+    if update:
+        if not golden_corpus_files():
+            os.makedirs(GOLDEN_CORPUS_DIR, exist_ok=True)
+            for name, text in synthetic_corpus(4, 150, seed=2024):
+                with open(os.path.join(GOLDEN_CORPUS_DIR, name + ".cha"), "w", encoding="utf-8") as f:
+                    f.write(text)
+            print(f"[OK] Golden corpus written: {GOLDEN_CORPUS_DIR}")
+        with open(path, "w", encoding="utf-8") as f:
+            _dump_golden(score_golden_corpus(make_parser(parser_name)), f)
+        print(f"[OK] Golden scores written: {path}")
+
+    if not os.path.exists(path):
+        print(f"No golden scores for the {parser_name} parser; create them with "
+              f"`python benchmark.py golden --parser {parser_name} --update-golden`")
+        return 1
+    with open(path, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    current = score_golden_corpus(make_parser(parser_name))
+
+    differences = 0
+    for key in sorted(set(golden) | set(current)):
+        expected, got = golden.get(key), current.get(key)
+        if expected is None or got is None:
+            differences += 1
+            print(f"MISMATCH {key}: {'missing from golden' if expected is None else 'not scored'}")
+            continue
+        if expected["totals"] != got["totals"]:
+            differences += 1
+            print(f"MISMATCH {key} totals: expected {expected['totals']}, got {got['totals']}")
+        if expected["utterances"] != got["utterances"]:
+            differences += 1
+            print(f"MISMATCH {key}: expected {expected['utterances']} utterances, "
+                  f"got {got['utterances']}")
+            continue
+        for i, (e_row, g_row) in enumerate(zip(expected["rows"], got["rows"])):
+            if e_row != g_row:
+                differences += 1
+                print(f"MISMATCH {key} utterance {i} {e_row[0]!r}: expected {e_row[1:]}, "
+                      f"got {g_row[1:]}")
+    print(f"Golden corpus check ({parser_name}): {len(golden)} runs, {differences} differences")
+    return differences
+
+
+# ---------------------------------------------------------------------------
+# Inference modes: parse time and agreement of each mode with the full pipeline
+
+PARSE_FIELDS = ("upos", "xpos", "lemma", "head", "deprel")
+
+
+def _recording_parser(parse, parsed):
+    # snapshot the parses before the scoring rules retag them in place
+    def parser(texts):
+        docs = parse(texts)
+        parsed.extend((text, doc_to_rows(doc)) for text, doc in zip(texts, docs))
+        return docs
+    return parser
+
+
+def score_with_mode(paths, parser_name, inference_mode, extract_rr=False):
+    """Score transcripts in one inference mode; returns results, parses and the metrics."""
+    from analyze import mode_parser
+    from interface import run_full_pipeline
+    from instrument import Instrumentation
+
+    if parser_name == "stub":
+        nlp = make_parser("stub")
+    else:
+        # stanza: let mode_parser pick up the mode's own pipelines, loaded before timing
+        from inference import mode_pipelines
+        from models import preload
+        nlp = None
+        for processors, options in mode_pipelines(inference_mode):
+            preload(processors=processors, **options)
+    parse = mode_parser(inference_mode, nlp, verb_master_list_path=VERB_LIST_PATH)
+
+    metrics = Instrumentation(inference_mode)
+    results, parsed = {}, []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        results[os.path.basename(path)] = run_full_pipeline(
+            text, extract_rr=extract_rr, parser=_recording_parser(parse, parsed),
+            metrics=metrics, verb_master_list_path=VERB_LIST_PATH)
+    return results, parsed, metrics
+
+
+def compare_parses(reference, parsed):
+    """Token-level agreement of parsed with reference: both lists of (text, rows)."""
+    index = {text: rows for text, rows in reference}
+    fields = [WORD_FIELDS.index(f) for f in PARSE_FIELDS]
+    same_tokens, words, agree = 0, 0, dict.fromkeys(PARSE_FIELDS, 0)
+    for text, rows in parsed:
+        expected = index[text]
+        if [[w[1] for w in sent] for sent in rows] != [[w[1] for w in sent] for sent in expected]:
+            continue
+        same_tokens += 1
+        for sent, e_sent in zip(rows, expected):
+            for w, e in zip(sent, e_sent):
+                words += 1
+                for name, i in zip(PARSE_FIELDS, fields):
+                    agree[name] += w[i] == e[i]
+    return {
+        "tokenization": same_tokens / max(len(parsed), 1),
+        "words": words,
+        **{name: n / max(words, 1) for name, n in agree.items()},
+    }
+
+
+def compare_results(reference, results):
+    """Utterance-, field- and totals-level agreement of two {transcript: results} maps."""
+    keys = PRODUCTIVITY_KEYS + NOTE_KEYS
+    utterances, same, field_same = 0, 0, dict.fromkeys(keys, 0)
+    totals_diff = dict.fromkeys(PRODUCTIVITY_KEYS, 0)
+    for name, expected in reference.items():
+        got = results[name]
+        for e, g in zip(expected, got):
+            utterances += 1
+            same += all(e[k] == g[k] for k in keys)
+            for k in keys:
+                field_same[k] += e[k] == g[k]
+        for k in PRODUCTIVITY_KEYS:
+            totals_diff[k] += sum(r[k] for r in got) - sum(r[k] for r in expected)
+    return {
+        "utterances": same / max(utterances, 1),
+        "fields": {k: n / max(utterances, 1) for k, n in field_same.items()},
+        "totals_diff": totals_diff,
+    }
+
+
+def bench_modes(parser_name="stub", corpus_dir=None, extract_rr=False):
+    from analyze import load_verb_master_list
+    from inference import INFERENCE_MODES, pretag, pretokenize
+
+    paths = sorted(glob.glob(os.path.join(corpus_dir, "*.cha"))) if corpus_dir \
+        else golden_corpus_files()
+    if not paths:
+        print(f"No .cha transcripts in {corpus_dir or GOLDEN_CORPUS_DIR}")
+        return None
+
+    runs = {mode: score_with_mode(paths, parser_name, mode, extract_rr) for mode in INFERENCE_MODES}
+    reference, reference_parses, reference_metrics = runs["full"]
+    full_seconds = reference_metrics.stage_seconds["parse"]
+    compendium = load_verb_master_list(VERB_LIST_PATH)
+    texts = [text for text, _ in reference_parses]
+    covered = sum(pretag(pretokenize(text), compendium) is not None for text in texts)
+
+    print(f"Inference modes with {parser_name} parser: {len(paths)} transcripts, "
+          f"{len(texts)} parsed utterances")
+    print(f"  pretagged mode skips the POS tagger for {covered}/{len(texts)} "
+          f"({covered / max(len(texts), 1):.1%}) of them")
+    report = {}
+    for mode, (results, parsed, metrics) in runs.items():
+        seconds = metrics.stage_seconds["parse"]
+        report[mode] = {
+            "parse_seconds": round(seconds, 4),
+            "parse": compare_parses(reference_parses, parsed),
+            "results": compare_results(reference, results),
+        }
+        tokens, scores = report[mode]["parse"], report[mode]["results"]
+        print(f"  {mode:<13} parse {seconds:8.3f}s ({full_seconds / seconds if seconds else 0:.2f}x)"
+              f"  same tokens {tokens['tokenization']:6.1%}  same results {scores['utterances']:6.1%}")
+        print("    " + ", ".join(f"{f} {tokens[f]:.1%}" for f in PARSE_FIELDS)
+              + f" (of {tokens['words']} words in identically tokenized utterances)")
+        print("    " + ", ".join(f"{k} {v:.1%}" for k, v in scores["fields"].items()))
+        print("    totals vs full: " + ", ".join(f"{k} {v:+d}" for k, v in scores["totals_diff"].items()))
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Parallel parsing of one transcript: latency per worker count, results unchanged
+
+def bench_parallel(parser_name="stub", n_utterances=5000, workers=None, executor="process",
+                   extract_rr=False, seed=0):
+    """Score one long synthetic transcript with 1, 2, 4... parse workers; returns the number
+    of runs whose results differ from the sequential run."""
+    from interface import run_full_pipeline
+    from instrument import Instrumentation
+    from parse_pool import shutdown_parse_pools
+
+    workers = workers or os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < workers:
+        counts.append(counts[-1] * 2)
+    if workers > 1:
+        counts.append(workers)
+    text = synthetic_transcript(random.Random(seed), n_utterances)
+    nlp = make_parser("stub") if parser_name == "stub" else None
+    if nlp is None:
+        from models import preload
+        preload()
+
+    print(f"Parallel parsing with {parser_name} parser ({executor} workers): one transcript "
+          f"of {n_utterances} utterances")
+    reference, reference_seconds, differences = None, None, 0
+    for n in counts:
+        if n > 1:
+            # start the pool (and load its pipelines) outside the timed run
+            run_full_pipeline(text[:2000], extract_rr=extract_rr, nlp=nlp, parse_workers=n,
+                              parse_executor=executor, verb_master_list_path=VERB_LIST_PATH)
+        metrics = Instrumentation(f"parse_workers={n}")
+        start = time.perf_counter()
+        results = run_full_pipeline(text, extract_rr=extract_rr, nlp=nlp, parse_workers=n,
+                                    parse_executor=executor, metrics=metrics,
+                                    verb_master_list_path=VERB_LIST_PATH)
+        seconds = time.perf_counter() - start
+        line = (f"  {n:>3} worker(s) {seconds:8.3f}s  parse {metrics.stage_seconds['parse']:8.3f}s"
+                f"  rules {metrics.stage_seconds['rules']:7.3f}s")
+        if reference is None:
+            reference, reference_seconds = results, seconds
+        else:
+            same = compare_results({"t": reference}, {"t": results})["utterances"]
+            if same < 1 or len(results) != len(reference):
+                differences += 1
+            line += f"  {reference_seconds / seconds:5.2f}x  same results {same:6.1%}"
+        print(line)
+    shutdown_parse_pools()
+    return differences
+
+
+# ---------------------------------------------------------------------------
+# Indexed CHAT reader: same [+rr] utterances as the line scan, and what the index saves
+
+def bench_chat_index(n_transcripts=50, n_utterances=2000, repeat=3, seed=0):
+    """Concatenate synthetic transcripts (plus the golden corpus) into one large file and
+    read its [+rr] CHI utterances with iter_rr_lines() and through chat_index; returns the
+    number of files whose utterances differ."""
+    import shutil
+    from chat_index import ChatIndex, index_path_for
+    from extract_clean import iter_indexed_utterances, iter_rr_lines
+
+    def scan(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return list(iter_rr_lines(f))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for path in golden_corpus_files():
+            paths.append(shutil.copy(path, tmp))
+        large = os.path.join(tmp, "concatenated.cha")
+        with open(large, "w", encoding="utf-8") as f:
+            for _, text in synthetic_corpus(n_transcripts, n_utterances, seed):
+                f.write(text)
+        paths.append(large)
+
+        index_dir = os.path.join(tmp, "indexes")
+        mismatches = 0
+        for path in paths:
+            mismatches += scan(path) != list(iter_indexed_utterances(path))
+            mismatches += scan(path) != list(iter_indexed_utterances(path, index_dir=index_dir))
+            # now from its saved index
+            mismatches += scan(path) != list(iter_indexed_utterances(path, index_dir=index_dir))
+
+        def cold():
+            os.remove(index_path_for(large, index_dir))
+            return list(iter_indexed_utterances(large, index_dir=index_dir))
+
+        size_mb = os.path.getsize(large) / (1024.0 * 1024.0)
+        scan_seconds = _best_of(lambda: scan(large), repeat)
+        cold_seconds = _best_of(cold, repeat)
+        warm_seconds = _best_of(lambda: list(iter_indexed_utterances(large, index_dir=index_dir)),
+                                repeat)
+        with ChatIndex(large) as index:
+            records = len(index)
+            query_seconds = _best_of(lambda: list(index.utterances("EXA", "+rr")), repeat)
+
+    print(f"CHAT index: {len(paths)} files, the largest {size_mb:.1f} MB with {records} utterance "
+          f"records; [+rr] utterances {'OK' if not mismatches else f'differ in {mismatches} reads'}")
+    print(f"  line scan (iter_rr_lines)   {scan_seconds:8.4f}s")
+    print(f"  index, built and saved      {cold_seconds:8.4f}s  ({scan_seconds / cold_seconds:5.2f}x)")
+    print(f"  index, loaded from its file {warm_seconds:8.4f}s  ({scan_seconds / warm_seconds:5.2f}x)")
+    print(f"  query on an open index      {query_seconds:8.4f}s  (EXA [+rr], no rescan)")
+    return mismatches
+
+
+# ---------------------------------------------------------------------------
+# SQLite results store: what writing it costs, and compact totals from SQL vs the files
+
+def bench_sqlite(n_transcripts=200, n_utterances=300, repeat=3, seed=0):
+    """Write results CSVs for a synthetic corpus with and without the SQLite store, then
+    compare the compact totals of a directory walk with those of the store's aggregate
+    query; returns the number of transcripts whose totals differ."""
+    from compact import sqlite_branches, sqlite_totals, transcript_totals
+    from interface import run_full_pipeline
+    from score import write_analysis_to_csv
+
+    nlp = make_parser("stub")
+    scored = [(name, run_full_pipeline(text, nlp=nlp, verb_master_list_path=VERB_LIST_PATH))
+              for name, text in synthetic_corpus(n_transcripts, n_utterances, seed)]
+    utterances = sum(len(results) for _, results in scored)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_dir = os.path.join(tmp, "output")
+        os.makedirs(csv_dir)
+        db_path = os.path.join(tmp, "results.db")
+
+        def write(sqlite_path=None):
+            for name, results in scored:
+                write_analysis_to_csv(results, os.path.join(csv_dir, f"{name}_results.csv"),
+                                      sqlite_path=sqlite_path)
+
+        csv_seconds = _best_of(write, repeat)
+        store_seconds = _best_of(lambda: write(db_path), repeat)
+        paths = sorted(glob.glob(os.path.join(csv_dir, "*.csv")))
+        walk_seconds = _best_of(lambda: [transcript_totals(p) for p in paths], repeat)
+        sql_seconds = _best_of(lambda: sqlite_totals(db_path, csv_dir), repeat)
+        branch_seconds = _best_of(lambda: sqlite_branches(db_path, csv_dir), repeat)
+
+        walked = {os.path.splitext(os.path.basename(p))[0]: transcript_totals(p) for p in paths}
+        summed = {row.pop("Name"): row for row in sqlite_totals(db_path, csv_dir)}
+        differences = sum(walked.get(name) != totals for name, totals in summed.items())
+        differences += len(set(walked) ^ set(summed))
+        db_mb = os.path.getsize(db_path) / (1024.0 * 1024.0)
+
+    print(f"SQLite results store: {n_transcripts} transcripts, {utterances} utterances, "
+          f"store {db_mb:.1f} MB; compact totals "
+          f"{'OK' if not differences else f'differ for {differences} transcripts'}")
+    print(f"  write CSVs                   {csv_seconds:8.3f}s")
+    print(f"  write CSVs + store           {store_seconds:8.3f}s  (+{store_seconds - csv_seconds:.3f}s)")
+    print(f"  compact totals, file walk    {walk_seconds:8.4f}s")
+    print(f"  compact totals, SQL          {sql_seconds:8.4f}s  ({walk_seconds / sql_seconds:5.2f}x)")
+    print(f"  counts per note category     {branch_seconds:8.4f}s")
+    return differences
+
+
+# ---------------------------------------------------------------------------
+# Metric-selective scoring: requested fields identical to the full run, and cheaper
+
+MEASURE_SUBSETS = (("art",), ("aux",), ("prog",), ("active_prog",), ("prog", "active_prog"),
+                   ("ads",))
+EVERY_PASS_MIN_SPEEDUP = 0.9
+
+
+def bench_measures(parser_name="stub", repeat=9):
+    """Score the golden corpus for subsets of the measures, with and without notes, and
+    compare every field they return with the full run; returns the number of mismatches
+    plus the number of subsets that were not faster than the full run (clearly slower, for
+    the subsets that need every rule pass)."""
+    from analyze import is_ads_result, iter_parsed, iter_scores, resolve_measures
+    from interface import run_ads_only_pipeline, source_utterances
+    from parse_cache import rows_to_doc
+
+    nlp = make_parser(parser_name)
+    runs = []
+    for path in golden_corpus_files():
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        for extract_rr in (False, True):
+            parsed = [(raw, cleaned, doc_to_rows(doc) if doc is not None else None)
+                      for raw, cleaned, doc in iter_parsed(source_utterances(text, extract_rr),
+                                                           nlp=nlp)]
+            runs.append((text, extract_rr, parsed))
+
+    def score(measures=None, notes=True):
+        # only the rules are timed, on fresh copies of the parses (the rules retag in place)
+        docs = [[(raw, cleaned, rows_to_doc(cleaned, rows) if rows is not None else None)
+                 for raw, cleaned, rows in parsed] for _, _, parsed in runs]
+        gc.collect()
+        gc.disable()  # a collection landing in one run swamps the differences timed here
+        try:
+            start = time.perf_counter()
+            scored = [list(iter_scores(items, verb_master_list_path=VERB_LIST_PATH,
+                                       measures=measures, notes=notes)) for items in docs]
+            return scored, time.perf_counter() - start
+        finally:
+            gc.enable()
+
+    full, _ = score()
+    mismatches = 0
+    print(f"Measure subsets with {parser_name} parser: {len(runs)} runs, "
+          f"{sum(len(r) for r in full)} utterances; median rule times of {repeat} runs, "
+          f"each paired with a full run (median speedup of the pairs)")
+    for subset in MEASURE_SUBSETS:
+        for notes in (True, False):
+            # each subset run is compared with the full run next to it, which one goes first
+            # alternating, so drift in the machine's speed cancels out of the ratios
+            ratios, seconds = [], []
+            for i in range(repeat):
+                if i % 2:
+                    partial, elapsed = score(subset, notes)
+                    full_elapsed = score()[1]
+                else:
+                    full_elapsed = score()[1]
+                    partial, elapsed = score(subset, notes)
+                ratios.append(full_elapsed / elapsed if elapsed else 0.0)
+                seconds.append(elapsed)
+            speedup, median = statistics.median(ratios), statistics.median(seconds)
+            differences = 0
+            for expected, got in zip(full, partial):
+                differences += len(expected) != len(got)
+                differences += sum(any(e[k] != v for k, v in g.items())
+                                   for e, g in zip(expected, got))
+            mismatches += differences
+            # a subset that needs every rule pass (ads: active progressives are scored against
+            # the progressive lemmas) only saves the progressive values and some notes, a few
+            # percent that the machine's noise can hide; it only fails when clearly slower
+            every_pass = {"art", "aux", "active_prog"} <= resolve_measures(subset)
+            slower = speedup < EVERY_PASS_MIN_SPEEDUP if every_pass else speedup <= 1
+            mismatches += slower
+            fields = len(next((r for run in partial for r in run), {}))
+            verdict = f"{differences} MISMATCHES" if differences else "OK"
+            if slower:
+                verdict += ", SLOWER" if every_pass else ", NOT FASTER"
+            elif every_pass:
+                verdict += " (every rule pass)"
+            print(f"  {'+'.join(subset):<17} notes {'on ' if notes else 'off'}  {median:7.4f}s "
+                  f"({speedup:.2f}x)  {fields:2d} fields  {verdict}")
+
+    ads_differences = 0
+    for (text, extract_rr, _), expected in zip(runs, full):
+        got = run_ads_only_pipeline(text, extract_rr=extract_rr, nlp=nlp,
+                                    verb_master_list_path=VERB_LIST_PATH)
+        ads_differences += len(got) != len(expected) or any(
+            g["is_ads"] != is_ads_result(e) for e, g in zip(expected, got))
+    mismatches += ads_differences
+    print(f"  ADS pipeline is_ads vs full results: "
+          f"{'OK' if not ads_differences else f'{ads_differences} runs differ'}")
+    return mismatches
+
+
+# ---------------------------------------------------------------------------
+# Rules stage alone, by utterance length
+
+RULES_CLAUSES = (1, 4, 16, 64)
+
+
+def rules_baseline_path(parser_name):
+    return os.path.join(BENCH_DIR, f"rules_baseline_{parser_name}.json")
+
+
+def synthetic_long_utterance(rng, n_clauses):
+    """n_clauses synthetic utterance bodies chained with "and": one long sentence."""
+    clauses = []
+    for _ in range(n_clauses):
+        clauses.append(" ".join(filter(None, [rng.choice(SUBJECTS), rng.choice(AUXILIARIES),
+                                              rng.choice(ING_VERBS), rng.choice(OBJECTS)])))
+    return " and ".join(clauses)
+
+
+def bench_rules(parser_name="stub", n_utterances=400, repeat=3, seed=0, save_baseline=False):
+    """Time iter_scores() alone on parsed utterances of 1..64 chained clauses, and check its
+    results and times against the baseline's; returns the number of lengths whose results
+    differ or that are slower than the baseline."""
+    import hashlib
+    from analyze import iter_parsed, iter_scores
+    from parse_cache import rows_to_doc
+
+    nlp = make_parser(parser_name)
+    report = {"parser": parser_name, "utterances": n_utterances,
+              "python": platform.python_version(), "machine": platform.machine(),
+              "created": datetime.datetime.now().isoformat(timespec="seconds"), "lengths": {}}
+    for n_clauses in RULES_CLAUSES:
+        rng = random.Random(seed + n_clauses)
+        utterances = [synthetic_long_utterance(rng, n_clauses) for _ in range(n_utterances)]
+        parsed = [(raw, cleaned, doc_to_rows(doc) if doc is not None else None)
+                  for raw, cleaned, doc in iter_parsed(utterances, nlp=nlp)]
+
+        def score():
+            # fresh copies of the parses (the rules retag in place), timed as well: the copy
+            # does the same kind of work as the rules, so its time tracks the machine's speed
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                docs = [(raw, cleaned, rows_to_doc(cleaned, rows) if rows is not None else None)
+                        for raw, cleaned, rows in parsed]
+                copied = time.perf_counter()
+                results = list(iter_scores(docs, verb_master_list_path=VERB_LIST_PATH))
+                return results, time.perf_counter() - copied, copied - start
+            finally:
+                gc.enable()
+
+        runs = [score() for _ in range(repeat)]
+        results, seconds, _ = min(runs, key=lambda run: run[1])
+        copy_seconds = min(run[2] for run in runs)
+        words = sum(len(s) for _, _, rows in parsed if rows for s in rows)
+        digest = hashlib.sha256(json.dumps(summarize_results(results)).encode("utf-8"))
+        report["lengths"][str(n_clauses)] = {
+            "words_per_utterance": round(words / max(len(parsed), 1), 1),
+            "seconds": round(seconds, 4),
+            "copy_seconds": round(copy_seconds, 4),
+            "us_per_utterance": round(seconds * 1e6 / max(len(results), 1), 2),
+            "results_sha256": digest.hexdigest(),
+        }
+
+    baseline = None
+    path = rules_baseline_path(parser_name)
+    if os.path.exists(path) and not save_baseline:
+        with open(path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("utterances") != n_utterances:
+            print(f"Baseline {path} used a different corpus; not comparing")
+            baseline = None
+
+    mismatches = 0
+    print(f"Rules stage with {parser_name} parser: {n_utterances} utterances per length, "
+          f"best of {repeat}")
+    print(f"  {'clauses':>7} {'words':>7} {'us/utt':>10}   speedup vs baseline, per parse-copy time")
+    for n_clauses, st in report["lengths"].items():
+        line = f"  {n_clauses:>7} {st['words_per_utterance']:>7.1f} {st['us_per_utterance']:>10.2f}"
+        old = baseline["lengths"].get(n_clauses) if baseline else None
+        if old:
+            # times relative to the parse copy's, so the speed the machine had when the
+            # baseline was recorded cancels out (baselines from before that use raw times)
+            speedup = old["seconds"] / st["seconds"] if st["seconds"] else 0
+            if old.get("copy_seconds") and st["copy_seconds"]:
+                speedup *= st["copy_seconds"] / old["copy_seconds"]
+            line += f"   {speedup:.2f}x"
+            if old["results_sha256"] != st["results_sha256"]:
+                mismatches += 1
+                line += "  RESULTS DIFFER"
+            elif speedup < 1:
+                mismatches += 1
+                line += "  SLOWER"
+        print(line)
+
+    if save_baseline:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"[OK] Baseline written: {path}")
+    return mismatches
+
+
+# ---------------------------------------------------------------------------
+# int8 dynamic quantization: parse speed and what it changes in the scores (Stanza only)
+
+def bench_quantize(corpus_dir=None, extract_rr=False):
+    """Score a reference set with fp32 and with int8 POS/depparse models and compare the
+    article, auxiliary and progressive totals; returns the report."""
+    from models import configure_models, pipeline_stats
+
+    paths = sorted(glob.glob(os.path.join(corpus_dir, "*.cha"))) if corpus_dir \
+        else golden_corpus_files()
+    if not paths:
+        print(f"No .cha transcripts in {corpus_dir or GOLDEN_CORPUS_DIR}")
+        return None
+
+    runs = {}
+    for variant, quantize in (("fp32", False), ("int8", True)):
+        configure_models(quantize=quantize)
+        results, _, metrics = score_with_mode(paths, "stanza", "full", extract_rr)
+        runs[variant] = results, metrics.stage_seconds["parse"]
+    configure_models()
+    reference, fp32_seconds = runs["fp32"]
+    results, int8_seconds = runs["int8"]
+    agreement = compare_results(reference, results)
+
+    print(f"Quantization: {len(paths)} transcripts, "
+          f"{sum(len(r) for r in reference.values())} scored utterances")
+    for stats in pipeline_stats():
+        memory = "" if stats["rss_delta_mb"] is None else f", +{stats['rss_delta_mb']:.0f} MB"
+        print(f"  {'int8' if stats['quantized'] else 'fp32'} pipeline: loaded in "
+              f"{stats['load_seconds']:.2f}s{memory}")
+    print(f"  parse fp32 {fp32_seconds:.3f}s, int8 {int8_seconds:.3f}s "
+          f"({fp32_seconds / int8_seconds if int8_seconds else 0:.2f}x)")
+    print(f"  same results {agreement['utterances']:.1%}: "
+          + ", ".join(f"{k} {v:.1%}" for k, v in agreement["fields"].items()))
+    for name, expected in reference.items():
+        print(f"  {name}: " + ", ".join(
+            f"{k} {sum(r[k] for r in expected)} -> {sum(r[k] for r in results[name])}"
+            for k in PRODUCTIVITY_KEYS))
+    print("  totals int8 - fp32: "
+          + ", ".join(f"{k} {v:+d}" for k, v in agreement["totals_diff"].items()))
+    return {"fp32_parse_seconds": round(fp32_seconds, 4),
+            "int8_parse_seconds": round(int8_seconds, 4), "results": agreement}
+
+
+# ---------------------------------------------------------------------------
+# Cold start: what a fresh interpreter pays before any work is done
+
+HEAVY_MODULES = ("pandas", "stanza", "torch")
+STARTUP_IMPORTS = ("interface", "main", "server", "compact", "analyze")
+STARTUP_COMMANDS = {
+    "main.py --help": ["main.py", "--help"],
+    "compact.py --help": ["compact.py", "--help"],
+    "server.py --help": ["server.py", "--help"],
+}
+STARTUP_BASELINE_PATH = os.path.join(BENCH_DIR, "startup_baseline.json")
+
+
+def _time_python(args, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=BASE_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def bench_startup(repeat=5, save_baseline=False):
+    """Time fresh interpreters importing the entry modules and printing --help; returns
+    the number of entry modules that import a heavy dependency at import time."""
+    report = {"python": platform.python_version(), "machine": platform.machine(),
+              "created": datetime.datetime.now().isoformat(timespec="seconds"),
+              "interpreter": round(_time_python(["-c", "pass"], repeat), 4), "seconds": {}}
+    failures = 0
+    print(f"Startup, best of {repeat} (bare interpreter {report['interpreter']:.3f}s)")
+    for module in STARTUP_IMPORTS:
+        code = (f"import sys, {module}; "
+                f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+        loaded = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        report["seconds"][f"import {module}"] = round(_time_python(["-c", f"import {module}"], repeat), 4)
+        if loaded:
+            failures += 1
+            print(f"FAIL import {module} also imports {loaded}")
+    for name, args in STARTUP_COMMANDS.items():
+        report["seconds"][name] = round(_time_python(args, repeat), 4)
+
+    baseline = None
+    if os.path.exists(STARTUP_BASELINE_PATH) and not save_baseline:
+        with open(STARTUP_BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    for name, seconds in report["seconds"].items():
+        line = f"  {name:<20} {seconds:7.3f}s"
+        old = baseline["seconds"].get(name) if baseline else None
+        if old:
+            line += f"   {seconds / old:.2f}x baseline"
+        print(line)
+
+    if save_baseline:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(STARTUP_BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"[OK] Baseline written: {STARTUP_BASELINE_PATH}")
+    return failures
+
+
+def write_corpus(output_dir, n_transcripts, n_utterances, seed=0):
+    os.makedirs(output_dir, exist_ok=True)
+    for name, text in synthetic_corpus(n_transcripts, n_utterances, seed):
+        with open(os.path.join(output_dir, name + ".cha"), "w", encoding="utf-8") as f:
+            f.write(text)
+    print(f"[OK] {n_transcripts} synthetic transcripts written to {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks and equivalence checks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_clean = sub.add_parser("clean", help="Cleaning engine golden check and micro-benchmark")
+    p_clean.add_argument("-n", type=int, default=20000, help="Synthetic utterances to clean")
+    p_clean.add_argument("--repeat", type=int, default=3)
+    p_clean.add_argument("--update-golden", action="store_true",
+                         help="Regenerate the golden outputs from the legacy chain")
+
+    p_pipe = sub.add_parser("pipeline", help="Per-stage timings and peak memory of the pipeline")
+    p_pipe.add_argument("--parser", choices=("stub", "stanza"), default="stub")
+    p_pipe.add_argument("-t", "--transcripts", type=int, default=20)
+    p_pipe.add_argument("-u", "--utterances", type=int, default=300,
+                        help="Utterances per synthetic transcript")
+    p_pipe.add_argument("--repeat", type=int, default=3)
+    p_pipe.add_argument("-rr", "--extract-rr", action="store_true")
+    p_pipe.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    p_pipe.add_argument("--save-baseline", action="store_true",
+                        help="Store this run as the baseline for its parser")
+
+    p_golden = sub.add_parser("golden", help="Golden-corpus totals and notes check")
+    p_golden.add_argument("--parser", choices=("stub", "stanza"), default="stub")
+    p_golden.add_argument("--update-golden", action="store_true",
+                          help="Re-score the golden corpus and store the results as expected")
+
+    p_modes = sub.add_parser("modes", help="Parse time and accuracy of each inference mode")
+    p_modes.add_argument("--parser", choices=("stub", "stanza"), default="stub")
+    p_modes.add_argument("--corpus", default=None,
+                         help="Directory of .cha transcripts (default: the golden corpus)")
+    p_modes.add_argument("-rr", "--extract-rr", action="store_true")
+
+    p_par = sub.add_parser("parallel", help="Latency of one long transcript vs parse workers")
+    p_par.add_argument("--parser", choices=("stub", "stanza"), default="stub")
+    p_par.add_argument("-u", "--utterances", type=int, default=5000)
+    p_par.add_argument("-w", "--workers", type=int, default=None,
+                       help="Most parse workers to try (default: CPU count)")
+    p_par.add_argument("--executor", choices=("process", "thread"), default="process")
+    p_par.add_argument("-rr", "--extract-rr", action="store_true")
+
+    p_meas = sub.add_parser("measures", help="Partial scoring vs the full run on the golden corpus")
+    p_meas.add_argument("--parser", choices=("stub", "stanza"), default="stub")
+    p_meas.add_argument("--repeat", type=int, default=9)
+
+    p_rules = sub.add_parser("rules", help="Rules stage by utterance length vs the baseline")
+    p_rules.add_argument("--parser", choices=("stub", "stanza"), default="stub")
+    p_rules.add_argument("-u", "--utterances", type=int, default=400,
+                         help="Utterances per length")
+    p_rules.add_argument("--repeat", type=int, default=3)
+    p_rules.add_argument("--save-baseline", action="store_true",
+                         help="Store this run (timings and results) as the baseline")
+
+    p_index = sub.add_parser("chatindex", help="Indexed CHAT reader vs the [+rr] line scan")
+    p_index.add_argument("-t", "--transcripts", type=int, default=50)
+    p_index.add_argument("-u", "--utterances", type=int, default=2000)
+    p_index.add_argument("--repeat", type=int, default=3)
+
+    p_sql = sub.add_parser("sqlite", help="SQLite results store: write cost, SQL vs file compact")
+    p_sql.add_argument("-t", "--transcripts", type=int, default=200)
+    p_sql.add_argument("-u", "--utterances", type=int, default=300)
+    p_sql.add_argument("--repeat", type=int, default=3)
+
+    p_quant = sub.add_parser("quantize", help="int8 vs fp32 Stanza models: speed and totals")
+    p_quant.add_argument("--corpus", default=None,
+                         help="Directory of .cha transcripts (default: the golden corpus)")
+    p_quant.add_argument("-rr", "--extract-rr", action="store_true")
+
+    p_start = sub.add_parser("startup", help="Cold-start time of the entry points")
+    p_start.add_argument("--repeat", type=int, default=5)
+    p_start.add_argument("--save-baseline", action="store_true",
+                         help="Store this run as the startup baseline")
+
+    p_corpus = sub.add_parser("corpus", help="Write synthetic CHAT transcripts")
+    p_corpus.add_argument("output_dir")
+    p_corpus.add_argument("-n", "--transcripts", type=int, default=20)
+    p_corpus.add_argument("-u", "--utterances", type=int, default=300)
+    p_corpus.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.command == "clean":
+        failures = check_clean_golden(update=args.update_golden)
+        failures += bench_clean(args.n, args.repeat)
+        sys.exit(1 if failures else 0)
+    elif args.command == "pipeline":
+        bench_pipeline(args.parser, args.transcripts, args.utterances, args.repeat,
+                       extract_rr=args.extract_rr, memory=not args.no_memory,
+                       save_baseline=args.save_baseline)
+    elif args.command == "golden":
+        sys.exit(1 if check_pipeline_golden(args.parser, update=args.update_golden) else 0)
+    elif args.command == "modes":
+        bench_modes(args.parser, args.corpus, extract_rr=args.extract_rr)
+    elif args.command == "parallel":
+        sys.exit(1 if bench_parallel(args.parser, args.utterances, args.workers, args.executor,
+                                     extract_rr=args.extract_rr) else 0)
+    elif args.command == "measures":
+        sys.exit(1 if bench_measures(args.parser, args.repeat) else 0)
+    elif args.command == "rules":
+        sys.exit(1 if bench_rules(args.parser, args.utterances, args.repeat,
+                                  save_baseline=args.save_baseline) else 0)
+    elif args.command == "chatindex":
+        sys.exit(1 if bench_chat_index(args.transcripts, args.utterances, args.repeat) else 0)
+    elif args.command == "sqlite":
+        sys.exit(1 if bench_sqlite(args.transcripts, args.utterances, args.repeat) else 0)
+    elif args.command == "quantize":
+        bench_quantize(args.corpus, extract_rr=args.extract_rr)
+    elif args.command == "startup":
+        sys.exit(1 if bench_startup(args.repeat, save_baseline=args.save_baseline) else 0)
+    elif args.command == "corpus":
+        write_corpus(args.output_dir, args.transcripts, args.utterances, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+# One-pass index of the utterance records of a CHAT transcript.
+#
+# The transcript is memory-mapped and scanned once. For every main tier ("*CHI:", "*EXA:"...)
+# the index keeps its speaker, byte offsets, the spans of its continuation lines, the
+# postcodes in it ("[+rr]" -> "+rr", with the segment each first appears in) or standing
+# alone on the line right after it, and the spans of its dependent tiers ("%mor:"...).
+# Queries by speaker and postcode then decode only the spans they return, straight from
+# the map.
+#
+# By default the index is built in memory for each read. Given an index_dir, it is saved
+# there as <file name>.chatidx and reused while the file's path, size and mtime are
+# unchanged. Format: one JSON header line
+#   {"format": "aps-chatidx", "version": 1, "path": ..., "size": ..., "mtime_ns": ..., ...}
+# followed by the columns as raw 64-bit integer arrays, so loading it is a few reads.
+# Offsets are bytes; line endings are "\n" or "\r\n".
+
+import json
+import mmap
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+INDEX_FORMAT = "aps-chatidx"
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".chatidx"
+
+# per record (the *_first columns have one more entry, closing the last record's range)
+RECORD_COLUMNS = ("speaker", "start", "end", "text_start", "cont_first", "tier_first")
+# continuation lines, dependent tiers, and one entry per (record, postcode) in record order;
+# code_segment is -1 when the code is only on the line after the record
+FLAT_COLUMNS = ("cont_start", "cont_end", "tier_name", "tier_start", "tier_end",
+                "code_name", "code_record", "code_segment", "code_trailing")
+COLUMNS = RECORD_COLUMNS + FLAT_COLUMNS
+
+# one match per line; lastgroup tells main tier, dependent tier, continuation or header
+_LINE = re.compile(rb"^(?:\*([^:\s]+):(?P<main>[^\n]*)|%(?P<tier>[^:\s]+):[^\n]*"
+                   rb"|(?P<cont>[ \t])[^\n]*|(?P<header>@)[^\n]*|[^\n]*)$", re.MULTILINE)
+_TIER_PREFIX = re.compile(rb"%[^:\s]+:")
+_POSTCODE = re.compile(rb"\[\s*\+\s*([^\]\s]+)\s*\]")
+_POSTCODE_ONLY = re.compile(rb"\s*\[\s*\+\s*([^\]\s]+)\s*\]\s*")
+
+# codes: {postcode: index of the first segment holding it}, segment 0 being the main line
+# and 1.. its continuations; trailing_codes: postcodes alone on the line after the record
+UtteranceRecord = namedtuple("UtteranceRecord", ["speaker", "start", "end", "text_start",
+                                                 "continuations", "codes", "trailing_codes",
+                                                 "tiers"])
+
+
+def index_path_for(path, index_dir):
+    return os.path.join(index_dir, os.path.basename(path) + INDEX_SUFFIX)
+
+
+def build_index(buf):
+    """Scan a transcript buffer (bytes or mmap) once; returns (names, columns), names being
+    the speaker, code and tier name tables the columns refer to by position."""
+    names = {"speaker": [], "code": [], "tier": []}
+    ids = {"speaker": {}, "code": {}, "tier": {}}
+    columns = {name: array("q") for name in COLUMNS}
+
+    def name_id(kind, name):
+        table = ids[kind]
+        if name not in table:
+            table[name] = len(table)
+            names[kind].append(name.decode("utf-8"))
+        return table[name]
+
+    codes = {}  # of the open record: code id -> [inline segment or -1, on the line after]
+
+    def add_codes(start, end, segment):
+        if buf.find(b"[", start, end) < 0:
+            return
+        for m in _POSTCODE.finditer(buf, start, end):
+            entry = codes.setdefault(name_id("code", b"+" + m.group(1)), [-1, 0])
+            if entry[0] < 0:
+                entry[0] = segment
+
+    def close_record():
+        record = len(starts) - 1
+        for code, (segment, trailing) in codes.items():
+            columns["code_name"].append(code)
+            columns["code_record"].append(record)
+            columns["code_segment"].append(segment)
+            columns["code_trailing"].append(trailing)
+        codes.clear()
+
+    starts, speakers = columns["start"], columns["speaker"]
+    cont_start, cont_end, tier_end = columns["cont_start"], columns["cont_end"], columns["tier_end"]
+    speaker_ids = ids["speaker"]
+    in_record = False  # a record is open: dependent tiers attach to it
+    state = None       # "main" or "tier": what a continuation line would extend
+    segment = 0
+    for m in _LINE.finditer(buf):
+        kind = m.lastgroup
+        if kind == "cont":
+            if state == "main":
+                start, end = m.span()
+                segment += 1
+                cont_start.append(start)
+                cont_end.append(end)
+                add_codes(start, end, segment)
+            elif state == "tier":
+                tier_end[-1] = m.end()
+        elif kind == "main":
+            if codes:
+                close_record()
+            speaker = m.group(1)
+            speakers.append(speaker_ids[speaker] if speaker in speaker_ids
+                            else name_id("speaker", speaker))
+            start, end = m.span()
+            text_start = m.start("main")
+            starts.append(start)
+            columns["end"].append(end)
+            columns["text_start"].append(text_start)
+            columns["cont_first"].append(len(cont_start))
+            columns["tier_first"].append(len(tier_end))
+            segment = 0
+            add_codes(text_start, end, 0)
+            in_record, state = True, "main"
+        elif kind == "tier" and in_record:
+            columns["tier_name"].append(name_id("tier", m.group("tier")))
+            columns["tier_start"].append(m.start())
+            tier_end.append(m.end())
+            state = "tier"
+        else:
+            if state == "main":
+                only = _POSTCODE_ONLY.fullmatch(buf, *m.span())
+                if only:
+                    codes.setdefault(name_id("code", b"+" + only.group(1)), [-1, 0])[1] = 1
+            if kind == "header":  # a header ends the last record
+                in_record = False
+            state = None
+
+    if codes:
+        close_record()
+    columns["cont_first"].append(len(cont_start))
+    columns["tier_first"].append(len(tier_end))
+    return names, columns
+
+
+def _source_state(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _read_index(index_path, path, size, mtime_ns):
+    # (names, columns) of a saved index of this version and source state, else None
+    try:
+        with open(index_path, "rb") as f:
+            header = json.loads(f.readline())
+            if (header.get("format") != INDEX_FORMAT or header.get("version") != INDEX_VERSION
+                    or header.get("byteorder") != sys.byteorder or header.get("path") != path
+                    or header.get("size") != size
+                    or header.get("mtime_ns") != mtime_ns):
+                return None
+            columns = {}
+            for name, length in header["columns"]:
+                columns[name] = array("q")
+                columns[name].frombytes(f.read(length * columns[name].itemsize))
+                if len(columns[name]) != length:
+                    return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if set(columns) != set(COLUMNS):
+        return None
+    return header["names"], columns
+
+
+def _write_index(index_path, path, size, mtime_ns, names, columns):
+    header = {"format": INDEX_FORMAT, "version": INDEX_VERSION, "byteorder": sys.byteorder,
+              "path": path, "size": size, "mtime_ns": mtime_ns, "names": names,
+              "columns": [[name, len(columns[name])] for name in COLUMNS]}
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    tmp = f"{index_path}.{os.getpid()}.tmp"  # workers may index the same file at once
+    try:
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for name in COLUMNS:
+                columns[name].tofile(f)
+        os.replace(tmp, index_path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_index(path, index_dir=None):
+    """(names, columns) of the transcript at path (see build_index()). With index_dir, the
+    index saved there is read when it is current, else a new one is saved there."""
+    size, mtime_ns = _source_state(path)
+    if index_dir:
+        path = os.path.abspath(path)
+        index_path = index_path_for(path, index_dir)
+        saved = _read_index(index_path, path, size, mtime_ns)
+        if saved is not None:
+            return saved
+
+    with open(path, "rb") as f:
+        if size == 0:
+            names, columns = build_index(b"")
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                names, columns = build_index(mm)
+
+    if index_dir:
+        try:
+            _write_index(index_path, path, size, mtime_ns, names, columns)
+        except OSError:
+            print(f"Warning: could not write {index_path}; the transcript will be indexed again next time")
+    return names, columns
+
+
+class ChatIndex:
+    """Memory-mapped transcript plus its index; use as a context manager. Records are
+    numbered in file order."""
+
+    def __init__(self, path, index_dir=None):
+        self.path = path
+        self.names, self.columns = load_index(path, index_dir=index_dir)
+        self._file = open(path, "rb")
+        self._map = None
+        if len(self):
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.columns["start"])
+
+    def record(self, i):
+        """The UtteranceRecord of record number i."""
+        c, names = self.columns, self.names
+        cont = range(c["cont_first"][i], c["cont_first"][i + 1])
+        tiers = range(c["tier_first"][i], c["tier_first"][i + 1])
+        entries = range(bisect_left(c["code_record"], i), bisect_right(c["code_record"], i))
+        return UtteranceRecord(
+            names["speaker"][c["speaker"][i]], c["start"][i], c["end"][i], c["text_start"][i],
+            tuple((c["cont_start"][j], c["cont_end"][j]) for j in cont),
+            {names["code"][c["code_name"][j]]: c["code_segment"][j]
+             for j in entries if c["code_segment"][j] >= 0},
+            tuple(names["code"][c["code_name"][j]] for j in entries if c["code_trailing"][j]),
+            tuple((names["tier"][c["tier_name"][j]], c["tier_start"][j], c["tier_end"][j])
+                  for j in tiers))
+
+    def select(self, speaker=None, code=None):
+        """(record number, segment) of the records of speaker (any, if None) that carry
+        postcode code (any, if None). segment is where the code first appears inline, or
+        None (no code asked for, or the code is only on the line after the record)."""
+        c, names = self.columns, self.names
+        if speaker is not None and speaker not in names["speaker"]:
+            return []
+        if code is not None and code not in names["code"]:
+            return []
+        speaker_id = names["speaker"].index(speaker) if speaker is not None else None
+
+        if code is None:
+            if speaker_id is None:
+                return [(i, None) for i in range(len(self))]
+            return [(i, None) for i, s in enumerate(c["speaker"]) if s == speaker_id]
+
+        code_id = names["code"].index(code)
+        speakers = c["speaker"]
+        return [(i, segment if segment >= 0 else None)
+                for name, i, segment in zip(c["code_name"], c["code_record"], c["code_segment"])
+                if name == code_id and (speaker_id is None or speakers[i] == speaker_id)]
+
+    def text(self, i, last_segment=None):
+        """Record i's main line and continuation lines (up to segment last_segment), each
+        stripped and joined by spaces."""
+        c, mm = self.columns, self._map
+        parts = [mm[c["text_start"][i]:c["end"][i]].decode("utf-8").strip()]
+        first, last = c["cont_first"][i], c["cont_first"][i + 1]
+        if last_segment is not None:
+            last = min(last, first + last_segment)
+        for j in range(first, last):
+            parts.append(mm[c["cont_start"][j]:c["cont_end"][j]].decode("utf-8").strip())
+        return " ".join(parts)
+
+    def tier(self, i, name):
+        """Text of record i's dependent tier name (e.g. "mor"), or None."""
+        c = self.columns
+        for j in range(c["tier_first"][i], c["tier_first"][i + 1]):
+            if self.names["tier"][c["tier_name"][j]] == name:
+                start, end = c["tier_start"][j], c["tier_end"][j]
+                prefix = _TIER_PREFIX.match(self._map, start, end)
+                return " ".join(self._map[prefix.end():end].decode("utf-8").split())
+        return None
+
+    def utterances(self, speaker=None, code=None):
+        """Yield the text of every record select(speaker, code) returns, in file order. With
+        code, a record's text ends at the segment the code first appears in, the way
+        extract_clean.iter_rr_lines() cuts [+rr] utterances."""
+        for i, segment in self.select(speaker, code):
+            yield self.text(i, segment)
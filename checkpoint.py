@@ -0,0 +1,120 @@
+# Checkpoints and the run journal, for resuming a batch run that died (`main.py --resume`).
+#
+# Transcript checkpoints: every checkpoint_every scored utterances, the streaming sink's
+# spools are synced and <name>_results.csv.spool/checkpoint.json records how far they are
+# written plus the scoring rules' memory (the seen article/aux contexts and progressive
+# lemmas). A resumed transcript cuts its spools back to that point, skips the utterances
+# already scored without parsing them, and carries on from the saved rule memory, so its
+# output is identical to an uninterrupted run. A checkpoint is only used for the same
+# transcript (path, size, mtime) scored with the same options.
+#
+# Run journal: output/run_journal.jsonl gets one line when a run starts (its transcripts,
+# options and model settings) and one per transcript as it finishes. --resume replays the
+# last run with its own options and model settings, skipping the transcripts it already
+# finished.
+
+import datetime
+import json
+import os
+
+CHECKPOINT_FORMAT = "aps-checkpoint"
+CHECKPOINT_VERSION = 1
+CHECKPOINT_NAME = "checkpoint.json"
+DEFAULT_CHECKPOINT_EVERY = 500
+
+JOURNAL_NAME = "run_journal.jsonl"
+
+_CONTEXT_SETS = ("article_contexts", "aux_contexts")  # sets of tuples; the others hold strings
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def source_signature(file_path, **options):
+    """Identifies a transcript and the options that affect its results."""
+    st = os.stat(file_path)
+    return {"file": os.path.abspath(file_path), "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns, "options": options}
+
+
+def checkpoint_path_for(spool_dir):
+    return os.path.join(spool_dir, CHECKPOINT_NAME)
+
+
+def save_checkpoint(sink, state, signature):
+    """Record the sink's position and the scoring state (see analyze.new_scoring_state())."""
+    _write_json(checkpoint_path_for(sink.spool_dir), {
+        "format": CHECKPOINT_FORMAT,
+        "version": CHECKPOINT_VERSION,
+        "source": signature,
+        "position": sink.position(),
+        # repr as the key: lemmas and context words can be None, which doesn't sort with str
+        "state": {key: sorted(values, key=repr) for key, values in state.items()},
+    })
+
+
+def load_checkpoint(spool_dir, signature):
+    """Return (sink position, scoring state) of a matching checkpoint, or None."""
+    try:
+        with open(checkpoint_path_for(spool_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("format") != CHECKPOINT_FORMAT or data.get("version") != CHECKPOINT_VERSION \
+            or data.get("source") != signature:
+        return None
+    state = {
+        key: {tuple(v) for v in values} if key in _CONTEXT_SETS else set(values)
+        for key, values in data["state"].items()
+    }
+    return data["position"], state
+
+
+class RunJournal:
+    """Append-only record of a batch run in output_dir/run_journal.jsonl."""
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, JOURNAL_NAME)
+
+    def _append(self, entry):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, files, options, models=None):
+        self._append({"event": "run", "started": datetime.datetime.now().isoformat(timespec="seconds"),
+                      "files": [os.path.abspath(f) for f in files], "options": options,
+                      "models": models})
+
+    def finished(self, file_path, ok):
+        self._append({"event": "done" if ok else "failed", "file": os.path.abspath(file_path)})
+
+    def last_run(self):
+        """(files, options, model settings, finished files) of the most recent run, or None.
+
+        The model settings are None for runs journaled before they were recorded."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        run, finished = None, set()
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line of a run that was killed mid-write
+            if entry["event"] == "run":
+                run, finished = entry, set()
+            elif entry["event"] == "done":
+                finished.add(entry["file"])
+        if run is None:
+            return None
+        return run["files"], run["options"], run.get("models"), finished
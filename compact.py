@@ -1,12 +1,82 @@
 # Compact takes a directory of processed transcripts and converts them into a singular csv file
 # Compact also can take a singular .csv file and convert it into a compact csv file
-
+#
+# pandas is only imported by the functions that read or write with it, so the sidecar
+# path and the usage message start without it.
+#
+# Totals come from the .scores.jsonl sidecar score.py writes next to each results CSV.
+# Outputs from before the sidecars existed are parsed from the CSV layout instead.
+#
+# A directory compaction keeps a manifest next to its output (<name>_compact.manifest.json)
+# with the size, mtime, SHA-256 and totals of every input. On the next run only new or
+# changed inputs are read again, in a process pool when there are several; the output is
+# the same as a full recompute. Pass --full to ignore the manifest.
+#
+# With --sqlite DB, the totals come from the SQLite results store main.py --sqlite fills
+# instead, in one query and without a directory walk: the store sums each transcript's
+# scores when the transcript is finished. Given a folder too, only the transcripts whose
+# CSVs are in it are included, which gives the same rows as the directory mode.
+# --branches also writes, from an aggregate over every scored utterance, the number of
+# utterances per metric and note category (rule branch).
+
+import argparse
+import hashlib
+import json
 import os
 import sys
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from score import (PARTIAL_SUFFIX, SIDECAR_FORMAT, SIDECAR_VERSION, open_results_db,
+                   sidecar_path_for)
+
+MANIFEST_FORMAT = "aps-compact-manifest"
+MANIFEST_VERSION = 1
+
+PRODUCTIVITY_TOTALS = {
+    "Total Article Productivity": "art_productive",
+    "Total Auxiliary Productivity": "aux_productive",
+    "Total Active Progressive Productivity": "active_prog_productive",
+    "Total General Progressive Productivity": "prog_productive",
+}
+
+
+def read_sidecar_totals(csv_path, kind):
+    """Totals from the CSV's sidecar, or None if there is no usable sidecar for it."""
+    sidecar = sidecar_path_for(csv_path)
+    try:
+        # a sidecar older than its CSV belongs to an earlier run
+        if os.path.getmtime(sidecar) < os.path.getmtime(csv_path):
+            return None
+        with open(sidecar, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    if header.get("format") != SIDECAR_FORMAT or header.get("version") != SIDECAR_VERSION \
+            or header.get("kind") != kind:
+        return None
+
+    totals = header["totals"]
+    if kind == "ads":
+        total_utts, total_ads = totals["utterances"], totals["ads"]
+        ratio = total_ads / total_utts if total_utts > 0 else 0
+        return {
+            "Total ADS": total_ads,
+            "Total Utterances": total_utts,
+            "ADS Ratio": round(ratio, 4)
+        }
+    return {name: totals[key] for name, key in PRODUCTIVITY_TOTALS.items()}
+
+
+def transcript_totals(csv_path):
+    if is_ads_csv(csv_path):
+        totals = read_sidecar_totals(csv_path, "ads")
+        return totals if totals is not None else parse_ads_column(csv_path)
+    totals = read_sidecar_totals(csv_path, "productivity")
+    return totals if totals is not None else parse_productivity_column(csv_path)
 
 
 def parse_productivity_column(csv_path):
+    import pandas as pd
 
     df = pd.read_csv(csv_path, header=None, names=["value"])
     data = df["value"].fillna("").astype(str).tolist()
@@ -63,6 +133,7 @@ def is_ads_csv(csv_path):
 
 
 def parse_ads_column(csv_path):
+    import pandas as pd
 
     df = pd.read_csv(csv_path)
 
@@ -80,13 +151,11 @@ def parse_ads_column(csv_path):
     }
 
 def compact_single(csv_path):
+    import pandas as pd
 
     base = os.path.splitext(os.path.basename(csv_path))[0]
 
-    if is_ads_csv(csv_path):
-        totals = parse_ads_column(csv_path)
-    else:
-        totals = parse_productivity_column(csv_path)
+    totals = transcript_totals(csv_path)
 
     out_df = pd.DataFrame([{
         "Name": base,
@@ -100,36 +169,170 @@ def compact_single(csv_path):
     print(f"[OK] Compact file written: {output_path}")
 
 
-def compact_directory(dir_path):
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path_for(output_path):
+    return os.path.splitext(output_path)[0] + ".manifest.json"
+
+
+def load_manifest(path, dir_path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("format") != MANIFEST_FORMAT or manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    # another directory with the same name compacts to the same output file
+    if manifest.get("directory") != os.path.abspath(dir_path):
+        return {}
+    return manifest["files"]
+
+
+def save_manifest(path, dir_path, entries):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"format": MANIFEST_FORMAT, "version": MANIFEST_VERSION,
+                   "directory": os.path.abspath(dir_path), "files": entries}, f)
+    os.replace(tmp, path)
 
-    rows = []
+
+def _hashed_totals(fpath):
+    return file_sha256(fpath), transcript_totals(fpath)
+
+
+def compact_directory(dir_path, workers=None, full=False):
+    import pandas as pd
+
+    base = os.path.basename(os.path.normpath(dir_path))
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    output_path = os.path.join(script_dir, f"{base}_compact.csv")
+    manifest_path = manifest_path_for(output_path)
+    previous = {} if full else load_manifest(manifest_path, dir_path)
+
+    entries = {}
+    changed = []
 
     for fname in os.listdir(dir_path):
 
         if not fname.lower().endswith((".csv", ".txt")):
             continue
+        if fname.lower().endswith(PARTIAL_SUFFIX):
+            continue  # rows of a failed run, not a transcript's results
 
         fpath = os.path.join(dir_path, fname)
-
-        if is_ads_csv(fpath):
-            totals = parse_ads_column(fpath)
+        st = os.stat(fpath)
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        old = previous.get(fname)
+        if old and old["size"] == entry["size"] and old["mtime_ns"] == entry["mtime_ns"]:
+            entry["sha256"], entry["totals"] = old["sha256"], old["totals"]
         else:
-            totals = parse_productivity_column(fpath)
+            changed.append(fname)
+        entries[fname] = entry
+
+    # files touched but not modified keep their totals once the hash confirms it
+    to_parse = []
+    for fname in changed:
+        old = previous.get(fname)
+        if old and old["size"] == entries[fname]["size"]:
+            sha = file_sha256(os.path.join(dir_path, fname))
+            if sha == old["sha256"]:
+                entries[fname]["sha256"], entries[fname]["totals"] = sha, old["totals"]
+                continue
+        to_parse.append(fname)
+
+    paths = [os.path.join(dir_path, fname) for fname in to_parse]
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_hashed_totals, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    else:
+        parsed = [_hashed_totals(p) for p in paths]
+    for fname, (sha, totals) in zip(to_parse, parsed):
+        entries[fname]["sha256"], entries[fname]["totals"] = sha, totals
 
-        rows.append({
-            "Name": os.path.splitext(fname)[0],
-            **totals
-        })
+    rows = [{"Name": os.path.splitext(fname)[0], **entry["totals"]}
+            for fname, entry in entries.items()]
 
     result = pd.DataFrame(rows)
 
-    base = os.path.basename(os.path.normpath(dir_path))
+    result.to_csv(output_path, index=False)
+    save_manifest(manifest_path, dir_path, entries)
+    print(f"[OK] Directory compact file written: {output_path} "
+          f"({len(paths)} of {len(entries)} files read)")
+
 
+def _store_filter(dir_path):
+    # WHERE clause on transcripts t: complete ones, in dir_path if given
+    if dir_path is None:
+        return "t.complete = 1", []
+    return "t.complete = 1 AND t.output_dir = ?", [os.path.abspath(dir_path)]
+
+
+def sqlite_totals(db_path, dir_path=None):
+    """Compact rows of the complete transcripts in the results store at db_path (those whose
+    CSVs are in dir_path, if given), from the totals the store sums up per transcript."""
+    where, params = _store_filter(dir_path)
+    conn = open_results_db(db_path)
+    try:
+        cursor = conn.execute(
+            f"SELECT t.name, t.kind, t.utterances, t.art_productive, t.aux_productive, "
+            f"t.active_prog_productive, t.prog_productive, t.ads "
+            f"FROM transcripts t WHERE {where} ORDER BY t.name, t.id", params)
+        rows = []
+        for name, kind, total_utts, art, aux, active_prog, prog, total_ads in cursor:
+            if kind == "ads":
+                ratio = total_ads / total_utts if total_utts > 0 else 0
+                rows.append({"Name": name, "Total ADS": total_ads,
+                             "Total Utterances": total_utts, "ADS Ratio": round(ratio, 4)})
+            else:
+                rows.append({"Name": name, **dict(zip(PRODUCTIVITY_TOTALS,
+                                                      (art, aux, active_prog, prog)))})
+        return rows
+    finally:
+        conn.close()
+
+
+def sqlite_branches(db_path, dir_path=None):
+    """Utterances, exists flags and productive scores per metric and note category."""
+    where, params = _store_filter(dir_path)
+    conn = open_results_db(db_path)
+    try:
+        cursor = conn.execute(
+            f"SELECT s.metric, s.note_category, COUNT(*), SUM(s.present), SUM(s.productive) "
+            f"FROM scores s JOIN transcripts t ON t.id = s.transcript_id "
+            f"WHERE {where} GROUP BY s.metric, s.note_category "
+            f"ORDER BY s.metric, s.note_category", params)
+        return [{"Metric": metric, "Note Category": category or "", "Utterances": count,
+                 "Exists": present, "Productive": productive}
+                for metric, category, count, present, productive in cursor]
+    finally:
+        conn.close()
+
+
+def compact_sqlite(db_path, dir_path=None, branches=False):
+    import pandas as pd
+
+    base = os.path.basename(os.path.normpath(dir_path)) if dir_path \
+        else os.path.splitext(os.path.basename(db_path))[0]
     script_dir = os.path.dirname(os.path.abspath(__file__))
     output_path = os.path.join(script_dir, f"{base}_compact.csv")
 
-    result.to_csv(output_path, index=False)
-    print(f"[OK] Directory compact file written: {output_path}")
+    rows = sqlite_totals(db_path, dir_path)
+    pd.DataFrame(rows).to_csv(output_path, index=False)
+    print(f"[OK] Compact file written from {db_path}: {output_path} ({len(rows)} transcripts)")
+
+    if branches:
+        branches_path = os.path.join(script_dir, f"{base}_branches.csv")
+        pd.DataFrame(sqlite_branches(db_path, dir_path)).to_csv(branches_path, index=False)
+        print(f"[OK] Rule-branch counts written: {branches_path}")
 
 
 if __name__ == "__main__":
@@ -137,14 +340,34 @@ if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python compact.py file.csv")
-        print("  python compact.py folder/")
+        print("  python compact.py folder/ [--workers N] [--full]")
+        print("  python compact.py --sqlite results.db [folder/] [--branches]")
         sys.exit(0)
 
-    path = sys.argv[1]
-
-    if os.path.isfile(path):
+    parser = argparse.ArgumentParser(description="Compact per-transcript results into one CSV")
+    parser.add_argument("path", nargs="?", default=None)
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Processes for reading changed files (default: CPU count)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest and re-read every file")
+    parser.add_argument("--sqlite", default=None, metavar="DB",
+                        help="Aggregate the SQLite results store written by main.py --sqlite "
+                             "(only the transcripts of path, if given) instead of reading files")
+    parser.add_argument("--branches", action="store_true",
+                        help="With --sqlite, also write utterance counts per note category")
+    args = parser.parse_args()
+    path = args.path
+
+    if args.sqlite:
+        if not os.path.isfile(args.sqlite):
+            print(f"Error: results store {args.sqlite} not found.")
+        else:
+            compact_sqlite(args.sqlite, path, branches=args.branches)
+    elif path is None:
+        parser.error("a file or folder is needed without --sqlite")
+    elif os.path.isfile(path):
         compact_single(path)
     elif os.path.isdir(path):
-        compact_directory(path)
+        compact_directory(path, workers=args.workers, full=args.full)
     else:
         print(f"Error: path {path} not found.")
\ No newline at end of file
@@ -1,94 +1,193 @@
+import os
 import re
+from functools import lru_cache
 
-def extract_rr_lines(text):
-    lines = text.splitlines()
+from chat_index import ChatIndex
+from lexicon import NORMALIZE_NOUNS
+
+_CHI_START = re.compile(r'^\*CHI:\s*(.*)')
+_RR_INLINE = re.compile(r'\[\s*\+\s*rr\s*\]')
+_RR_ONLY = re.compile(r'^\s*\[\s*\+\s*rr\s*\]\s*$')
+RR_POSTCODE = "+rr"
 
-    chi_start = re.compile(r'^\*CHI:\s*(.*)')
-    rr_inline = re.compile(r'\[\s*\+\s*rr\s*\]')
-    rr_only   = re.compile(r'^\s*\[\s*\+\s*rr\s*\]\s*$')
 
-    extracted = []
+def iter_rr_lines(lines):
+    """Yield [+rr] CHI utterances one at a time from any iterable of lines, e.g. an open file."""
     in_chi_block = False
     chi_lines = []
 
     for line in lines:
-        chi_match = chi_start.match(line)
+        line = line.rstrip("\r\n")
+        chi_match = _CHI_START.match(line)
         if chi_match:
             in_chi_block = True
             chi_lines = [chi_match.group(1).strip()]
-            if rr_inline.search(line):
-                extracted.append(" ".join(chi_lines))
+            if _RR_INLINE.search(line):
+                yield " ".join(chi_lines)
                 in_chi_block = False
         elif in_chi_block and (line.startswith(' ') or line.startswith('\t')):
             chi_lines.append(line.strip())
-            if rr_inline.search(line):
-                extracted.append(" ".join(chi_lines))
+            if _RR_INLINE.search(line):
+                yield " ".join(chi_lines)
                 in_chi_block = False
-        elif rr_only.match(line):
+        elif _RR_ONLY.match(line):
             if in_chi_block:
-                extracted.append(" ".join(chi_lines))
+                yield " ".join(chi_lines)
                 in_chi_block = False
         else:
             in_chi_block = False
             chi_lines = []
 
-    return "\n".join(extracted)
+
+def extract_rr_lines(text):
+    return "\n".join(iter_rr_lines(text.splitlines()))
+
+
+def iter_indexed_utterances(path, speaker="CHI", code=RR_POSTCODE, index_dir=None):
+    """Yield the utterances of speaker carrying postcode code from the transcript at path,
+    through its chat_index.ChatIndex (saved in index_dir, if given). With the defaults these
+    are the lines iter_rr_lines() yields."""
+    with ChatIndex(path, index_dir=index_dir) as index:
+        yield from index.utterances(speaker, code)
+
+
+def iter_utterances(lines, extract_rr=False, index_dir=None):
+    """Stream the utterances to analyze from an iterable of transcript lines without reading it all.
+
+    With index_dir, [+rr] lines of an open transcript file come from its index saved there
+    (see chat_index.py) instead of a scan; building an index costs more than one scan, so
+    without a place to keep it the lines are scanned.
+    """
+    if extract_rr:
+        path = getattr(lines, "name", None)
+        if index_dir and isinstance(path, str) and os.path.isfile(path):
+            return iter_indexed_utterances(path, index_dir=index_dir)
+        return iter_rr_lines(lines)
+    return (line.rstrip("\r\n") for line in lines)
+
+
+# Cleaning engine: every pattern is compiled once at import. The substitutions still run
+# in their original order (merging them can change the output on nested codes such as
+# "&+&+ts"), but each one is skipped outright when the literal it needs is absent, which
+# is the common case for most CHAT codes.
+_ISP_AT_X = re.compile(r"\bisp@x\b", re.IGNORECASE)
+_ZERO_AUX = re.compile(r"\b0aux\b", re.IGNORECASE)
+_FRAGMENT_T = re.compile(r"&\+t", re.IGNORECASE)
+_FRAGMENT_S = re.compile(r"&\+s", re.IGNORECASE)
+_ZERO_P = re.compile(r"\b0p\b", re.IGNORECASE)
+_RR_CODE = re.compile(r"\[\+\s*rr\]", re.IGNORECASE)
+_SPECIAL_FORM = re.compile(r"(\w)[\$@]\w+")
+_ANGLE_GROUP = re.compile(r"<[^>]*>")
+_CORRECTION = re.compile(r"\b(\w+)\s*\[\s*:\s*([^\]]+)\]")
+_BRACKET_CODE = re.compile(r"\[[^\]]*\]")
+_PAREN_GROUP = re.compile(r"\([^)]*\)")
+_PUNCTUATION = re.compile(r"[^\w\s\.\?!']")
+_WHITESPACE = re.compile(r"\s+")
+_AFTER_PERIOD = re.compile(r'\..*$')
+_S_CONTRACTION = re.compile(r"\b([A-Za-z]+)'s\s+([a-zA-Z]+ing)\b")
+_IT_IS = re.compile(r"\bit is\b", re.IGNORECASE)
+_FILLERS = re.compile(r'\b(uh+|um+)\b[\s,.]*', re.IGNORECASE)
+_COORDINATOR_ARTICLE = re.compile(
+    r"^\s*(and\s+then?|but\s+then?|then|and|but)\s+(a|an|the)\s+", re.IGNORECASE
+)
+_COORDINATOR = re.compile(r"^\s*(and\s+then?|but\s+then?|then|and|but)\s+", re.IGNORECASE)
+_CHI_PREFIX = re.compile(r'^CHI\s*(.*)')
+
+# One alternation instead of a re.sub per entry. No replacement is itself a key, so a
+# single pass gives the same result as substituting the entries one after another.
+_NORMALIZE_NOUNS_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(k) for k in NORMALIZE_NOUNS) + r")\b", re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=4096)
+def _word_pattern(word):
+    return re.compile(rf"\b{re.escape(word)}\b")
+
+
+def _normalized_noun(match):
+    word = match.group(0)
+    replacement = NORMALIZE_NOUNS.get(word.lower())
+    if replacement is None:
+        # case-insensitive matches whose lower() differs from the key, e.g. a dotted "İ"
+        replacement = next(v for k, v in NORMALIZE_NOUNS.items()
+                           if re.fullmatch(k, word, re.IGNORECASE))
+    return replacement
+
+
+def normalize_nouns(text):
+    """Map child-register nouns (doggie, horsie, ...) to their standard forms."""
+    return _NORMALIZE_NOUNS_RE.sub(_normalized_noun, text)
 
 
 def clean_for_scoring(text):
-    text = re.sub(r"\bisp@x\b", "NADS", text, flags=re.IGNORECASE)
-    text = re.sub(r"\b0aux\b", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"&\+t", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"&\+s", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\b0p\b", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\[\+\s*rr\]", "", text, flags=re.IGNORECASE)
-    text = text.replace("'", "'")
-    text = re.sub(r"(\w)[\$@]\w+", r"\1", text)
-    text = re.sub(r"<[^>]*>", "", text)
+    if "@" in text:
+        text = _ISP_AT_X.sub("NADS", text)
+    if "0" in text:
+        text = _ZERO_AUX.sub("", text)
+    if "&" in text:
+        text = _FRAGMENT_T.sub("", text)
+        text = _FRAGMENT_S.sub("", text)
+    if "0" in text:
+        text = _ZERO_P.sub("", text)
+    if "[" in text:
+        text = _RR_CODE.sub("", text)
+    if "$" in text or "@" in text:
+        text = _SPECIAL_FORM.sub(r"\1", text)
+    if "<" in text:
+        text = _ANGLE_GROUP.sub("", text)
 
     replacements = dict()
-    def extract_and_replace(match):
-        word, replacement = match.group(1), match.group(2)
-        replacements[word] = replacement
-        return word
-    text = re.sub(r"\b(\w+)\s*\[\s*:\s*([^\]]+)\]", extract_and_replace, text)
-
-    text = re.sub(r"\[[^\]]*\]", "", text)
-    text = re.sub(r"\([^)]*\)", "", text)
-    text = re.sub(r"[^\w\s\.\?!']", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    if "[" in text:
+        def extract_and_replace(match):
+            word, replacement = match.group(1), match.group(2)
+            replacements[word] = replacement
+            return word
+        text = _CORRECTION.sub(extract_and_replace, text)
+        text = _BRACKET_CODE.sub("", text)
+    if "(" in text:
+        text = _PAREN_GROUP.sub("", text)
+    text = _PUNCTUATION.sub("", text)
+    text = _WHITESPACE.sub(" ", text).strip()
 
     for original, replacement in replacements.items():
-        text = re.sub(rf"\b{re.escape(original)}\b", replacement, text)
-    
-    text = re.sub(r'\..*$', '.', text)
-    text = text.rstrip('.')
-    
+        text = _word_pattern(original).sub(replacement, text)
+
+    if "." in text:
+        text = _AFTER_PERIOD.sub('.', text)
+        text = text.rstrip('.')
+
     # Advanced: Expand contractions
-    text = re.sub(r"\b([A-Za-z]+)'s\s+([a-zA-Z]+ing)\b", r"\1 is \2", text)
-    text = re.sub(r"\bit is\b", "its", text, flags=re.IGNORECASE)
+    if "'" in text:
+        text = _S_CONTRACTION.sub(r"\1 is \2", text)
+    text = _IT_IS.sub("its", text)
 
     # Remove all uh/um variants
-    text = re.sub(r'\b(uh+|um+)\b[\s,.]*', '', text, flags=re.IGNORECASE).strip()
+    text = _FILLERS.sub('', text).strip()
 
     # Strip leading coordinator but preserve any article that immediately
     # follows it. Without this, "and [/] the door is closing" would clean to
     # "door is closing" (losing "the") because [/] is stripped first and then
     # the coordinator regex eats "and the " as a unit.
     # Pass 1: coordinator + article → keep just the article
-    text = re.sub(
-        r"^\s*(and\s+then?|but\s+then?|then|and|but)\s+(a|an|the)\s+",
-        r"\2 ",
-        text, flags=re.IGNORECASE
-    )
+    text = _COORDINATOR_ARTICLE.sub(r"\2 ", text)
     # Pass 2: plain coordinator with no following article → strip normally
-    text = re.sub(
-        r"^\s*(and\s+then?|but\s+then?|then|and|but)\s+",
-        "", text, flags=re.IGNORECASE
-    ).strip()
-    
-    chi_match = re.compile(r'^CHI\s*(.*)').match(text)
-    if chi_match:
+    text = _COORDINATOR.sub("", text).strip()
+
+    if text.startswith("CHI"):
+        chi_match = _CHI_PREFIX.match(text)
         text = chi_match.group(1).strip()
-        
+
     return text
+
+
+def clean_many(utterances):
+    """Clean a batch of utterances; repeats within the batch are cleaned once."""
+    cleaned = {}
+    out = []
+    for utt in utterances:
+        result = cleaned.get(utt)
+        if result is None:
+            result = cleaned[utt] = clean_for_scoring(utt)
+        out.append(result)
+    return out
@@ -0,0 +1,209 @@
+# Inference modes: how much of the Stanza pipeline runs on the cleaned utterances.
+#
+#   full          the cleaned text goes through tokenize,pos,lemma,depparse (the reference)
+#   pretokenized  the cleaned text is split by a rule tokenizer and fed with
+#                 tokenize_pretokenized=True, so the neural tokenizer never runs
+#   pretagged     as pretokenized, but utterances whose every token can be tagged from the
+#                 closed-class lexicon below (or is a compendium -ing verb right after a form
+#                 of "be") skip the POS tagger: they run only lemma+depparse on the supplied
+#                 tags. Every other utterance falls back to pretokenized.
+#
+# clean_for_scoring() leaves single-spaced words, apostrophes and . ? ! only, which is
+# what makes the rule tokenizer safe. How far each mode's scores drift from "full" is
+# measured by `python benchmark.py modes`.
+
+import re
+
+from models import DEFAULT_PROCESSORS
+
+INFERENCE_MODES = ("full", "pretokenized", "pretagged")
+DEFAULT_INFERENCE_MODE = "full"
+
+PRETOKENIZED_OPTIONS = {"tokenize_pretokenized": True}
+PRETAGGED_PROCESSORS = "lemma,depparse"
+PRETAGGED_OPTIONS = {"lemma_pretagged": True, "depparse_pretagged": True}
+
+
+def mode_pipelines(inference_mode):
+    """(processors, options) of every Stanza pipeline an inference mode loads."""
+    if inference_mode == "full":
+        return [(DEFAULT_PROCESSORS, {})]
+    if inference_mode == "pretokenized":
+        return [(DEFAULT_PROCESSORS, PRETOKENIZED_OPTIONS)]
+    return [(DEFAULT_PROCESSORS, PRETOKENIZED_OPTIONS), (PRETAGGED_PROCESSORS, PRETAGGED_OPTIONS)]
+
+
+SENTENCE_END = {".", "?", "!"}
+CLITICS = {"s", "re", "m", "ll", "ve", "d"}
+_TRAILING_PUNCT = re.compile(r"^(.*?)([.?!]+)$")
+
+# Tokens with a single reading in child narratives, tagged the way the English UD models
+# tag them. Ambiguous words (her, it, you, that, 's, to, in, on, ...) are left out, so any
+# utterance containing them goes through the POS tagger.
+CLOSED_CLASS = {
+    "a": ("DET", "DT", "Definite=Ind|PronType=Art"),
+    "an": ("DET", "DT", "Definite=Ind|PronType=Art"),
+    "the": ("DET", "DT", "Definite=Def|PronType=Art"),
+    "his": ("PRON", "PRP$", "Case=Gen|Gender=Masc|Number=Sing|Person=3|Poss=Yes|PronType=Prs"),
+    "its": ("PRON", "PRP$", "Case=Gen|Gender=Neut|Number=Sing|Person=3|Poss=Yes|PronType=Prs"),
+    "my": ("PRON", "PRP$", "Case=Gen|Number=Sing|Person=1|Poss=Yes|PronType=Prs"),
+    "our": ("PRON", "PRP$", "Case=Gen|Number=Plur|Person=1|Poss=Yes|PronType=Prs"),
+    "their": ("PRON", "PRP$", "Case=Gen|Number=Plur|Person=3|Poss=Yes|PronType=Prs"),
+    "your": ("PRON", "PRP$", "Person=2|Poss=Yes|PronType=Prs"),
+    "he": ("PRON", "PRP", "Case=Nom|Gender=Masc|Number=Sing|Person=3|PronType=Prs"),
+    "she": ("PRON", "PRP", "Case=Nom|Gender=Fem|Number=Sing|Person=3|PronType=Prs"),
+    "they": ("PRON", "PRP", "Case=Nom|Number=Plur|Person=3|PronType=Prs"),
+    "we": ("PRON", "PRP", "Case=Nom|Number=Plur|Person=1|PronType=Prs"),
+    "i": ("PRON", "PRP", "Case=Nom|Number=Sing|Person=1|PronType=Prs"),
+    "him": ("PRON", "PRP", "Case=Acc|Gender=Masc|Number=Sing|Person=3|PronType=Prs"),
+    "them": ("PRON", "PRP", "Case=Acc|Number=Plur|Person=3|PronType=Prs"),
+    "and": ("CCONJ", "CC", None),
+    "but": ("CCONJ", "CC", None),
+    "or": ("CCONJ", "CC", None),
+    "then": ("ADV", "RB", "PronType=Dem"),
+    "not": ("PART", "RB", "Polarity=Neg"),
+    "with": ("ADP", "IN", None),
+    "into": ("ADP", "IN", None),
+    "onto": ("ADP", "IN", None),
+    "from": ("ADP", "IN", None),
+    "of": ("ADP", "IN", None),
+    "at": ("ADP", "IN", None),
+    "behind": ("ADP", "IN", None),
+    "through": ("ADP", "IN", None),
+    "between": ("ADP", "IN", None),
+    ".": ("PUNCT", ".", None),
+    "?": ("PUNCT", ".", None),
+    "!": ("PUNCT", ".", None),
+}
+
+BE_FORMS = {
+    "is": ("AUX", "VBZ", "Mood=Ind|Number=Sing|Person=3|Tense=Pres|VerbForm=Fin"),
+    "are": ("AUX", "VBP", "Mood=Ind|Tense=Pres|VerbForm=Fin"),
+    "'re": ("AUX", "VBP", "Mood=Ind|Tense=Pres|VerbForm=Fin"),
+    "am": ("AUX", "VBP", "Mood=Ind|Number=Sing|Person=1|Tense=Pres|VerbForm=Fin"),
+    "'m": ("AUX", "VBP", "Mood=Ind|Number=Sing|Person=1|Tense=Pres|VerbForm=Fin"),
+    "was": ("AUX", "VBD", "Mood=Ind|Number=Sing|Person=3|Tense=Past|VerbForm=Fin"),
+    "were": ("AUX", "VBD", "Mood=Ind|Tense=Past|VerbForm=Fin"),
+}
+PROGRESSIVE_TAGS = ("VERB", "VBG", "Tense=Pres|VerbForm=Part")
+NOMINATIVE_PRONOUNS = {"he", "she", "they", "we", "i"}
+
+
+def _split_word(word):
+    # English UD tokenization of one whitespace-separated word: clitics and final
+    # punctuation become tokens of their own ("can't" -> "ca" "n't", "he's" -> "he" "'s")
+    tokens = []
+    m = _TRAILING_PUNCT.match(word)
+    punct = ""
+    if m and m.group(1):
+        word, punct = m.group(1), m.group(2)
+    elif m:
+        return list(word)
+    lower = word.lower()
+    if lower.endswith("n't") and len(word) > 3:
+        tokens += [word[:-3], word[-3:]]
+    elif "'" in word[1:]:
+        base, _, clitic = word.rpartition("'")
+        if base and clitic.lower() in CLITICS:
+            tokens += [base, "'" + clitic]
+        else:
+            tokens.append(word)
+    else:
+        tokens.append(word)
+    return tokens + list(punct)
+
+
+def pretokenize(text):
+    """Split a cleaned utterance into sentences of tokens, ending a sentence at . ? !"""
+    sentences, current = [], []
+    for word in text.split():
+        for token in _split_word(word):
+            current.append(token)
+            if token in SENTENCE_END:
+                sentences.append(current)
+                current = []
+    if current:
+        sentences.append(current)
+    return sentences
+
+
+def pretokenized_text(text):
+    """The form Stanza reads with tokenize_pretokenized=True: one sentence per line."""
+    return "\n".join(" ".join(tokens) for tokens in pretokenize(text))
+
+
+def pretag(sentences, verb_compendium):
+    """Tag every token from the lexicon, or return None if any token needs the POS tagger.
+
+    Returns sentences of CoNLL-U style word dicts (id, text, upos, xpos, feats).
+    """
+    tagged = []
+    for tokens in sentences:
+        words = []
+        for i, token in enumerate(tokens):
+            lower = token.lower()
+            previous = tokens[i - 1].lower() if i else ""
+            following = tokens[i + 1].lower() if i + 1 < len(tokens) else ""
+            tags = CLOSED_CLASS.get(lower) or BE_FORMS.get(lower)
+            if tags is None and lower == "'s" and previous in NOMINATIVE_PRONOUNS \
+                    and following in verb_compendium:
+                tags = BE_FORMS["is"]  # "he's running": only the auxiliary reading fits
+            if tags is None and lower in verb_compendium and \
+                    (previous in BE_FORMS or (previous == "'s" and words and words[-1]["upos"] == "AUX")):
+                tags = PROGRESSIVE_TAGS
+            if tags is None:
+                return None
+            upos, xpos, feats = tags
+            word = {"id": i + 1, "text": token, "upos": upos, "xpos": xpos}
+            if feats:
+                word["feats"] = feats
+            words.append(word)
+        tagged.append(words)
+    return tagged
+
+
+class PretokenizedPipeline:
+    """Feeds rule-tokenized text to a pipeline built with tokenize_pretokenized=True."""
+
+    def __init__(self, nlp):
+        self.nlp = nlp
+
+    def bulk_process(self, texts):
+        return self.nlp.bulk_process([pretokenized_text(text) for text in texts])
+
+
+def stanza_document(sentences, text):
+    import stanza
+    return stanza.Document(sentences, text=text)
+
+
+class PretaggedPipeline:
+    """Runs lemma+depparse only on fully pretagged utterances, pretokenized for the rest."""
+
+    def __init__(self, pretokenized_nlp, pretagged_nlp, verb_compendium):
+        self.pretokenized = PretokenizedPipeline(pretokenized_nlp)
+        self.pretagged_nlp = pretagged_nlp
+        self.verb_compendium = verb_compendium
+        # a pipeline may say how it wants pretagged input (the stub parser does)
+        self.make_document = getattr(pretagged_nlp, "make_pretagged_document", stanza_document)
+        self.pretagged_count = 0
+        self.fallback_count = 0
+
+    def bulk_process(self, texts):
+        docs = [None] * len(texts)
+        tagged, fallback = [], []
+        for i, text in enumerate(texts):
+            sentences = pretag(pretokenize(text), self.verb_compendium)
+            if sentences is None:
+                fallback.append(i)
+            else:
+                tagged.append((i, self.make_document(sentences, text)))
+        if tagged:
+            for (i, _), doc in zip(tagged, self.pretagged_nlp.bulk_process([d for _, d in tagged])):
+                docs[i] = doc
+        if fallback:
+            for i, doc in zip(fallback, self.pretokenized.bulk_process([texts[i] for i in fallback])):
+                docs[i] = doc
+        self.pretagged_count += len(tagged)
+        self.fallback_count += len(fallback)
+        return docs
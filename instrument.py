@@ -0,0 +1,130 @@
+# Optional instrumentation for the scoring pipeline: wall time per stage (extract, clean,
+# parse, rules, write) and, for the rules, how many utterances took each branch and how
+# long they took (counter + latency histogram per branch).
+#
+# Every hook in the analyzer is guarded by `metrics is not None`, so with instrumentation
+# off (the default) the only cost is that check.
+
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+STAGES = ("extract", "clean", "parse", "rules", "write")
+
+# Branches the rules can take for one utterance. The first group ends the evaluation of
+# the utterance; the second group are detours it may take on the way to "scored".
+EXIT_BRANCHES = ("nads", "question", "unintelligible", "copular_exclusion", "no_verb_fallback",
+                 "scored")
+DETOUR_BRANCHES = ("recovered_progressive", "forced_verb_heuristic", "det_noun_vbg_heuristic")
+
+# Upper bounds of the latency histogram buckets, in microseconds (plus an overflow bucket)
+HISTOGRAM_BOUNDS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 100000)
+
+
+def null_stage(name):
+    return nullcontext()
+
+
+def _bucket_labels():
+    return [f"<={b}us" for b in HISTOGRAM_BOUNDS_US] + [f">{HISTOGRAM_BOUNDS_US[-1]}us"]
+
+
+class Instrumentation:
+    """Collects stage timings and rule-branch statistics for one transcript (or run)."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.wall_seconds = 0.0
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.branch_counts = {}
+        self.branch_seconds = {}
+        self.branch_histograms = {}
+        self.utterances = 0
+
+    def add_stage(self, stage, seconds):
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(stage, time.perf_counter() - start)
+
+    def record_rules(self, branches, started):
+        """Record one utterance's rule evaluation, begun at perf_counter() value started."""
+        seconds = time.perf_counter() - started
+        self.utterances += 1
+        self.stage_seconds["rules"] += seconds
+        micros = seconds * 1e6
+        bucket = next((i for i, b in enumerate(HISTOGRAM_BOUNDS_US) if micros <= b),
+                      len(HISTOGRAM_BOUNDS_US))
+        for branch in dict.fromkeys(branches):  # a branch taken in two sentences counts once
+            self.branch_counts[branch] = self.branch_counts.get(branch, 0) + 1
+            self.branch_seconds[branch] = self.branch_seconds.get(branch, 0.0) + seconds
+            histogram = self.branch_histograms.get(branch)
+            if histogram is None:
+                histogram = self.branch_histograms[branch] = [0] * (len(HISTOGRAM_BOUNDS_US) + 1)
+            histogram[bucket] += 1
+
+    def to_dict(self):
+        labels = _bucket_labels()
+        return {
+            "name": self.name,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "utterances": self.utterances,
+            "stages": {stage: round(seconds, 6) for stage, seconds in self.stage_seconds.items()},
+            "branches": {
+                branch: {
+                    "count": count,
+                    "seconds": round(self.branch_seconds[branch], 6),
+                    "histogram": dict(zip(labels, self.branch_histograms[branch])),
+                }
+                for branch, count in self.branch_counts.items()
+            },
+        }
+
+
+def merge_metrics(metrics_list):
+    """Sum Instrumentation.to_dict() snapshots, e.g. of every transcript in a run."""
+    merged = {"transcripts": 0, "wall_seconds": 0.0, "utterances": 0,
+              "stages": dict.fromkeys(STAGES, 0.0), "branches": {}}
+    for metrics in metrics_list:
+        merged["transcripts"] += metrics.get("transcripts", 1)
+        merged["wall_seconds"] = round(merged["wall_seconds"] + metrics["wall_seconds"], 6)
+        merged["utterances"] += metrics["utterances"]
+        for stage, seconds in metrics["stages"].items():
+            merged["stages"][stage] = round(merged["stages"].get(stage, 0.0) + seconds, 6)
+        for branch, stats in metrics["branches"].items():
+            into = merged["branches"].setdefault(
+                branch, {"count": 0, "seconds": 0.0, "histogram": dict.fromkeys(stats["histogram"], 0)})
+            into["count"] += stats["count"]
+            into["seconds"] = round(into["seconds"] + stats["seconds"], 6)
+            for label, n in stats["histogram"].items():
+                into["histogram"][label] = into["histogram"].get(label, 0) + n
+    return merged
+
+
+def format_metrics(metrics):
+    lines = ["Stage times: " + ", ".join(
+        f"{stage} {seconds:.2f}s" for stage, seconds in metrics["stages"].items())]
+    utterances = max(metrics["utterances"], 1)
+    for branch in EXIT_BRANCHES + DETOUR_BRANCHES:
+        stats = metrics["branches"].get(branch)
+        if not stats:
+            continue
+        mean_us = stats["seconds"] * 1e6 / stats["count"]
+        lines.append(f"  {branch:<24} {stats['count']:>7} utterances "
+                     f"({stats['count'] / utterances:6.1%}), mean {mean_us:8.1f} us")
+    return "\n".join(lines)
+
+
+def metrics_path_for(csv_path):
+    base = csv_path[:-4] if csv_path.endswith(".csv") else csv_path
+    return base + ".metrics.json"
+
+
+def write_metrics(metrics, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=1)
@@ -1,52 +1,175 @@
-from extract_clean import extract_rr_lines, clean_for_scoring
-from score import write_analysis_to_csv, write_ads_csv
-from analyze import analyze_utterances, is_ads_result
+from extract_clean import extract_rr_lines, clean_many, iter_utterances
+import time
 
+from score import AdsSink, ResultSink, spool_dir_for, write_analysis_to_csv, write_ads_csv
+from analyze import (ADS_MEASURES, analyze_utterances, is_ads_result, iter_analysis, iter_parsed,
+                     iter_scores, new_scoring_state)
+from checkpoint import DEFAULT_CHECKPOINT_EVERY, load_checkpoint, save_checkpoint
+from artifacts import write_parse_artifact, iter_parse_artifact
+from instrument import null_stage
+from lexicon import DEFAULT_VERB_LIST
+from models import configure_models
 
 
-def run_full_pipeline(text, output_csv_path=None, extract_rr=False):
-    if extract_rr:
-        rr_text = extract_rr_lines(text)
-    else:
-        rr_text = text
+def configure_inference(model_dir=None, offline=False, quantize=False, batch_sizes=None,
+                        intra_op_threads=None, inter_op_threads=None):
+    """Model location and CPU settings (torch threads, per-processor Stanza batch sizes,
+    int8 quantization) for the pipelines loaded from now on; see models.configure_models()."""
+    configure_models(model_dir=model_dir, offline=offline, quantize=quantize,
+                     batch_sizes=batch_sizes, intra_op_threads=intra_op_threads,
+                     inter_op_threads=inter_op_threads)
 
-    utterances = rr_text.strip().split("\n")
-    results = analyze_utterances(utterances)
 
-    if output_csv_path:
-        write_analysis_to_csv(results, output_csv_path)
+def result_dicts(results):
+    """The results as plain dicts, e.g. for json.dumps(): the scored records are Mappings,
+    not dicts (see results.py)."""
+    return [dict(r) for r in results]
 
-    return results
 
-def run_ads_only_pipeline(text, output_csv_path=None, extract_rr=False):
+def source_utterances(text, extract_rr=False, index_dir=None):
+    # text is either the whole transcript as a string, or an open file (any iterable of
+    # lines), which is streamed line by line instead of being read into memory; index_dir
+    # keeps the [+rr] index of an open file (see extract_clean.iter_utterances())
+    if not isinstance(text, str):
+        return iter_utterances(text, extract_rr, index_dir)
+
     if extract_rr:
         rr_text = extract_rr_lines(text)
     else:
         rr_text = text
 
-    utterances = rr_text.strip().split("\n")
+    return rr_text.strip().split("\n")
 
-    # IMPORTANT: we want 0/1 per utterance, not filtered only
-    results = analyze_utterances(utterances)
 
-    for r in results:
-        r["is_ads"] = is_ads_result(r)
+def _write_stage(analyze_kwargs):
+    metrics = analyze_kwargs.get("metrics")
+    return metrics.stage("write") if metrics is not None else null_stage("write")
 
-    if output_csv_path:
-        write_ads_csv(results, output_csv_path)
 
-    return results
+def run_full_pipeline(text, output_csv_path=None, extract_rr=False, keep_results=True,
+                      checkpoint=None, checkpoint_every=DEFAULT_CHECKPOINT_EVERY, resume=False,
+                      sqlite_path=None, index_dir=None, **analyze_kwargs):
+    """Score a transcript, streaming each result into output_csv_path as it is produced
+    (and into the SQLite results store at sqlite_path, if given; see score.SqliteSink).
+
+    Returns the results; with keep_results=False (only useful with output_csv_path) they
+    are not held in memory and the number of scored utterances is returned instead.
+
+    checkpoint, a checkpoint.source_signature() of the transcript, turns on a checkpoint
+    every checkpoint_every results; with resume, a matching checkpoint left by an earlier
+    run is continued from (only the results after it are returned). Runs that save a
+    parse artifact always start over, as the artifact must cover every utterance.
+
+    With extract_rr and an open transcript file, index_dir keeps its [+rr] index for later
+    runs (see chat_index.py).
+    """
+    if sqlite_path and not output_csv_path:
+        raise ValueError("sqlite_path is written alongside a results CSV; pass output_csv_path too")
+    utterances = source_utterances(text, extract_rr, index_dir)
+    if not output_csv_path:
+        return analyze_utterances(utterances, **analyze_kwargs)
+    if analyze_kwargs.get("measures") is not None or not analyze_kwargs.get("notes", True):
+        raise ValueError("A results CSV needs every measure and its notes; "
+                         "leave measures and notes at their defaults")
+
+    saved = None
+    if checkpoint is not None and resume and analyze_kwargs.get("parse_artifact_path") is None:
+        saved = load_checkpoint(spool_dir_for(output_csv_path), checkpoint)
+    position, state = saved if saved else (None, new_scoring_state())
+    if saved:
+        print(f"Resuming {output_csv_path} after {position['rows']} utterances")
+
+    metrics = analyze_kwargs.get("metrics")
+    results = []
+    with ResultSink(output_csv_path, resume=position, sqlite_path=sqlite_path) as sink:
+        for r in iter_analysis(utterances, skip=sink.rows, state=state, **analyze_kwargs):
+            if metrics is not None:
+                started = time.perf_counter()
+            sink.add(r)
+            if checkpoint is not None and sink.rows % checkpoint_every == 0:
+                save_checkpoint(sink, state, checkpoint)
+            if metrics is not None:
+                metrics.add_stage("write", time.perf_counter() - started)
+            if keep_results:
+                results.append(r)
+        with _write_stage(analyze_kwargs):
+            sink.close()
+
+    return results if keep_results else sink.rows
+
+def run_ads_only_pipeline(text, output_csv_path=None, extract_rr=False, sqlite_path=None,
+                          index_dir=None, keep_results=True, **analyze_kwargs):
+    """Score a transcript for ADS (is_ads per utterance), streaming each result into the
+    ADS CSV at output_csv_path (and the SQLite results store at sqlite_path) as it is
+    produced. With keep_results=False (only useful with output_csv_path) the results are
+    not held in memory and the number of scored utterances is returned instead."""
+    if sqlite_path and not output_csv_path:
+        raise ValueError("sqlite_path is written alongside a results CSV; pass output_csv_path too")
+    utterances = source_utterances(text, extract_rr, index_dir)
+
+    # only the measures is_ads_result() reads are scored, without notes, unless asked
+    analyze_kwargs.setdefault("measures", ADS_MEASURES)
+    analyze_kwargs.setdefault("notes", False)
+
+    # IMPORTANT: we want 0/1 per utterance, not filtered only
+    if not output_csv_path:
+        results = analyze_utterances(utterances, **analyze_kwargs)
+        for r in results:
+            r["is_ads"] = is_ads_result(r)
+        return results
+
+    metrics = analyze_kwargs.get("metrics")
+    results = []
+    with AdsSink(output_csv_path, sqlite_path=sqlite_path) as sink:
+        for r in iter_analysis(utterances, **analyze_kwargs):
+            r["is_ads"] = is_ads_result(r)
+            if metrics is not None:
+                started = time.perf_counter()
+            sink.add(r)
+            if metrics is not None:
+                metrics.add_stage("write", time.perf_counter() - started)
+            if keep_results:
+                results.append(r)
+        with _write_stage(analyze_kwargs):
+            sink.close()
+
+    return results if keep_results else sink.rows
 
 def get_extracted_clean(text):
     rr_text = extract_rr_lines(text)
-    return [
-        clean_for_scoring(u)
+    return clean_many(
+        u
         for u in rr_text.strip().split("\n")
         if u.strip()
-    ]
+    )
 
-def analyze_only(utterances):
-    return analyze_utterances(utterances)
+def analyze_only(utterances, **analyze_kwargs):
+    return analyze_utterances(utterances, **analyze_kwargs)
 
 def score_only(results, output_csv_path):
-    write_analysis_to_csv(results, output_csv_path)
\ No newline at end of file
+    write_analysis_to_csv(results, output_csv_path)
+
+
+def parse_only(text, artifact_path, extract_rr=False, index_dir=None, **parse_kwargs):
+    """Parse phase only: save a parse artifact for the transcript, without scoring it."""
+    utterances = source_utterances(text, extract_rr, index_dir)
+    parsed = iter_parsed(utterances, parse_all=True, **parse_kwargs)
+    return write_parse_artifact(parsed, artifact_path,
+                                require_rr_code=parse_kwargs.get("require_rr_code", False))
+
+
+def rescore_parse_artifact(artifact_path, output_csv_path=None, ads_only=False,
+                           verb_master_list_path=DEFAULT_VERB_LIST, sqlite_path=None):
+    """Scoring phase only: re-run the rules on a saved parse artifact. Never loads Stanza."""
+    results = list(iter_scores(iter_parse_artifact(artifact_path),
+                               verb_master_list_path=verb_master_list_path))
+
+    if ads_only:
+        for r in results:
+            r["is_ads"] = is_ads_result(r)
+        if output_csv_path:
+            write_ads_csv(results, output_csv_path, sqlite_path=sqlite_path)
+    elif output_csv_path:
+        write_analysis_to_csv(results, output_csv_path, sqlite_path=sqlite_path)
+
+    return results
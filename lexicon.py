@@ -0,0 +1,101 @@
+# Word lists used by the cleaning and scoring rules, compiled once per process.
+#
+# The small lists are frozen sets (and a read-only mapping) built at import time. The verb
+# compendium (verb_master_list_present.txt, ~7,000 -ing forms) is compiled lazily into a
+# VerbLexicon: the frozen set of forms plus an index of every -ing form the retagger accepts
+# (a listed form, or a listed form + "ing") mapped to its naively stripped base, so the
+# retagger probes the form once instead of three times.
+#
+# Compiling the list takes milliseconds, so nothing is written to disk: lexicons are cached
+# per process by path, size and mtime, and workers forked after the parent has loaded one
+# share it read-only (main.py loads it before starting its pool).
+
+import os
+from types import MappingProxyType
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_VERB_LIST = "verb_master_list_present.txt"
+
+VERB_OVERRIDES = frozenset({
+    "rolling","spilling","closing","stopping","moving","breaking",
+    "cooking","turning","drinking","washing","riding","driving",
+    "drawing","throwing","holding","climbing","building","feeding",
+    "pulling","chasing","falling","coming","going","getting"
+})
+
+ARTICLES = frozenset({"a", "an", "the"})
+CONTRACTION_FORMS = frozenset({"'s", "\u2019s"})
+EXCLUDE_SUBJECTS = frozenset({"that", "it", "he", "she", "they", "this", "those"})
+QUESTION_STARTERS = frozenset({"when", "what", "where", "who", "whom", "whose", "why", "which", "how"})
+POSSESSIVES = frozenset({"her", "his", "my", "their", "our", "your", "its"})
+PREPOSITIONS = frozenset({
+    "in", "on", "at", "to", "of", "for", "with", "by", "from", "about",
+    "into", "onto", "over", "under", "through", "between", "behind",
+    "beside", "near", "around", "along", "across", "after", "before"
+})
+
+NORMALIZE_NOUNS = MappingProxyType({
+    "horsie": "horse", "doggie": "dog", "kitty": "cat",
+    "bunny": "rabbit", "birdie": "bird", "piggie": "pig",
+    "truckie": "truck", "mommy": "mom", "daddy": "dad",
+    "grandma": "grandmother", "grandpa": "grandfather",
+})
+
+
+class VerbLexicon:
+    """The verb compendium: `word in lexicon` tests the listed forms."""
+    __slots__ = ("forms", "ing_index")
+
+    def __init__(self, forms):
+        self.forms = frozenset(forms)
+        index = {form: form[:-3] for form in self.forms if form.endswith("ing")}
+        index.update((form + "ing", form) for form in self.forms)
+        self.ing_index = MappingProxyType(index)
+
+    def __contains__(self, word):
+        return word in self.forms
+
+    def __len__(self):
+        return len(self.forms)
+
+    def __iter__(self):
+        return iter(self.forms)
+
+    def is_verb_ing(self, ing_form, lemma=None):
+        """The retagger's test for a lowercased -ing token: its lemma, the form itself or the
+        form minus "ing" is listed."""
+        return ing_form in self.ing_index or (lemma is not None and lemma in self.forms)
+
+
+EMPTY_LEXICON = VerbLexicon(())
+
+_LEXICONS = {}  # (path, size, mtime_ns) -> VerbLexicon
+
+
+def resolve_list_path(path):
+    """Relative paths are tried against the working directory, then this module's directory."""
+    if os.path.isabs(path) or os.path.exists(path):
+        return os.path.abspath(path)
+    return os.path.join(MODULE_DIR, path)
+
+
+def compile_verb_list(data):
+    return VerbLexicon({line.strip().lower() for line in data.decode("utf-8").splitlines()
+                        if line.strip()})
+
+
+def load_verb_lexicon(path=DEFAULT_VERB_LIST):
+    """Return the compiled VerbLexicon for a verb list file, compiling it at most once."""
+    path = resolve_list_path(path)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        print(f"Warning: Verb master list file not found at {path}. Continuing without verb overrides. NOT RECOMMENDED")
+        return EMPTY_LEXICON
+    key = (path, st.st_size, st.st_mtime_ns)
+    lexicon = _LEXICONS.get(key)
+    if lexicon is None:
+        with open(path, "rb") as f:
+            lexicon = compile_verb_list(f.read())
+        _LEXICONS[key] = lexicon
+    return lexicon
@@ -0,0 +1,126 @@
+# Load generator for server.py: fires synthetic ENNI-style requests from concurrent
+# clients and reports client-side latency and throughput next to the server's own
+# batching metrics.
+#
+#   python loadgen.py --concurrency 16 --requests 400 --utterances 20
+#   python loadgen.py --ads --transcript input/sample.cha
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmark import synthetic_utterance
+from server import DEFAULT_HOST, DEFAULT_PORT, percentile
+
+
+def post_json(url, payload, timeout):
+    data = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def get_json(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def run_load(base_url, payloads, concurrency, ads_only=False, timeout=300.0):
+    """Send every payload using concurrency client threads; returns the per-request outcomes."""
+    url = base_url + ("/score/ads" if ads_only else "/score")
+    outcomes = [None] * len(payloads)
+    next_index = iter(range(len(payloads)))
+    index_lock = threading.Lock()
+
+    def client():
+        while True:
+            with index_lock:
+                i = next(next_index, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            outcome = {"status": 200, "count": 0}
+            try:
+                outcome["count"] = post_json(url, payloads[i], timeout)["count"]
+            except urllib.error.HTTPError as e:
+                outcome["status"] = e.code
+            except (urllib.error.URLError, OSError) as e:
+                outcome["status"] = f"{type(e).__name__}"
+            outcome["seconds"] = time.perf_counter() - start
+            outcomes[i] = outcome
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return outcomes
+
+
+def print_report(outcomes, wall_seconds, server_metrics=None):
+    ok = [o for o in outcomes if o["status"] == 200]
+    latencies = sorted(o["seconds"] for o in ok)
+    utterances = sum(o["count"] for o in ok)
+    wall_seconds = max(wall_seconds, 1e-9)
+
+    print(f"Requests: {len(ok)}/{len(outcomes)} ok in {wall_seconds:.2f}s "
+          f"({len(ok) / wall_seconds:.1f} req/s, {utterances / wall_seconds:.1f} utterances/s)")
+    print(f"  Latency ms: p50 {percentile(latencies, 50) * 1000:.1f}, "
+          f"p90 {percentile(latencies, 90) * 1000:.1f}, "
+          f"p99 {percentile(latencies, 99) * 1000:.1f}, "
+          f"max {(latencies[-1] if latencies else 0.0) * 1000:.1f}")
+
+    statuses = {}
+    for o in outcomes:
+        if o["status"] != 200:
+            statuses[o["status"]] = statuses.get(o["status"], 0) + 1
+    for status, count in sorted(statuses.items(), key=str):
+        print(f"  {count} requests failed with {status}")
+
+    if server_metrics:
+        batching = server_metrics["batching"]
+        print(f"  Server: {batching['batches']} parse batches, "
+              f"{batching['texts_per_batch']} texts and {batching['requests_per_batch']} "
+              f"requests per batch, {server_metrics['rejected']} rejected")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the scoring service")
+    parser.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="Total requests to send")
+    parser.add_argument("-u", "--utterances", type=int, default=20,
+                        help="Synthetic utterances per request")
+    parser.add_argument("--transcript", default=None,
+                        help="Send this transcript file as every request instead")
+    parser.add_argument("--ads", action="store_true", help="Use the ADS-only endpoint")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.transcript:
+        with open(args.transcript, "r", encoding="utf-8") as f:
+            payloads = [{"text": f.read()}] * args.requests
+    else:
+        rng = random.Random(args.seed)
+        payloads = [
+            {"utterances": [synthetic_utterance(rng) for _ in range(args.utterances)]}
+            for _ in range(args.requests)
+        ]
+
+    start = time.perf_counter()
+    outcomes = run_load(args.url, payloads, args.concurrency, ads_only=args.ads)
+    wall = time.perf_counter() - start
+
+    try:
+        server_metrics = get_json(args.url + "/metrics", timeout=10)
+    except (urllib.error.URLError, OSError):
+        server_metrics = None
+    print_report(outcomes, wall, server_metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,410 @@
 import argparse
+import cProfile
+import io
 import os
+import pstats
 import glob
 import shutil
-from interface import run_full_pipeline, run_ads_only_pipeline
+import time
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from interface import run_full_pipeline, run_ads_only_pipeline, rescore_parse_artifact
+from score import recover_partial_csv
+from checkpoint import DEFAULT_CHECKPOINT_EVERY, RunJournal, source_signature
+from artifacts import ARTIFACT_SUFFIX, artifact_path_for
+from models import (configure_models, format_load_stats, model_identity, model_settings,
+                    pipeline_stats, preload, set_torch_threads)
+from analyze import DEFAULT_CHUNK_SIZE, DEFAULT_PARSE_BATCH_SIZE
+from parse_pool import DEFAULT_PARSE_EXECUTOR, PARSE_EXECUTORS
+from parse_cache import ParseCache, DEFAULT_MAX_DISK_MB, format_cache_stats, merge_cache_stats
+from inference import DEFAULT_INFERENCE_MODE, INFERENCE_MODES, mode_pipelines
+from instrument import Instrumentation, format_metrics, merge_metrics, metrics_path_for, write_metrics
+from lexicon import load_verb_lexicon
+
+# Parse cache of the current process. Pool workers each open their own (sharing the
+# on-disk tier); in sequential mode this is the main process's cache.
+_WORKER_CACHE = None
+
+DEFAULT_POLL_INTERVAL = 2.0
+TRANSCRIPT_PATTERNS = ("*.cha", "*.txt")
+PROFILE_TOP_FUNCTIONS = 40
+
+
+def output_csv_path(file_path, output_dir):
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(output_dir, base_name + "_results.csv")
+
+
+def process_file(file_path, output_dir, ads_only=False, extract_rr=False, parse_dir=None,
+                 profile=False, checkpoint_every=DEFAULT_CHECKPOINT_EVERY, resume=False,
+                 sqlite_path=None, index_dir=None, **analyze_kwargs):
+    """Score one transcript into output_dir; returns the CSV path and the number of scored utterances.
+
+    With metrics=Instrumentation(), its stage timings and rule-branch counters are also
+    written next to the CSV as <name>_results.metrics.json; with profile, cProfile output
+    for the whole run goes to <name>_results.prof (plus a readable .prof.log summary).
+
+    Full (not ADS-only) runs checkpoint every checkpoint_every utterances; with resume, a
+    transcript interrupted in an earlier run continues from its last checkpoint.
+
+    With sqlite_path, the results also go into that SQLite results store. With index_dir,
+    the -rr index of the transcript is kept there for later runs.
+    """
+    output_csv = output_csv_path(file_path, output_dir)
+    if parse_dir:
+        analyze_kwargs["parse_artifact_path"] = artifact_path_for(file_path, parse_dir)
+    metrics = analyze_kwargs.get("metrics")
+    profiler = cProfile.Profile() if profile else None
+
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    # the open file is streamed through extraction, analysis and the CSV sink, never read whole
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            if ads_only:
+                scored = run_ads_only_pipeline(
+                    f,
+                    output_csv_path=output_csv,
+                    extract_rr=extract_rr,
+                    keep_results=False,
+                    sqlite_path=sqlite_path,
+                    index_dir=index_dir,
+                    **analyze_kwargs
+                )
+            else:
+                signature = None
+                if checkpoint_every:
+                    signature = source_signature(
+                        file_path, extract_rr=extract_rr,
+                        inference_mode=analyze_kwargs.get("inference_mode", DEFAULT_INFERENCE_MODE),
+                        quantize=model_settings()["quantize"])
+                scored = run_full_pipeline(
+                    f,
+                    output_csv_path=output_csv,
+                    extract_rr=extract_rr,
+                    keep_results=False,
+                    checkpoint=signature,
+                    checkpoint_every=checkpoint_every,
+                    resume=resume,
+                    sqlite_path=sqlite_path,
+                    index_dir=index_dir,
+                    **analyze_kwargs
+                )
+    except Exception:
+        recovered = recover_partial_csv(output_csv)
+        if recovered:
+            print(f"Partial results ({recovered[1]} utterances) saved to {recovered[0]}")
+        raise
+    if profiler is not None:
+        profiler.disable()
+        write_profile(profiler, os.path.splitext(output_csv)[0] + ".prof")
+
+    if metrics is not None:
+        metrics.wall_seconds = time.perf_counter() - start
+        write_metrics(metrics.to_dict(), metrics_path_for(output_csv))
+    return output_csv, scored
+
+
+def write_profile(profiler, path):
+    """Dump raw cProfile stats (for pstats/snakeviz) plus the top functions as text."""
+    profiler.dump_stats(path)
+    summary = io.StringIO()
+    stats = pstats.Stats(profiler, stream=summary)
+    stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    stats.sort_stats("tottime").print_stats(PROFILE_TOP_FUNCTIONS)
+    with open(path + ".log", "w", encoding="utf-8") as f:
+        f.write(summary.getvalue())
+
+
+def _load_models(inference_mode=DEFAULT_INFERENCE_MODE):
+    # reports each load only the first time, so watch mode can call this per batch
+    load_verb_lexicon()  # compiled once here, then shared read-only by forked workers
+    for processors, options in mode_pipelines(inference_mode):
+        loaded_before = len(pipeline_stats())
+        stats = preload(processors=processors, **options)
+        if len(pipeline_stats()) > loaded_before:
+            print(format_load_stats(stats))
+
+
+def _init_worker(cache_dir, cache_max_mb, torch_threads, inference_mode=DEFAULT_INFERENCE_MODE,
+                 models=None):
+    global _WORKER_CACHE
+    if models is not None:
+        configure_models(**models)
+        torch_threads = models["intra_op_threads"] or torch_threads
+        set_torch_threads(torch_threads, models["inter_op_threads"])
+    elif torch_threads:
+        set_torch_threads(torch_threads)
+    # no-op when the parent loaded the models before forking this worker
+    for processors, options in mode_pipelines(inference_mode):
+        preload(processors=processors, **options)
+    # keep an existing cache (and its memory tier) across the batches of a watch session
+    if cache_dir and (_WORKER_CACHE is None or _WORKER_CACHE.cache_dir != cache_dir):
+        _WORKER_CACHE = ParseCache(cache_dir, max_disk_mb=cache_max_mb,
+                                   inference_mode=inference_mode,
+                                   quantized=model_settings()["quantize"],
+                                   model_id=model_identity())
+
+
+def _run_task(file_path, output_dir, options):
+    outcome = {"file": file_path, "pid": os.getpid(), "utterances": 0, "error": None}
+    options = dict(options)
+    metrics = Instrumentation(file_path) if options.pop("instrument", False) else None
+    start = time.perf_counter()
+    try:
+        _, outcome["utterances"] = process_file(file_path, output_dir, cache=_WORKER_CACHE,
+                                                metrics=metrics, **options)
+    except Exception:
+        # one bad transcript must not take the rest of the batch down with it
+        outcome["error"] = traceback.format_exc()
+    outcome["seconds"] = time.perf_counter() - start
+    if metrics is not None and not outcome["error"]:
+        outcome["metrics"] = metrics.to_dict()
+    if _WORKER_CACHE is not None:
+        outcome["cache"] = _WORKER_CACHE.stats()
+    return outcome
+
+
+def run_batch(files, output_dir, options, workers=1, cache_dir=None,
+              cache_max_mb=DEFAULT_MAX_DISK_MB):
+    """Yield one outcome dict per file, always in the order of files."""
+    inference_mode = options.get("inference_mode", DEFAULT_INFERENCE_MODE)
+    if workers <= 1:
+        _load_models(inference_mode)
+        _init_worker(cache_dir, cache_max_mb, None, inference_mode)
+        for file_path in files:
+            print(f"Processing {file_path} → {output_csv_path(file_path, output_dir)}")
+            yield _run_task(file_path, output_dir, options)
+        return
+
+    if options.get("parse_workers", 1) > 1 and options.get("parse_executor") == "process":
+        # worker processes can't cleanly host parse pools of their own, and the transcript
+        # workers already keep the cores busy
+        print("Note: --parse-workers with process workers is ignored when --workers > 1")
+        options = dict(options, parse_workers=1)
+
+    mp_context = None
+    if "fork" in multiprocessing.get_all_start_methods():
+        # Load once here so forked workers share the model weights copy-on-write.
+        _load_models(inference_mode)
+        mp_context = multiprocessing.get_context("fork")
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                             initializer=_init_worker,
+                             initargs=(cache_dir, cache_max_mb, torch_threads,
+                                       inference_mode, model_settings())) as pool:
+        futures = [pool.submit(_run_task, file_path, output_dir, options) for file_path in files]
+        for file_path, future in zip(files, futures):
+            try:
+                yield future.result()
+            except Exception:
+                # the worker process itself died (e.g. killed for memory)
+                yield {"file": file_path, "pid": None, "utterances": 0, "seconds": 0.0,
+                       "error": traceback.format_exc()}
+
+
+def print_run_summary(outcomes, wall_seconds, workers):
+    failed = [o for o in outcomes if o["error"]]
+    utterances = sum(o["utterances"] for o in outcomes)
+    wall_seconds = max(wall_seconds, 1e-9)
+
+    print(f"Run summary: {len(outcomes) - len(failed)}/{len(outcomes)} transcripts succeeded "
+          f"in {wall_seconds:.1f}s with {workers} worker(s)")
+    print(f"  Throughput: {(len(outcomes) - len(failed)) / wall_seconds:.2f} transcripts/s, "
+          f"{utterances / wall_seconds:.1f} utterances/s")
+
+    per_worker = {}
+    for o in outcomes:
+        if o["pid"] is None:
+            continue
+        files, busy = per_worker.get(o["pid"], (0, 0.0))
+        per_worker[o["pid"]] = (files + 1, busy + o["seconds"])
+    for pid, (files, busy) in sorted(per_worker.items()):
+        print(f"  Worker {pid}: {files} transcripts, busy {busy:.1f}s "
+              f"({busy / wall_seconds:.0%} utilization)")
+
+    cache_stats = {}
+    for o in outcomes:
+        if o.get("cache"):
+            cache_stats[o["pid"]] = o["cache"]
+    if cache_stats:
+        print("  " + format_cache_stats(merge_cache_stats(cache_stats.values())))
+
+    for o in failed:
+        print(f"  FAILED {o['file']}: {o['error'].strip().splitlines()[-1]}")
+
+
+def report_run_metrics(outcomes, output_dir):
+    """Aggregate the per-transcript metrics of a run, print them and save run_metrics.json."""
+    collected = [o["metrics"] for o in outcomes if o.get("metrics")]
+    if not collected:
+        return
+    merged = merge_metrics(collected)
+    path = os.path.join(output_dir, "run_metrics.json")
+    write_metrics(merged, path)
+    print(format_metrics(merged))
+    print(f"Run metrics written: {path}")
+
+
+def finish_outcome(outcome, output_dir, done_dir, journal=None):
+    """Report one outcome and move its transcript into done_dir if it succeeded."""
+    file_path = outcome["file"]
+    if outcome["error"]:
+        print(f"Failed {file_path}; left in place.\n{outcome['error']}")
+        if journal is not None:
+            journal.finished(file_path, ok=False)
+        return
+
+    print(f"CSV written: {output_csv_path(file_path, output_dir)}")
+
+    dest_path = os.path.join(done_dir, os.path.basename(file_path))
+    shutil.move(file_path, dest_path)
+    print(f"Moved processed file to: {dest_path}")
+    if journal is not None:
+        journal.finished(file_path, ok=True)
+
+
+def list_transcripts(input_dir):
+    files = []
+    for pattern in TRANSCRIPT_PATTERNS:
+        files.extend(glob.glob(os.path.join(input_dir, pattern)))
+    return sorted(files)
+
+
+def scan_transcripts(input_dir):
+    """Map each transcript in input_dir to its (size, mtime) signature."""
+    signatures = {}
+    for file_path in list_transcripts(input_dir):
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue  # moved or deleted since the listing
+        signatures[file_path] = (st.st_size, st.st_mtime_ns)
+    return signatures
+
+
+def watch_directory(input_dir, output_dir, done_dir, options, workers=1, cache_dir=None,
+                    cache_max_mb=DEFAULT_MAX_DISK_MB, poll_interval=DEFAULT_POLL_INTERVAL):
+    """Process transcripts as they land in input_dir until interrupted, keeping the models loaded.
+
+    A file is picked up once its size and mtime are unchanged between two polls, so
+    files that are still being copied in are left alone. A file that fails stays in
+    place and is retried only after it is modified.
+    """
+    _load_models(options.get("inference_mode", DEFAULT_INFERENCE_MODE))
+    print(f"Watching {input_dir} every {poll_interval:g}s (Ctrl+C to stop)")
+
+    previous = {}
+    failed = {}
+    outcomes = []
+    start = time.perf_counter()
+    try:
+        while True:
+            current = scan_transcripts(input_dir)
+            ready = [
+                file_path for file_path, signature in current.items()
+                if previous.get(file_path) == signature and failed.get(file_path) != signature
+            ]
+            previous = current
+
+            if ready:
+                for outcome in run_batch(ready, output_dir, options, workers=workers,
+                                         cache_dir=cache_dir, cache_max_mb=cache_max_mb):
+                    outcomes.append(outcome)
+                    finish_outcome(outcome, output_dir, done_dir)
+                    if outcome["error"]:
+                        failed[outcome["file"]] = current[outcome["file"]]
+                    else:
+                        failed.pop(outcome["file"], None)
+                        print(f"  {outcome['utterances']} utterances in {outcome['seconds']:.2f}s")
+                continue  # rescan right away; more files may have arrived meanwhile
+
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+    if outcomes:
+        print_run_summary(outcomes, time.perf_counter() - start, workers)
+        report_run_metrics(outcomes, output_dir)
+
+
+def run_files(files, output_dir, done_dir, options, journal, workers=1, cache_dir=None,
+              cache_max_mb=DEFAULT_MAX_DISK_MB):
+    outcomes = []
+    start = time.perf_counter()
+    for outcome in run_batch(files, output_dir, options, workers=workers,
+                             cache_dir=cache_dir, cache_max_mb=cache_max_mb):
+        outcomes.append(outcome)
+        finish_outcome(outcome, output_dir, done_dir, journal)
+
+    print_run_summary(outcomes, time.perf_counter() - start, workers)
+    report_run_metrics(outcomes, output_dir)
+
+
+def resume_last_run(output_dir, done_dir, workers=1, cache_dir=None,
+                    cache_max_mb=DEFAULT_MAX_DISK_MB):
+    """Finish the last run journaled in output_dir with its own options and model settings.
+
+    Transcripts it already finished are skipped; the one it was in the middle of
+    continues from its last checkpoint.
+    """
+    journal = RunJournal(output_dir)
+    last_run = journal.last_run()
+    if last_run is None:
+        print(f"No run journal in {output_dir}; nothing to resume")
+        return
+    files, options, models, finished = last_run
+    if models is not None:
+        if models != model_settings():
+            print("Note: resuming with the model settings of the last run; model options "
+                  "given on this command line are ignored")
+        configure_models(**models)
+    remaining = [f for f in files if f not in finished]
+    missing = [f for f in remaining if not os.path.exists(f)]
+    for file_path in missing:
+        print(f"Warning: {file_path} is gone; skipping it")
+    remaining = [f for f in remaining if f not in missing]
+    if not remaining:
+        print(f"The last run in {output_dir} already finished all {len(files)} transcripts")
+        return
+
+    print(f"Resuming the last run: {len(remaining)} of {len(files)} transcripts left")
+    if options.get("parse_dir"):
+        os.makedirs(options["parse_dir"], exist_ok=True)
+    run_files(remaining, output_dir, done_dir, dict(options, resume=True), journal,
+              workers=workers, cache_dir=cache_dir, cache_max_mb=cache_max_mb)
+
+
+def rescore_artifacts(path, output_dir, ads_only=False, sqlite_path=None):
+    """Re-run the scoring rules on saved parse artifacts; Stanza is never loaded."""
+    if os.path.isdir(path):
+        artifacts = sorted(glob.glob(os.path.join(path, "*" + ARTIFACT_SUFFIX)))
+    else:
+        artifacts = [path]
+    if not artifacts:
+        print(f"No {ARTIFACT_SUFFIX} files found in {path}")
+        return
+
+    start = time.perf_counter()
+    utterances = failures = 0
+    for artifact in artifacts:
+        name = os.path.basename(artifact)[:-len(ARTIFACT_SUFFIX)]
+        output_csv = output_csv_path(name, output_dir)
+        try:
+            utterances += len(rescore_parse_artifact(artifact, output_csv, ads_only=ads_only,
+                                                     sqlite_path=sqlite_path))
+        except Exception as e:
+            failures += 1
+            print(f"Failed {artifact}: {e}")
+            continue
+        print(f"Rescored {artifact} → {output_csv}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Rescored {len(artifacts) - failures}/{len(artifacts)} transcripts "
+          f"({utterances} utterances) in {elapsed:.2f}s")
 
 
 def main():
@@ -29,27 +431,213 @@ def main():
         action="store_true",
         help="Run ADS-only analysis (active declarative sentences only)"
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_PARSE_BATCH_SIZE,
+        help=f"Utterances sent to Stanza per batch (default: {DEFAULT_PARSE_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        metavar="N",
+        help=f"Utterances read, cleaned and parsed at a time (default: {DEFAULT_CHUNK_SIZE}); "
+             f"with --parse-workers, rounded up to whole batches for every worker"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the persistent parse cache (default: no cache)"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_DISK_MB,
+        help=f"Size limit of the on-disk parse cache in MB, shared by all workers "
+             f"(default: {DEFAULT_MAX_DISK_MB})"
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes scoring transcripts in parallel (default: 1)"
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Parse each transcript's utterances on N workers while scoring stays in "
+             "utterance order (default: 1); for single long transcripts"
+    )
+    parser.add_argument(
+        "--parse-executor",
+        choices=PARSE_EXECUTORS,
+        default=DEFAULT_PARSE_EXECUTOR,
+        help=f"Worker kind for --parse-workers (default: {DEFAULT_PARSE_EXECUTOR})"
+    )
+    parser.add_argument(
+        "--watch",
+        default=False,
+        action="store_true",
+        help="Keep running and process transcripts as they are added to the input folder"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"Seconds between input folder scans in --watch mode (default: {DEFAULT_POLL_INTERVAL:g})"
+    )
+    parser.add_argument(
+        "--inference-mode",
+        choices=INFERENCE_MODES,
+        default=DEFAULT_INFERENCE_MODE,
+        help="full (default), pretokenized (skip Stanza's tokenizer) or pretagged (also skip "
+             "the POS tagger where the lexicon tags every token); see benchmark.py modes"
+    )
+    parser.add_argument(
+        "--model-dir",
+        default=None,
+        metavar="DIR",
+        help="Folder with the Stanza models (default: Stanza's own, usually ~/stanza_resources)"
+    )
+    parser.add_argument(
+        "--offline",
+        default=False,
+        action="store_true",
+        help="Never download: check the model folder once and load the models from it as is"
+    )
+    parser.add_argument(
+        "--torch-threads",
+        type=int,
+        default=None,
+        metavar="N",
+        help="torch intra-op threads per process (default: torch's own, or CPUs / --workers)"
+    )
+    parser.add_argument(
+        "--torch-interop-threads",
+        type=int,
+        default=None,
+        metavar="N",
+        help="torch inter-op threads per process (default: torch's own)"
+    )
+    parser.add_argument(
+        "--processor-batch-size",
+        action="append",
+        default=[],
+        metavar="NAME=N",
+        help="Stanza batch size of one processor, e.g. pos=3000 (repeatable)"
+    )
+    parser.add_argument(
+        "--quantize",
+        default=False,
+        action="store_true",
+        help="Run the POS and depparse models int8 dynamic-quantized; check what that changes "
+             "with `benchmark.py quantize` first"
+    )
+    parser.add_argument(
+        "--sqlite",
+        default=None,
+        metavar="DB",
+        help="Also store every result and transcript total in this SQLite database, for "
+             "corpus-level queries and `compact.py --sqlite`"
+    )
+    parser.add_argument(
+        "--metrics",
+        default=False,
+        action="store_true",
+        help="Record stage timings and rule-branch counters (<name>_results.metrics.json per "
+             "transcript, run_metrics.json per run)"
+    )
+    parser.add_argument(
+        "--profile",
+        default=False,
+        action="store_true",
+        help="Also write cProfile output per transcript (<name>_results.prof); implies --metrics"
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=DEFAULT_CHECKPOINT_EVERY,
+        metavar="N",
+        help=f"Checkpoint each transcript every N scored utterances, 0 to disable "
+             f"(default: {DEFAULT_CHECKPOINT_EVERY})"
+    )
+    parser.add_argument(
+        "--resume",
+        default=False,
+        action="store_true",
+        help="Continue the last run recorded in the output folder's run journal, with its "
+             "options and model settings, from where it stopped"
+    )
+    parser.add_argument(
+        "--index-dir",
+        default=None,
+        metavar="DIR",
+        help="With -rr, keep each transcript's index in DIR and reuse it while the transcript "
+             "is unchanged (default: index in memory, save nothing)"
+    )
+    parser.add_argument(
+        "--save-parses",
+        default=None,
+        metavar="DIR",
+        help="Also save each transcript's parses to DIR for later --rescore runs"
+    )
+    parser.add_argument(
+        "--rescore",
+        default=None,
+        metavar="PATH",
+        help="Re-score saved parse artifacts (file or folder) without loading Stanza"
+    )
     args = parser.parse_args()
+    batch_sizes = {}
+    for value in args.processor_batch_size:
+        name, _, size = value.partition("=")
+        if not size.isdigit() or int(size) < 1:
+            parser.error(f"--processor-batch-size expects NAME=N, got {value!r}")
+        batch_sizes[name.strip()] = int(size)
+    configure_models(model_dir=args.model_dir, offline=args.offline, quantize=args.quantize,
+                     batch_sizes=batch_sizes, intra_op_threads=args.torch_threads,
+                     inter_op_threads=args.torch_interop_threads)
 
     base_dir = os.path.dirname(os.path.abspath(__file__))
 
+    if args.rescore:
+        output_dir = args.output or os.path.join(base_dir, "output")
+        os.makedirs(output_dir, exist_ok=True)
+        rescore_artifacts(args.rescore, output_dir, ads_only=args.ads_only,
+                          sqlite_path=args.sqlite)
+        return
+
+    if args.resume:
+        output_dir = args.output or os.path.join(base_dir, "output")
+        done_dir = os.path.join(base_dir, "processed")
+        os.makedirs(done_dir, exist_ok=True)
+        resume_last_run(output_dir, done_dir, workers=args.workers, cache_dir=args.cache_dir,
+                        cache_max_mb=args.cache_max_mb)
+        return
+
     input_dir = args.path or os.path.join(base_dir, "input")
     if not os.path.exists(input_dir):
         os.makedirs(input_dir)
         print(f"Created input folder: {input_dir}")
 
+    if args.watch and not os.path.isdir(input_dir):
+        print(f"Error: --watch needs a folder, got {input_dir}")
+        return
+
     if os.path.isfile(input_dir):
         files = [input_dir]
         base_input_dir = os.path.dirname(input_dir)
     elif os.path.isdir(input_dir):
-        files = glob.glob(os.path.join(input_dir, "*.cha")) + \
-                glob.glob(os.path.join(input_dir, "*.txt"))
+        files = list_transcripts(input_dir)
         base_input_dir = input_dir
     else:
         print(f"Error: {input_dir} is not a valid file or directory.")
         return
 
-    if not files:
+    if not files and not args.watch:
         print(f"No .cha or .txt files found in {input_dir}")
         return
 
@@ -59,33 +647,34 @@ def main():
     done_dir = os.path.join(base_dir, "processed")
     os.makedirs(done_dir, exist_ok=True)
 
-    for file_path in files:
-        with open(file_path, "r", encoding="utf-8") as f:
-            text = f.read()
-
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        output_csv = os.path.join(output_dir, base_name + "_results.csv")
-
-        print(f"Processing {file_path} → {output_csv}")
-
-        if args.ads_only:
-            run_ads_only_pipeline(
-                text,
-                output_csv_path=output_csv,
-                extract_rr=args.extract_rr
-            )
-        else:
-            run_full_pipeline(
-                text,
-                output_csv_path=output_csv,
-                extract_rr=args.extract_rr
-            )
-
-        print(f"CSV written: {output_csv}")
-
-        dest_path = os.path.join(done_dir, os.path.basename(file_path))
-        shutil.move(file_path, dest_path)
-        print(f"Moved processed file to: {dest_path}")
+    options = {
+        "ads_only": args.ads_only,
+        "extract_rr": args.extract_rr,
+        "batch_size": args.batch_size,
+        "chunk_size": args.chunk_size,
+        "inference_mode": args.inference_mode,
+        "parse_workers": args.parse_workers,
+        "parse_executor": args.parse_executor,
+        "parse_dir": args.save_parses,
+        "instrument": args.metrics or args.profile,
+        "profile": args.profile,
+        "checkpoint_every": args.checkpoint_every,
+        "sqlite_path": os.path.abspath(args.sqlite) if args.sqlite else None,
+        "index_dir": os.path.abspath(args.index_dir) if args.index_dir else None,
+    }
+    if args.save_parses:
+        os.makedirs(args.save_parses, exist_ok=True)
+
+    if args.watch:
+        watch_directory(input_dir, output_dir, done_dir, options, workers=args.workers,
+                        cache_dir=args.cache_dir, cache_max_mb=args.cache_max_mb,
+                        poll_interval=args.poll_interval)
+        return
+
+    journal = RunJournal(output_dir)
+    journal.start(files, options, model_settings())
+    run_files(files, output_dir, done_dir, options, journal, workers=args.workers,
+              cache_dir=args.cache_dir, cache_max_mb=args.cache_max_mb)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,316 @@
+# Process-wide registry of Stanza pipelines. Each configuration is downloaded and
+# loaded once per process and reused by every later analysis call. Calling
+# preload() in a parent process before forking workers lets them share the
+# loaded weights copy-on-write. Stanza itself is only imported when a pipeline is
+# first needed, so scoring from saved parses never loads it.
+#
+# Model files come from Stanza's default resources folder unless configure_models() names
+# another one. Offline, nothing is downloaded and no resources index is fetched: the
+# folder is checked once for every model file a pipeline needs (against the checksums in
+# its resources.json) and a stamp of the result is kept in the folder, so later starts
+# only stat the files.
+#
+# CPU knobs, also set through configure_models(): torch's intra-op and inter-op thread
+# counts (applied before the first pipeline of a process loads), Stanza's per-processor
+# batch sizes, and int8 dynamic quantization of the POS and depparse models. Quantized
+# pipelines are keyed apart from fp32 ones; `benchmark.py quantize` measures what they
+# change in the scores.
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_LANG = "en"
+DEFAULT_PROCESSORS = "tokenize,pos,lemma,depparse"
+
+_PIPELINES = {}
+_LOAD_STATS = {}
+_DOWNLOADED = set()
+_LOCK = threading.RLock()
+_SETTINGS = {"model_dir": None, "offline": False, "quantize": False, "batch_sizes": {},
+             "intra_op_threads": None, "inter_op_threads": None}
+_THREADS_APPLIED = set()  # pids; a forked worker applies its own
+
+QUANTIZED_PROCESSORS = ("pos", "depparse")
+
+VERIFY_STAMP_NAME = ".aps_verified.json"
+VERIFY_STAMP_VERSION = 1
+
+
+class ModelDirError(RuntimeError):
+    """The local model folder is missing a model an offline pipeline needs."""
+
+
+def configure_models(model_dir=None, offline=False, quantize=False, batch_sizes=None,
+                     intra_op_threads=None, inter_op_threads=None):
+    """Settings for the pipelines loaded from now on.
+
+    model_dir and offline: where the models are and whether they may be downloaded.
+    quantize: int8 dynamic quantization of the POS and depparse models. batch_sizes: Stanza
+    batch size per processor, e.g. {"pos": 3000, "depparse": 5000}. intra_op_threads and
+    inter_op_threads: torch thread pools (default: torch's own).
+    """
+    _SETTINGS.update(model_dir=model_dir, offline=offline, quantize=quantize,
+                     batch_sizes=dict(batch_sizes or {}), intra_op_threads=intra_op_threads,
+                     inter_op_threads=inter_op_threads)
+
+
+def model_settings():
+    # passed to worker processes that don't inherit the parent's memory
+    return dict(_SETTINGS)
+
+
+def default_model_dir():
+    # Stanza's own default, without importing Stanza
+    return os.environ.get("STANZA_RESOURCES_DIR",
+                          os.path.join(os.path.expanduser("~"), "stanza_resources"))
+
+
+def model_identity(lang=DEFAULT_LANG, processors=DEFAULT_PROCESSORS):
+    """Short fingerprint of the model files this pipeline loads with the current settings,
+    from the checksums resources.json lists for them; the model folder's path stands in
+    for a checksum it doesn't list (or when it has no resources.json yet)."""
+    model_dir = os.path.abspath(_SETTINGS["model_dir"] or default_model_dir())
+    try:
+        files = required_model_files(model_dir, lang, processors)
+    except ModelDirError:
+        files = {}
+    if not files or None in files.values():
+        files[""] = model_dir
+    identity = json.dumps(sorted(files.items()))
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+
+def _md5(path):
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def required_model_files(model_dir, lang, processors):
+    """{path relative to model_dir: md5 or None} of the models a pipeline loads."""
+    try:
+        with open(os.path.join(model_dir, "resources.json"), "r", encoding="utf-8") as f:
+            resources = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ModelDirError(f"No readable resources.json in {model_dir}: {e}")
+    lang_resources = resources.get(lang)
+    if not lang_resources:
+        raise ModelDirError(f"{model_dir}/resources.json has no models for {lang!r}")
+    defaults = lang_resources.get("default_processors", {})
+
+    names = processors.split(",")
+    if "tokenize" in names and "mwt" in defaults and "mwt" not in names:
+        names.append("mwt")  # Stanza adds it for languages that have one
+    files = {}
+    for name in names:
+        package = defaults.get(name)
+        if package is None:
+            raise ModelDirError(f"{model_dir}/resources.json has no default {name} model for {lang!r}")
+        wanted = [(name, package)]
+        entry = lang_resources.get(name, {}).get(package, {})
+        wanted += [(dep["model"], dep["package"]) for dep in entry.get("dependencies", [])]
+        for model, model_package in wanted:
+            md5 = lang_resources.get(model, {}).get(model_package, {}).get("md5")
+            files[os.path.join(lang, model, model_package + ".pt")] = md5
+    return files
+
+
+def verify_model_dir(model_dir, lang=DEFAULT_LANG, processors=DEFAULT_PROCESSORS):
+    """Check model_dir holds every model file of this pipeline, once per folder state.
+
+    The first check hashes the files; its stamp (kept in model_dir when it is writable)
+    lets later checks compare file sizes and mtimes only. Raises ModelDirError.
+    """
+    stamp_path = os.path.join(model_dir, VERIFY_STAMP_NAME)
+    key = f"{lang}|{processors}"
+    try:
+        with open(stamp_path, "r", encoding="utf-8") as f:
+            stamp = json.load(f)
+        if stamp.get("version") != VERIFY_STAMP_VERSION:
+            stamp = {}
+    except (OSError, ValueError):
+        stamp = {}
+    verified = stamp.get("pipelines", {}).get(key)
+
+    def file_states(paths):
+        states = {}
+        for rel in paths:
+            try:
+                st = os.stat(os.path.join(model_dir, rel))
+            except OSError:
+                return None
+            states[rel] = [st.st_size, st.st_mtime_ns]
+        return states
+
+    if verified is not None and file_states(verified) == verified:
+        return
+
+    files = required_model_files(model_dir, lang, processors)
+    for rel, md5 in files.items():
+        path = os.path.join(model_dir, rel)
+        if not os.path.isfile(path):
+            raise ModelDirError(f"Missing model file {path}; copy it from a machine that "
+                                f"ran `stanza.download({lang!r})`")
+        if md5 and _md5(path) != md5:
+            raise ModelDirError(f"Model file {path} does not match the checksum in resources.json")
+
+    pipelines = dict(stamp.get("pipelines", {}))
+    pipelines[key] = file_states(files)
+    try:
+        tmp = stamp_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERIFY_STAMP_VERSION, "pipelines": pipelines}, f)
+        os.replace(tmp, stamp_path)
+    except OSError:
+        print(f"Warning: could not write {stamp_path}; the models will be verified again next time")
+
+
+def _current_rss_mb():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows: no /proc and no resource module
+    # ru_maxrss is a peak, reported in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if peak > 1 << 30 else peak / 1024.0
+
+
+def _pipeline_key(lang, processors, options):
+    return (lang, processors, tuple(sorted(options.items())), _SETTINGS["model_dir"],
+            _SETTINGS["quantize"], tuple(sorted(_SETTINGS["batch_sizes"].items())))
+
+
+def quantize_pipeline(nlp):
+    """Swap the POS and depparse models of a loaded pipeline for int8 dynamic-quantized
+    copies (Linear and LSTM layers); returns the names of the processors quantized."""
+    import torch
+    quantized = []
+    for name in QUANTIZED_PROCESSORS:
+        trainer = getattr(nlp.processors.get(name), "_trainer", None)
+        model = getattr(trainer, "model", None)
+        if model is None:
+            continue
+        try:
+            trainer.model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
+        except (RuntimeError, AssertionError) as e:
+            print(f"Warning: could not quantize the {name} model, keeping it in fp32 ({e})")
+            continue
+        quantized.append(name)
+    return quantized
+
+
+def _apply_torch_threads():
+    intra, inter = _SETTINGS["intra_op_threads"], _SETTINGS["inter_op_threads"]
+    if (intra or inter) and os.getpid() not in _THREADS_APPLIED:
+        set_torch_threads(intra, inter)
+        _THREADS_APPLIED.add(os.getpid())
+
+
+def get_pipeline(lang=DEFAULT_LANG, processors=DEFAULT_PROCESSORS, **options):
+    """Return the shared pipeline for this configuration, loading it on first use."""
+    key = _pipeline_key(lang, processors, options)
+    nlp = _PIPELINES.get(key)
+    if nlp is not None:
+        return nlp
+
+    with _LOCK:
+        nlp = _PIPELINES.get(key)
+        if nlp is not None:
+            return nlp
+
+        model_dir = _SETTINGS["model_dir"]
+        load_options = dict(options)
+        if model_dir:
+            load_options["dir"] = model_dir
+        if _SETTINGS["offline"]:
+            verify_model_dir(model_dir or default_model_dir(), lang, processors)
+            load_options["download_method"] = None  # use the local resources.json as is
+        for name, size in _SETTINGS["batch_sizes"].items():
+            if name in processors.split(","):
+                load_options[f"{name}_batch_size"] = size
+
+        _apply_torch_threads()
+        import stanza
+
+        if not _SETTINGS["offline"] and lang not in _DOWNLOADED:
+            if model_dir:
+                stanza.download(lang, model_dir=model_dir, logging_level='ERROR')
+            else:
+                stanza.download(lang, logging_level='ERROR')
+            _DOWNLOADED.add(lang)
+
+        rss_before = _current_rss_mb()
+        start = time.perf_counter()
+        nlp = stanza.Pipeline(lang, processors=processors, logging_level='ERROR', **load_options)
+        quantized = quantize_pipeline(nlp) if _SETTINGS["quantize"] else []
+        load_seconds = time.perf_counter() - start
+        rss_after = _current_rss_mb()
+
+        _PIPELINES[key] = nlp
+        _LOAD_STATS[key] = {
+            "lang": lang,
+            "processors": processors,
+            "options": dict(options),
+            "quantized": quantized,
+            "pid": os.getpid(),
+            "load_seconds": round(load_seconds, 3),
+            "rss_mb": None if rss_after is None else round(rss_after, 1),
+            "rss_delta_mb": None if None in (rss_before, rss_after) else round(rss_after - rss_before, 1),
+        }
+        return nlp
+
+
+def preload(lang=DEFAULT_LANG, processors=DEFAULT_PROCESSORS, **options):
+    """Load a pipeline ahead of time (e.g. before forking workers) and return its load stats."""
+    get_pipeline(lang, processors, **options)
+    return dict(_LOAD_STATS[_pipeline_key(lang, processors, options)])
+
+
+def pipeline_stats():
+    """Load time and memory for every pipeline loaded in this process."""
+    return [dict(s) for s in _LOAD_STATS.values()]
+
+
+def format_load_stats(stats):
+    int8 = f", int8 {'+'.join(stats['quantized'])}" if stats.get("quantized") else ""
+    memory = "" if stats["rss_mb"] is None else \
+        f"+{stats['rss_delta_mb']:.0f} MB, RSS {stats['rss_mb']:.0f} MB, "
+    return (f"Stanza pipeline [{stats['processors']}{int8}] loaded in {stats['load_seconds']:.2f}s "
+            f"({memory}pid {stats['pid']})")
+
+
+def set_torch_threads(num_threads=None, interop_threads=None):
+    """Cap torch's intra-op (and inter-op) threads so runs sharing a machine don't
+    oversubscribe the CPU."""
+    try:
+        import torch
+    except ImportError:
+        return  # e.g. the stub parser; nothing to cap
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # torch only allows this before its first inter-op parallel work
+            print(f"Warning: torch inter-op threads not changed ({e})")
+
+
+def clear_pipelines():
+    """Drop every cached pipeline so its memory can be reclaimed."""
+    with _LOCK:
+        _PIPELINES.clear()
+        _LOAD_STATS.clear()
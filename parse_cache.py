@@ -0,0 +1,262 @@
+# Content-addressed cache of Stanza parses for cleaned utterances.
+# Tier 1 is an in-memory LRU, tier 2 an optional on-disk store (one small JSON file per
+# parse, sharded by key prefix). Keys cover the parsed text, the Stanza version, the
+# processor set, the inference mode and the models themselves (models.model_identity()),
+# so upgrading Stanza, switching model folders or changing how utterances are parsed never
+# serves stale parses.
+#
+# The disk size limit covers the whole directory, which several worker processes may be
+# writing at once. Each process only counts its own writes, so it re-stats the directory
+# whenever it has written DISK_RECHECK_FRACTION of the limit since its last look, and
+# before evicting. Between looks the directory can exceed the limit by up to that
+# fraction per writing process.
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MAX_MEMORY_ENTRIES = 50000
+DEFAULT_MAX_DISK_MB = 512
+DISK_RECHECK_FRACTION = 0.05
+
+WORD_FIELDS = ("id", "text", "lemma", "upos", "xpos", "feats", "head", "deprel")
+
+
+class ParsedWord:
+    __slots__ = WORD_FIELDS
+
+    def __init__(self, id, text, lemma, upos, xpos, feats, head, deprel):
+        self.id = id
+        self.text = text
+        self.lemma = lemma
+        self.upos = upos
+        self.xpos = xpos
+        self.feats = feats
+        self.head = head
+        self.deprel = deprel
+
+
+class ParsedSentence:
+    __slots__ = ("words",)
+
+    def __init__(self, words):
+        self.words = words
+
+
+class ParsedDocument:
+    """Lightweight stand-in for a stanza Document, exposing only what the scoring rules read."""
+    __slots__ = ("text", "sentences")
+
+    def __init__(self, text, sentences):
+        self.text = text
+        self.sentences = sentences
+
+
+def doc_to_rows(doc):
+    """Serialize a parsed document to nested lists of WORD_FIELDS values."""
+    return [
+        [[getattr(w, f) for f in WORD_FIELDS] for w in sent.words]
+        for sent in doc.sentences
+    ]
+
+
+def rows_to_doc(text, rows):
+    """Build a fresh, independently mutable ParsedDocument from serialized rows."""
+    return ParsedDocument(text, [
+        ParsedSentence([ParsedWord(*row) for row in sent_rows])
+        for sent_rows in rows
+    ])
+
+
+def stanza_version():
+    from importlib import metadata  # slow to import; only needed once a cache or artifact is used
+    try:
+        return metadata.version("stanza")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def cache_namespace(lang="en", processors="tokenize,pos,lemma,depparse", inference_mode="full",
+                    quantized=False, model_id=None):
+    namespace = f"v{CACHE_FORMAT_VERSION}|stanza-{stanza_version()}|{lang}|{processors}"
+    # full-mode fp32 keys predate inference modes and quantization and stay as they were
+    if inference_mode != "full":
+        namespace = f"{namespace}|{inference_mode}"
+    if model_id:
+        namespace = f"{namespace}|models-{model_id}"
+    return f"{namespace}|int8" if quantized else namespace
+
+
+class ParseCache:
+    def __init__(self, cache_dir=None, namespace=None,
+                 max_memory_entries=DEFAULT_MAX_MEMORY_ENTRIES,
+                 max_disk_mb=DEFAULT_MAX_DISK_MB, inference_mode="full", quantized=False,
+                 model_id=None):
+        self.cache_dir = cache_dir
+        self.inference_mode = inference_mode
+        self.namespace = namespace or cache_namespace(inference_mode=inference_mode,
+                                                      quantized=quantized, model_id=model_id)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        self._unchecked_bytes = 0  # written by this process since the directory was last sized
+        self.counters = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0,
+            "memory_evictions": 0, "disk_evictions": 0,
+        }
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, text):
+        """Return a fresh ParsedDocument for text, or None on a miss."""
+        key = self.key(text)
+        with self._lock:
+            rows = self._memory.get(key)
+            if rows is not None:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return rows_to_doc(text, rows)
+
+        rows = self._disk_get(key, text) if self.cache_dir else None
+        with self._lock:
+            if rows is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            self._memory_put(key, rows)
+        return rows_to_doc(text, rows)
+
+    def put(self, text, doc):
+        """Store the parse of text. Call before the scoring rules retag the document."""
+        key = self.key(text)
+        rows = doc_to_rows(doc)
+        with self._lock:
+            self._memory_put(key, rows)
+            self.counters["stores"] += 1
+        if self.cache_dir:
+            self._disk_put(key, text, rows)
+
+    def _memory_put(self, key, rows):
+        self._memory[key] = rows
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.counters["memory_evictions"] += 1
+
+    def _disk_get(self, key, text):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("text") != text:
+            return None
+        try:
+            os.utime(path)  # keeps eviction least-recently-used rather than oldest-written
+        except OSError:
+            pass
+        return entry["rows"]
+
+    def _disk_put(self, key, text, rows):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"text": text, "rows": rows}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)  # atomic, so concurrent workers never read half a file
+        size = os.path.getsize(path)
+        with self._lock:
+            self._disk_bytes += size
+            self._unchecked_bytes += size
+            recheck = self._disk_bytes > self.max_disk_bytes or \
+                self._unchecked_bytes >= self.max_disk_bytes * DISK_RECHECK_FRACTION
+            if recheck:
+                self._unchecked_bytes = 0
+        if recheck:
+            self._check_disk()
+
+    def _disk_entries(self):
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for fname in os.listdir(shard_dir):
+                if not fname.endswith(".json"):
+                    continue
+                path = os.path.join(shard_dir, fname)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _check_disk(self):
+        # the directory's real size, other processes' writes included; over the limit,
+        # evict down to 90% of it so we don't rescan on every put
+        entries = list(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_disk_bytes:
+            total = self._evict_disk(entries, total)
+        with self._lock:
+            self._disk_bytes = total
+
+    def _evict_disk(self, entries, total):
+        entries.sort(key=lambda e: e[2])
+        target = self.max_disk_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.counters["disk_evictions"] += 1
+        return total
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_mb"] = round(self._disk_bytes / (1024 * 1024), 2)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def merge_cache_stats(stats_list):
+    """Combine stats() snapshots from several processes into one summary."""
+    merged = {}
+    for stats in stats_list:
+        for k, v in stats.items():
+            if k != "hit_rate":
+                merged[k] = merged.get(k, 0) + v
+    if not merged:
+        return merged
+    # every process sees the same disk tier, so its size is not additive
+    merged["disk_mb"] = max(s["disk_mb"] for s in stats_list)
+    lookups = merged["memory_hits"] + merged["disk_hits"] + merged["misses"]
+    merged["hit_rate"] = round((lookups - merged["misses"]) / lookups, 4) if lookups else 0.0
+    return merged
+
+
+def format_cache_stats(stats):
+    return (f"Parse cache: {stats['memory_hits'] + stats['disk_hits']} hits "
+            f"({stats['memory_hits']} memory, {stats['disk_hits']} disk), "
+            f"{stats['misses']} misses, hit rate {stats['hit_rate']:.1%}, "
+            f"{stats['memory_entries']} in memory, {stats['disk_mb']} MB on disk")
@@ -0,0 +1,97 @@
+# Parallel parsing within one transcript (analyze.py's parse_workers option).
+#
+# The Stanza parse is the slow part of scoring and every utterance is parsed on its own,
+# but the scoring rules depend on utterance order through what they have already seen.
+# So only the parse is spread out: parse_texts() hands the Stanza batches of a chunk to a
+# pool, gets the documents back in batch order, and the scoring rules still consume them
+# one utterance at a time, in transcript order, in the calling process. Results are the
+# same as a sequential run.
+#
+# "process" workers each hold their own copy of the mode's pipelines (forked from the
+# parent where possible, so the weights are shared copy-on-write) and send parses back as
+# rows, which become ParsedDocuments like parse cache hits. "thread" workers share the
+# parent's pipelines; that only pays off where the parser releases the GIL.
+#
+# Pools are created on first use and reused by every later transcript in the process.
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from models import configure_models, model_settings, set_torch_threads
+from parse_cache import doc_to_rows, rows_to_doc
+
+PARSE_EXECUTORS = ("process", "thread")
+DEFAULT_PARSE_EXECUTOR = "process"
+
+_POOLS = {}
+_LOCK = threading.Lock()
+
+# the pipeline of a process worker, set by _init_process_worker
+_WORKER_PIPELINE = None
+
+
+def _init_process_worker(inference_mode, nlp, verb_master_list_path, torch_threads, models):
+    global _WORKER_PIPELINE
+    from analyze import mode_pipeline
+    configure_models(**models)
+    set_torch_threads(models["intra_op_threads"] or torch_threads, models["inter_op_threads"])
+    _WORKER_PIPELINE = mode_pipeline(inference_mode, nlp=nlp,
+                                     verb_master_list_path=verb_master_list_path)
+
+
+def _parse_batch_rows(texts):
+    return [doc_to_rows(doc) for doc in _WORKER_PIPELINE.bulk_process(texts)]
+
+
+def _get_pool(key, factory):
+    with _LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = factory()
+        return pool
+
+
+def batch_mapper(pipeline, workers, executor=DEFAULT_PARSE_EXECUTOR, inference_mode=None,
+                 nlp=None, verb_master_list_path=None):
+    """Return map_batches(list of text batches) -> documents per batch, in batch order.
+
+    pipeline is what a thread worker parses with; a process worker builds its own from
+    inference_mode, nlp and verb_master_list_path (see analyze.mode_pipeline()).
+    """
+    if executor not in PARSE_EXECUTORS:
+        raise ValueError(f"Unknown parse executor {executor!r}; expected one of {PARSE_EXECUTORS}")
+
+    if executor == "thread":
+        pool = _get_pool(("thread", workers), lambda: ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="parse"))
+        return lambda batches: pool.map(pipeline.bulk_process, batches)
+
+    def start_pool():
+        mp_context = None
+        if "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        return ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                                   initializer=_init_process_worker,
+                                   initargs=(inference_mode, nlp, verb_master_list_path,
+                                             torch_threads, model_settings()))
+
+    pool = _get_pool(("process", workers, inference_mode, id(nlp), verb_master_list_path),
+                     start_pool)
+
+    def map_batches(batches):
+        rows = pool.map(_parse_batch_rows, batches)
+        return ([rows_to_doc(text, doc_rows) for text, doc_rows in zip(texts, batch_rows)]
+                for texts, batch_rows in zip(batches, rows))
+    return map_batches
+
+
+def shutdown_parse_pools():
+    """Stop every parse pool of this process."""
+    with _LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown()
@@ -0,0 +1,234 @@
+# Per-utterance scoring results.
+#
+# A result is a __slots__ record: the two utterance strings, the exists/productive flags as
+# 0/1 ints and, for each of the four measures, a note stored as (Reason, argument). The
+# argument is the lemma or context tuple the rule already had in hand, so scoring allocates
+# no note text at all; notes are rendered from NOTE_TEMPLATES only when they are read.
+#
+# UtteranceResult is also a Mapping with the keys of the original result dicts
+# (r["art_notes"], r.get("cleaned"), dict(r), ...), plus "is_ads" once the ADS pass has set
+# it, so code written against those dicts keeps working. Keys can be assigned as on a dict:
+# a flag goes to its slot, a note's new text and any new key to an overflow dict that is
+# only made for records that need one. A record is not a dict, though: json.dumps() and
+# other code that wants one needs dict(r) (see interface.result_dicts()).
+#
+# A caller that asked for some measures only (analyze.iter_scores(measures=..., notes=...))
+# gets PartialUtteranceResult records, whose view has just those measures' keys, and their
+# notes only if notes were asked for. The other fields were not computed; reading them
+# raises KeyError rather than returning a score of 0 that was never scored.
+
+from collections.abc import Mapping
+from enum import IntEnum
+
+
+class Reason(IntEnum):
+    NA = 0
+    NADS = 1
+    QUESTION = 2
+    UNINTELLIGIBLE = 3
+    COPULAR_EXCLUSION = 4
+    NO_VERB_OR_AUX = 5
+    RECOVERED_PROGRESSIVE = 6
+    RECOVERED_REPEATED_PROGRESSIVE = 7
+    SOLE_VERB_PROGRESSIVE = 8
+    SOLE_VERB = 9
+    RECOVERED_FIRST_ARTICLE = 10
+    RECOVERED_DUPLICATE_ARTICLE = 11
+    FORCED_VERB = 12
+    HEURISTIC_FIRST_ARTICLE = 13
+    HEURISTIC_DUPLICATE_ARTICLE = 14
+    FIRST_ARTICLE = 15
+    DUPLICATE_ARTICLE = 16
+    NEW_PROGRESSIVE = 17
+    REPEATED_PROGRESSIVE = 18
+    PASSIVE_AUX_NEW = 19
+    PASSIVE_AUX_DUPLICATE = 20
+    DET_NOUN_VBG_NEW = 21
+    DET_NOUN_VBG_REPEATED = 22
+    ACTIVE_PROGRESSIVE_NEW = 23
+    ACTIVE_PROGRESSIVE_REPEATED = 24
+    AUX_EXCLUDED_SUBJECT = 25
+    AUX_NEW = 26
+    AUX_DUPLICATE = 27
+
+
+# {} is filled with the note's argument: a lemma, or a context tuple shown as its repr
+NOTE_TEMPLATES = {
+    Reason.NA: "N/A",
+    Reason.NADS: "NADS: non-active declarative structure",
+    Reason.QUESTION: "Question: non-active declarative structure",
+    Reason.UNINTELLIGIBLE: "contains unintelligible words (xxx)",
+    Reason.COPULAR_EXCLUSION: "Excluded: true copular clause (adj/nominal/PP predicate)",
+    Reason.NO_VERB_OR_AUX: "no verb or aux",
+    Reason.RECOVERED_PROGRESSIVE: "Recovered misparsed progressive: {}",
+    Reason.RECOVERED_REPEATED_PROGRESSIVE: "Recovered repeated progressive: {}",
+    Reason.SOLE_VERB_PROGRESSIVE: "Sole-verb utterance: progressive exists but not productive ({})",
+    Reason.SOLE_VERB: "Sole-verb utterance: exists but not productive ({})",
+    Reason.RECOVERED_FIRST_ARTICLE: "Recovered: first time {}",
+    Reason.RECOVERED_DUPLICATE_ARTICLE: "Recovered: duplicate {}",
+    Reason.FORCED_VERB: "Heuristic forced verb ({})",
+    Reason.HEURISTIC_FIRST_ARTICLE: "Heuristic: first time {}",
+    Reason.HEURISTIC_DUPLICATE_ARTICLE: "Heuristic: duplicate article {}",
+    Reason.FIRST_ARTICLE: "First time {} used",
+    Reason.DUPLICATE_ARTICLE: "Duplicate article context {}",
+    Reason.NEW_PROGRESSIVE: "/ing combined with new verb ({})",
+    Reason.REPEATED_PROGRESSIVE: "Lexical verb ({}) repeated",
+    Reason.PASSIVE_AUX_NEW: "Passive aux: new context {}",
+    Reason.PASSIVE_AUX_DUPLICATE: "Passive aux: duplicate context {}",
+    Reason.DET_NOUN_VBG_NEW: "Heuristic: DET+NOUN+VBG new verb ({})",
+    Reason.DET_NOUN_VBG_REPEATED: "Heuristic: DET+NOUN+VBG repeated ({})",
+    Reason.ACTIVE_PROGRESSIVE_NEW: "/ing in active declarative with new verb ({})",
+    Reason.ACTIVE_PROGRESSIVE_REPEATED: "/ing in active declarative repeated verb ({})",
+    Reason.AUX_EXCLUDED_SUBJECT: "Aux on excluded subject ({})",
+    Reason.AUX_NEW: "New aux context {}",
+    Reason.AUX_DUPLICATE: "Duplicate aux context {}",
+}
+
+# notes without an argument, shared by every result that uses them
+NOTE_NA = (Reason.NA, None)
+NOTE_NADS = (Reason.NADS, None)
+NOTE_QUESTION = (Reason.QUESTION, None)
+NOTE_UNINTELLIGIBLE = (Reason.UNINTELLIGIBLE, None)
+NOTE_COPULAR_EXCLUSION = (Reason.COPULAR_EXCLUSION, None)
+NOTE_NO_VERB_OR_AUX = (Reason.NO_VERB_OR_AUX, None)
+
+RESULT_KEYS = (
+    "utterance", "cleaned",
+    "art_exists", "art_productive", "art_notes",
+    "aux_exists", "aux_productive", "aux_notes",
+    "prog_exists", "prog_productive", "prog_notes",
+    "active_prog_exists", "active_prog_productive", "active_prog_notes",
+)
+NOTE_KEYS = ("art_notes", "aux_notes", "prog_notes", "active_prog_notes")
+MEASURES = ("art", "aux", "prog", "active_prog")  # prefixes of the result keys
+_NOTE_SLOTS = {key: key[:-1] for key in NOTE_KEYS}  # "art_notes" -> slot "art_note"
+_VALUE_KEYS = frozenset(RESULT_KEYS) - frozenset(NOTE_KEYS)
+
+
+def render_note(note):
+    reason, argument = note
+    template = NOTE_TEMPLATES[reason]
+    return template if argument is None else template.format(argument)
+
+
+def note_reason(result, measure):
+    """The Reason of a result's note for measure ("art", "aux"...), or None for results
+    that only hold note text (e.g. plain dicts)."""
+    note = getattr(result, measure + "_note", None)
+    return note[0] if note is not None else None
+
+
+class UtteranceResult(Mapping):
+    """Scores of one utterance; see the module comment for the dict-compatible view."""
+    __slots__ = ("utterance", "cleaned",
+                 "art_exists", "art_productive", "art_note",
+                 "aux_exists", "aux_productive", "aux_note",
+                 "prog_exists", "prog_productive", "prog_note",
+                 "active_prog_exists", "active_prog_productive", "active_prog_note",
+                 "is_ads", "extra")
+    _view = (RESULT_KEYS, frozenset(RESULT_KEYS))  # (keys, key set) the record shows
+
+    def __init__(self, utterance, cleaned,
+                 art_exists=0, art_productive=0, art_note=NOTE_NA,
+                 aux_exists=0, aux_productive=0, aux_note=NOTE_NA,
+                 prog_exists=0, prog_productive=0, prog_note=NOTE_NA,
+                 active_prog_exists=0, active_prog_productive=0, active_prog_note=NOTE_NA):
+        self.utterance = utterance
+        self.cleaned = cleaned
+        self.art_exists = art_exists
+        self.art_productive = art_productive
+        self.art_note = art_note
+        self.aux_exists = aux_exists
+        self.aux_productive = aux_productive
+        self.aux_note = aux_note
+        self.prog_exists = prog_exists
+        self.prog_productive = prog_productive
+        self.prog_note = prog_note
+        self.active_prog_exists = active_prog_exists
+        self.active_prog_productive = active_prog_productive
+        self.active_prog_note = active_prog_note
+        self.is_ads = self.extra = None
+
+    def __getitem__(self, key):
+        if key in _VALUE_KEYS:
+            return getattr(self, key)
+        if key in _NOTE_SLOTS:
+            note = getattr(self, _NOTE_SLOTS[key])
+            return render_note(note) if note is not None else self.extra[key]
+        if key == "is_ads" and self.is_ads is not None:
+            return self.is_ads
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == "is_ads":
+            self.is_ads = value
+        elif key in _VALUE_KEYS and key in self._view[1]:
+            setattr(self, key, value)
+        else:
+            if key in _NOTE_SLOTS and key in self._view[1]:
+                setattr(self, _NOTE_SLOTS[key], None)  # the note is now this text
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __iter__(self):
+        keys = self._view[0]
+        yield from keys
+        if self.is_ads is not None:
+            yield "is_ads"
+        if self.extra is not None:
+            yield from (k for k in self.extra if k not in self._view[1])
+
+    def __len__(self):
+        extra = 0 if self.extra is None else sum(k not in self._view[1] for k in self.extra)
+        return len(self._view[0]) + (self.is_ads is not None) + extra
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class PartialUtteranceResult(UtteranceResult):
+    """Scores of one utterance for some measures only; see the module comment. Records are
+    made by the subclass partial_result_type() returns for their measures, whose _view
+    holds those measures' keys and _key is (measures, notes)."""
+    __slots__ = ()
+    _key = (frozenset(MEASURES), True)
+
+    def __getitem__(self, key):
+        if key in self._view[1]:
+            return UtteranceResult.__getitem__(self, key)
+        if key == "is_ads" and self.is_ads is not None:
+            return self.is_ads
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __reduce__(self):
+        # the subclasses are made at run time, so pickles name them by their measures
+        values = tuple(getattr(self, slot) for slot in UtteranceResult.__slots__)
+        return _rebuild_partial_result, (self._key, values)
+
+
+_PARTIAL_TYPES = {}
+
+
+def partial_result_type(measures, notes=True):
+    """The PartialUtteranceResult subclass for results scored for these measures, with or
+    without notes; it takes the same arguments as UtteranceResult."""
+    key = (frozenset(measures), notes)
+    cls = _PARTIAL_TYPES.get(key)
+    if cls is None:
+        keys = tuple(k for k in RESULT_KEYS if k in ("utterance", "cleaned") or (
+            k.rsplit("_", 1)[0] in measures and (notes or k not in NOTE_KEYS)))
+        cls = _PARTIAL_TYPES[key] = type(PartialUtteranceResult.__name__, (PartialUtteranceResult,),
+                                         {"__slots__": (), "_view": (keys, frozenset(keys)),
+                                          "_key": key})
+    return cls
+
+
+def _rebuild_partial_result(key, values):
+    result = partial_result_type(*key)(*values[:len(RESULT_KEYS)])
+    result.is_ads, result.extra = values[len(RESULT_KEYS):]
+    return result
@@ -1,97 +1,528 @@
 import csv
-import pandas as pd
-
-def write_analysis_to_csv(per_utt_results, output_csv_path):
-    with open(output_csv_path, "w", newline="", encoding="utf-8") as fout:
-        w = csv.writer(fout)
-
-        def write_block(header, key_exists, key_prod, key_notes, total_label):
-            w.writerow(["Selected Utterances", "Cleaned Utterance"] + header)
-            total = 0
-            for r in per_utt_results:
-                w.writerow([
-                    r["utterance"],
-                    r["cleaned"],
-                    "yes" if r[key_exists] else "no",
-                    "yes" if r[key_prod] else "no",
-                    r[key_notes],
-                    r[key_prod]
-                ])
-                total += r[key_prod]
-            w.writerow(["", "", "", "", total_label, str(total)])
-            w.writerow([""] * 6)
-            w.writerow([""] * 6)
+import datetime
+import io
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+from results import Reason, note_reason
+
+SIDECAR_FORMAT = "aps-scores"
+SIDECAR_VERSION = 1
+SIDECAR_SUFFIX = ".scores.jsonl"
+FLAG_KEYS = ("art_exists", "art_productive", "aux_exists", "aux_productive",
+             "prog_exists", "prog_productive", "active_prog_exists", "active_prog_productive")
+TOTAL_KEYS = ("art_productive", "aux_productive", "active_prog_productive", "prog_productive")
+
 
-        # article
-        write_block(
-            ["Is there an article with a noun subject?",
+# The sidecar is the machine-readable twin of a results CSV, read by compact.py: a header
+# line with the totals, then one JSON list of flags per utterance. Written next to the CSV,
+# after it.
+def sidecar_path_for(csv_path):
+    base = csv_path[:-4] if csv_path.endswith(".csv") else csv_path
+    return base + SIDECAR_SUFFIX
+
+
+# The four blocks of a results CSV, in file order:
+# (spool name, column headers, exists key, productive key, notes key, total label)
+BLOCKS = (
+    ("art", ["Is there an article with a noun subject?",
              "is it in a productive context?",
              "How do I know? (article)",
              "Article Productivity"],
-            "art_exists", "art_productive", "art_notes",
-            "Total Article Productivity Score ="
-        )
-
-        # aux
-        write_block(
-            ["Is there an auxiliary?",
+     "art_exists", "art_productive", "art_notes", "Total Article Productivity Score ="),
+    ("aux", ["Is there an auxiliary?",
              "is it in a productive context? (aux)",
              "How do I know? (aux)",
              "Auxiliary Productivity"],
-            "aux_exists", "aux_productive", "aux_notes",
-            "Total Auxiliary Productivity ="
-        )
-
-        # active Progressive
-        w.writerow([
-            "Selected Utterances", "Cleaned Utterance",
-            "is there a progressive -ing morpheme in active declarative?",
-            "is it productive? (active progressive)",
-            "how do I know? (active progressive)",
-            "Active Progressive Productivity"
-        ])
-        total_ap = 0
-        for r in per_utt_results:
-            w.writerow([
-                r["utterance"], r["cleaned"],
-                "yes" if r["active_prog_exists"] else "no",
-                "yes" if r["active_prog_productive"] else "no",
-                r["active_prog_notes"],
-                r["active_prog_productive"]
-            ])
-            total_ap += r["active_prog_productive"]
-        w.writerow(["", "", "", "", "Total Active Progressive Productivity", str(total_ap)])
-        w.writerow([""] * 6)
-        w.writerow([""] * 6)
-
-        # general Progressive
-        w.writerow([
-            "Selected Utterances", "Cleaned Utterance",
-            "is there a progressive -ing morpheme?",
-            "is it productive? (general progressive)",
-            "how do I know? (general progressive)",
-            "General Progressive Productivity"
-        ])
-        total_gp = 0
+     "aux_exists", "aux_productive", "aux_notes", "Total Auxiliary Productivity ="),
+    ("active_prog", ["is there a progressive -ing morpheme in active declarative?",
+                     "is it productive? (active progressive)",
+                     "how do I know? (active progressive)",
+                     "Active Progressive Productivity"],
+     "active_prog_exists", "active_prog_productive", "active_prog_notes",
+     "Total Active Progressive Productivity"),
+    ("prog", ["is there a progressive -ing morpheme?",
+              "is it productive? (general progressive)",
+              "how do I know? (general progressive)",
+              "General Progressive Productivity"],
+     "prog_exists", "prog_productive", "prog_notes", "Total General Progressive Productivity"),
+)
+SPOOL_SUFFIX = ".spool"
+SPOOL_BUFFER_BYTES = 1 << 16
+PARTIAL_SUFFIX = ".partial.csv"
+
+
+def spool_dir_for(csv_path):
+    return csv_path + SPOOL_SUFFIX
+
+
+def partial_path_for(csv_path):
+    return (csv_path[:-4] if csv_path.endswith(".csv") else csv_path) + PARTIAL_SUFFIX
+
+
+def _write_layout(out, blocks):
+    # blocks: (header, totals label, total, spool file) per block; the spool holds its rows
+    w = csv.writer(out)
+    for i, (header, total_label, total, spool) in enumerate(blocks):
+        w.writerow(["Selected Utterances", "Cleaned Utterance"] + header)
+        shutil.copyfileobj(spool, out)
+        w.writerow(["", "", "", "", total_label, str(total)])
+        if i < len(blocks) - 1:
+            w.writerow([""] * 6)
+            w.writerow([""] * 6)
+
+
+class ResultSink:
+    """Writes a results CSV (and its sidecar) from results pushed one at a time.
+
+    Each block's rows go to its own buffered spool file in <csv>.spool/ as they arrive;
+    close() writes the usual four-block layout from the spools and removes them. If the run
+    dies first, the spools stay behind and recover_partial_csv() turns them into a CSV of
+    the rows scored so far. Use as a context manager: an exception leaves the spools.
+
+    resume, a position() taken by an earlier sink for the same CSV, reopens its spools cut
+    back to that position instead of starting empty (see checkpoint.py).
+
+    With sqlite_path, every result also goes into that SQLite results store (SqliteSink).
+    """
+
+    def __init__(self, output_csv_path, sidecar=True, resume=None, sqlite_path=None):
+        self.output_csv_path = output_csv_path
+        self.sidecar = sidecar
+        self.spool_dir = spool_dir_for(output_csv_path)
+        names = [name + ".csv" for name, *_ in BLOCKS] + ["flags.jsonl"]
+        if resume is None:
+            shutil.rmtree(self.spool_dir, ignore_errors=True)  # left over from a failed run
+            os.makedirs(self.spool_dir)
+        else:
+            # anything written after the checkpoint is dropped and scored again
+            for name, offset in zip(names, resume["offsets"]):
+                os.truncate(os.path.join(self.spool_dir, name), offset)
+        mode = "w" if resume is None else "a"
+        self.spools = [open(os.path.join(self.spool_dir, name), mode, newline="",
+                            encoding="utf-8", buffering=SPOOL_BUFFER_BYTES)
+                       for name in names[:-1]]
+        self.writers = [csv.writer(f) for f in self.spools]
+        self.flags = open(os.path.join(self.spool_dir, names[-1]), mode, encoding="utf-8",
+                          buffering=SPOOL_BUFFER_BYTES)
+        self.totals = list(resume["totals"]) if resume else [0] * len(BLOCKS)
+        self.rows = resume["rows"] if resume else 0
+        self.store = None
+        if sqlite_path:
+            self.store = SqliteSink(sqlite_path, output_csv_path,
+                                    resume=resume["rows"] if resume else None)
+        self.closed = False
+
+    def add(self, r):
+        utterance, cleaned = r["utterance"], r["cleaned"]
+        for i, (writer, (_, _, key_exists, key_prod, key_notes, _)) in \
+                enumerate(zip(self.writers, BLOCKS)):
+            productive = r[key_prod]
+            writer.writerow([utterance, cleaned, "yes" if r[key_exists] else "no",
+                             "yes" if productive else "no", r[key_notes], productive])
+            self.totals[i] += productive
+        self.flags.write(json.dumps([r[k] for k in FLAG_KEYS]) + "\n")
+        self.rows += 1
+        if self.store is not None:
+            self.store.add(r)
+
+    def flush(self):
+        for f in self.spools:
+            f.flush()
+        self.flags.flush()
+
+    def position(self):
+        """Flush the spools to disk and return how far they are written, for a later resume."""
+        self.flush()
+        if self.store is not None:
+            self.store.flush()
+        for f in self.spools + [self.flags]:
+            os.fsync(f.fileno())  # a checkpoint must survive losing the machine, not just the process
+        return {
+            "rows": self.rows,
+            "totals": list(self.totals),
+            "offsets": [os.fstat(f.fileno()).st_size for f in self.spools + [self.flags]],
+        }
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for f in self.spools:
+            f.close()
+        self.flags.close()
+
+        tmp = self.output_csv_path + ".tmp"
+        spools = [open(f.name, "r", newline="", encoding="utf-8") for f in self.spools]
+        try:
+            with open(tmp, "w", newline="", encoding="utf-8") as out:
+                _write_layout(out, [(header, label, total, spool) for
+                                    (_, header, _, _, _, label), total, spool
+                                    in zip(BLOCKS, self.totals, spools)])
+        finally:
+            for spool in spools:
+                spool.close()
+        os.replace(tmp, self.output_csv_path)
+
+        if self.sidecar:
+            totals = {BLOCKS[i][3]: total for i, total in enumerate(self.totals)}
+            header = {"format": SIDECAR_FORMAT, "version": SIDECAR_VERSION, "kind": "productivity",
+                      "utterances": self.rows, "totals": {k: totals[k] for k in TOTAL_KEYS},
+                      "columns": list(FLAG_KEYS)}
+            with open(sidecar_path_for(self.output_csv_path), "w", encoding="utf-8") as out, \
+                    open(self.flags.name, "r", encoding="utf-8") as flags:
+                out.write(json.dumps(header) + "\n")
+                shutil.copyfileobj(flags, out)
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+        # the rows a failed attempt left in <name>.partial.csv are all in the CSV now
+        try:
+            os.remove(partial_path_for(self.output_csv_path))
+        except FileNotFoundError:
+            pass
+        if self.store is not None:
+            self.store.close()
+
+    def abandon(self):
+        # keep what was scored so far on disk for recover_partial_csv()
+        for f in self.spools:
+            f.close()
+        self.flags.close()
+        if self.store is not None:
+            self.store.abandon()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif not self.closed:
+            self.abandon()
+
+
+def recover_partial_csv(output_csv_path):
+    """Build <name>.partial.csv from the spools a failed run left behind. compact.py skips
+    partial CSVs, and the transcript's next complete run deletes it.
+
+    Keeps the rows every block has complete, so the four blocks stay aligned. Returns the
+    partial CSV's path and row count, or None if there is nothing to recover.
+    """
+    spool_dir = spool_dir_for(output_csv_path)
+    if not os.path.isdir(spool_dir):
+        return None
+    blocks = []
+    for name, *_ in BLOCKS:
+        with open(os.path.join(spool_dir, name + ".csv"), "r", newline="", encoding="utf-8") as f:
+            data = f.read()
+        rows = list(csv.reader(io.StringIO(data)))
+        if rows and not data.endswith("\n"):
+            rows.pop()  # cut off mid-row
+        blocks.append(rows)
+    n = min(len(rows) for rows in blocks)
+
+    partial_path = partial_path_for(output_csv_path)
+    layout = []
+    for (_, header, _, _, _, label), rows in zip(BLOCKS, blocks):
+        spool = io.StringIO()
+        csv.writer(spool).writerows(rows[:n])
+        spool.seek(0)
+        layout.append((header, label, sum(int(row[5]) for row in rows[:n]), spool))
+    with open(partial_path, "w", newline="", encoding="utf-8") as out:
+        _write_layout(out, layout)
+    return partial_path, n
+
+
+# SQLite results store: the results of many transcripts in one local database, for
+# corpus-level queries (compact.py --sqlite, or any SQL client). Tables:
+#   transcripts  one row per results CSV (keyed by its absolute path) with its totals;
+#                complete is 0 until the transcript has been written in full
+#   utterances   (transcript_id, position, utterance, cleaned)
+#   scores       one row per utterance and metric ("art", "aux", "active_prog", "prog", or
+#                "ads" for ADS-only runs): present (the *_exists flag), productive, and
+#                the note with its category (the results.Reason name of the rule branch)
+SQLITE_SCHEMA_VERSION = 1
+SQLITE_BATCH_ROWS = 1000  # utterances per insert transaction
+SQLITE_TIMEOUT = 60.0     # seconds to wait for another worker's transaction
+SCORE_METRICS = tuple(name for name, *_ in BLOCKS)
+_METRIC_KEYS = tuple((name, exists_key, productive_key, notes_key)
+                     for name, _, exists_key, productive_key, notes_key, _ in BLOCKS)
+# transcripts column holding each metric's total
+TRANSCRIPT_TOTAL_COLUMNS = {"art": "art_productive", "aux": "aux_productive",
+                            "active_prog": "active_prog_productive", "prog": "prog_productive",
+                            "ads": "ads"}
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    csv_path TEXT NOT NULL UNIQUE,
+    output_dir TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    utterances INTEGER NOT NULL DEFAULT 0,
+    art_productive INTEGER,
+    aux_productive INTEGER,
+    active_prog_productive INTEGER,
+    prog_productive INTEGER,
+    ads INTEGER,
+    scored_at TEXT
+);
+CREATE TABLE IF NOT EXISTS utterances (
+    transcript_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    utterance TEXT,
+    cleaned TEXT,
+    PRIMARY KEY (transcript_id, position)
+);
+CREATE TABLE IF NOT EXISTS scores (
+    transcript_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    present INTEGER NOT NULL,
+    productive INTEGER NOT NULL,
+    note_category TEXT,
+    note TEXT
+);
+CREATE INDEX IF NOT EXISTS scores_by_transcript ON scores (transcript_id, metric);
+CREATE INDEX IF NOT EXISTS scores_by_note_category ON scores (metric, note_category);
+CREATE INDEX IF NOT EXISTS transcripts_by_output_dir ON transcripts (output_dir, complete);
+"""
+
+
+_REASON_NAMES = {reason: reason.name for reason in Reason}
+_STORE_CONNECTIONS = {}  # (pid, thread, path) -> connection kept open by that thread's sinks
+
+
+def open_results_db(path):
+    """Connect to the SQLite results store at path, creating its tables on first use.
+
+    The connection is in autocommit mode; writers group their statements with
+    results_transaction().
+    """
+    import sqlite3
+
+    conn = sqlite3.connect(path, timeout=SQLITE_TIMEOUT, isolation_level=None)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, SQLITE_SCHEMA_VERSION):
+        conn.close()
+        raise ValueError(f"{path} is a results store of schema version {version}, "
+                         f"expected {SQLITE_SCHEMA_VERSION}")
+    if version == 0:
+        conn.execute("PRAGMA journal_mode=WAL")  # readers don't block the workers writing
+        conn.executescript(_SQLITE_SCHEMA + f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION};")
+    # with WAL this can only lose the last transactions on power loss, never corrupt the
+    # store, and a transcript is not complete until its final one
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _store_connection(path):
+    # one connection per thread and store, reused by every transcript it writes
+    key = (os.getpid(), threading.get_ident(), os.path.abspath(path))
+    conn = _STORE_CONNECTIONS.get(key)
+    if conn is None:
+        conn = _STORE_CONNECTIONS[key] = open_results_db(path)
+    return conn
+
+
+@contextmanager
+def results_transaction(conn):
+    # BEGIN IMMEDIATE takes the write lock up front, so concurrent workers queue for it
+    # (up to SQLITE_TIMEOUT) instead of failing halfway through a transaction
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class SqliteSink:
+    """Writes the results of one transcript into a SQLite results store.
+
+    Results are buffered and inserted SQLITE_BATCH_ROWS utterances per transaction; close()
+    stores the transcript's totals and marks it complete. Scoring a transcript again
+    replaces its earlier rows. resume, a row count from ResultSink.position(), keeps the
+    rows before it and drops the rest. kind is "productivity" or "ads".
+    """
+
+    def __init__(self, db_path, output_csv_path, kind="productivity", resume=None):
+        self.conn = _store_connection(db_path)
+        self.kind = kind
+        self.complete = True
+        self._utterances, self._scores = [], []
+        csv_path = os.path.abspath(output_csv_path)
+        with results_transaction(self.conn) as conn:
+            row = conn.execute("SELECT id FROM transcripts WHERE csv_path = ?",
+                               (csv_path,)).fetchone()
+            if row is not None and resume is not None:
+                self.id = row[0]
+                conn.execute("DELETE FROM utterances WHERE transcript_id = ? AND position >= ?",
+                             (self.id, resume))
+                conn.execute("DELETE FROM scores WHERE transcript_id = ? AND position >= ?",
+                             (self.id, resume))
+                kept = conn.execute("SELECT COUNT(*) FROM utterances WHERE transcript_id = ?",
+                                    (self.id,)).fetchone()[0]
+            else:
+                if row is not None:
+                    self._delete(conn, row[0])
+                self.id = conn.execute(
+                    "INSERT INTO transcripts (name, csv_path, output_dir, kind) VALUES (?, ?, ?, ?)",
+                    (os.path.splitext(os.path.basename(csv_path))[0], csv_path,
+                     os.path.dirname(csv_path), kind)).lastrowid
+                kept = 0
+        self.rows = resume if resume is not None else 0
+        if kept < self.rows:
+            # e.g. the store was added to a run that was already under way
+            print(f"Warning: {db_path} lacks the first {self.rows - kept} results of {csv_path}; "
+                  f"it stays incomplete there until the transcript is scored again")
+            self.complete = False
+
+    @staticmethod
+    def _delete(conn, transcript_id):
+        for table in ("scores", "utterances"):
+            conn.execute(f"DELETE FROM {table} WHERE transcript_id = ?", (transcript_id,))
+        conn.execute("DELETE FROM transcripts WHERE id = ?", (transcript_id,))
+
+    def add(self, r):
+        position = self.rows
+        self._utterances.append((self.id, position, r.get("utterance", ""), r.get("cleaned")))
+        if self.kind == "ads":
+            self._scores.append((self.id, position, "ads", 1, 1 if r.get("is_ads") else 0,
+                                 None, None))
+        else:
+            for metric, exists_key, productive_key, notes_key in _METRIC_KEYS:
+                reason = note_reason(r, metric)
+                self._scores.append((self.id, position, metric, r[exists_key], r[productive_key],
+                                     _REASON_NAMES.get(reason), r[notes_key]))
+        self.rows += 1
+        if len(self._utterances) >= SQLITE_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self._utterances:
+            return
+        with results_transaction(self.conn) as conn:
+            conn.executemany("INSERT INTO utterances VALUES (?, ?, ?, ?)", self._utterances)
+            conn.executemany("INSERT INTO scores VALUES (?, ?, ?, ?, ?, ?, ?)", self._scores)
+        self._utterances, self._scores = [], []
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        with results_transaction(self.conn) as conn:
+            totals = dict(conn.execute(
+                "SELECT metric, SUM(productive) FROM scores WHERE transcript_id = ? GROUP BY metric",
+                (self.id,)).fetchall())
+            metrics = ("ads",) if self.kind == "ads" else SCORE_METRICS
+            columns = ", ".join(f"{column} = ?" for column in TRANSCRIPT_TOTAL_COLUMNS.values())
+            conn.execute(
+                f"UPDATE transcripts SET complete = ?, utterances = ?, scored_at = ?, {columns} "
+                f"WHERE id = ?",
+                [int(self.complete), self.rows, datetime.datetime.now().isoformat(timespec="seconds")]
+                + [totals.get(m, 0) if m in metrics else None for m in TRANSCRIPT_TOTAL_COLUMNS]
+                + [self.id])
+        self.conn = None
+
+    def abandon(self):
+        # rows already inserted stay, marked incomplete, until the transcript is rescored
+        self._utterances, self._scores = [], []
+        self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abandon()
+
+
+def write_analysis_to_csv(per_utt_results, output_csv_path, sidecar=True, sqlite_path=None):
+    with ResultSink(output_csv_path, sidecar=sidecar, sqlite_path=sqlite_path) as sink:
         for r in per_utt_results:
-            w.writerow([
-                r["utterance"], r["cleaned"],
-                "yes" if r["prog_exists"] else "no",
-                "yes" if r["prog_productive"] else "no",
-                r["prog_notes"],
-                r["prog_productive"]
-            ])
-            total_gp += r["prog_productive"]
-        w.writerow(["", "", "", "", "Total General Progressive Productivity", str(total_gp)])
-
-def write_ads_csv(results, output_csv_path):
-    rows = []
-
-    for r in results:
-        rows.append({
-            "Utterance": r.get("utterance", ""),
-            "ADS": 1 if r.get("is_ads", False) else 0
-        })
-
-    df = pd.DataFrame(rows)
-    df.to_csv(output_csv_path, index=False)
\ No newline at end of file
+            sink.add(r)
+
+
+class AdsSink:
+    """Writes an ADS CSV (Utterance,ADS) and its sidecar from results pushed one at a time,
+    so an ADS run holds no more than one result. The rows go straight to <csv>.tmp, which
+    close() renames into place; an exception (use as a context manager) removes it.
+
+    With sqlite_path, every result also goes into that SQLite results store (SqliteSink).
+    """
+
+    def __init__(self, output_csv_path, sidecar=True, sqlite_path=None):
+        self.output_csv_path = output_csv_path
+        self.tmp = output_csv_path + ".tmp"
+        self.out = open(self.tmp, "w", newline="", encoding="utf-8", buffering=SPOOL_BUFFER_BYTES)
+        self.writer = csv.writer(self.out, lineterminator=os.linesep)  # as pandas' to_csv
+        self.writer.writerow(["Utterance", "ADS"])
+        self.flags = None
+        if sidecar:
+            self.flags = open(sidecar_path_for(output_csv_path) + ".tmp", "w", encoding="utf-8",
+                              buffering=SPOOL_BUFFER_BYTES)
+        self.total = self.rows = 0
+        self.store = None
+        if sqlite_path:
+            self.store = SqliteSink(sqlite_path, output_csv_path, kind="ads")
+        self.closed = False
+
+    def add(self, r):
+        ads = 1 if r.get("is_ads", False) else 0
+        self.writer.writerow([r.get("utterance", ""), ads])
+        if self.flags is not None:
+            self.flags.write(f"[{ads}]\n")
+        self.total += ads
+        self.rows += 1
+        if self.store is not None:
+            self.store.add(r)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.out.close()
+        os.replace(self.tmp, self.output_csv_path)
+        if self.flags is not None:
+            self.flags.close()
+            header = {"format": SIDECAR_FORMAT, "version": SIDECAR_VERSION, "kind": "ads",
+                      "utterances": self.rows,
+                      "totals": {"ads": self.total, "utterances": self.rows}, "columns": ["ads"]}
+            with open(sidecar_path_for(self.output_csv_path), "w", encoding="utf-8") as out, \
+                    open(self.flags.name, "r", encoding="utf-8") as flags:
+                out.write(json.dumps(header) + "\n")
+                shutil.copyfileobj(flags, out)
+            os.remove(self.flags.name)
+        if self.store is not None:
+            self.store.close()
+
+    def abandon(self):
+        self.closed = True
+        for f in (self.out, self.flags):
+            if f is not None:
+                f.close()
+                os.remove(f.name)
+        if self.store is not None:
+            self.store.abandon()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif not self.closed:
+            self.abandon()
+
+
+def write_ads_csv(results, output_csv_path, sidecar=True, sqlite_path=None):
+    with AdsSink(output_csv_path, sidecar=sidecar, sqlite_path=sqlite_path) as sink:
+        for r in results:
+            sink.add(r)
@@ -0,0 +1,384 @@
+# Local scoring service. Loads Stanza once and scores transcripts sent over HTTP, so
+# other tools don't each pay the model load.
+#
+#   python server.py --port 8765
+#
+#   POST /score      {"text": "<transcript>", "extract_rr": false}  -> full results
+#   POST /score      {"utterances": ["...", ...]}                   -> full results
+#   POST /score/ads  same bodies                                    -> ADS measures and is_ads
+#   Either body may add "measures" (some of "art", "aux", "prog", "active_prog") and
+#   "notes" to score and return only those fields. /score defaults to every measure with
+#   notes, /score/ads to the ADS measures without notes.
+#   GET  /metrics    latency, throughput, batching and cache counters
+#   GET  /health
+#
+# Each request is scored on its own handler thread with its own productivity state
+# (seen_* sets), but all parsing goes through one MicroBatcher thread, which merges the
+# texts of requests arriving within a short window into shared Stanza batches. Stanza is
+# never called from two threads at once. When more than --max-in-flight requests are
+# being handled, new ones are refused with 503 so callers can back off.
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from interface import result_dicts, run_full_pipeline, run_ads_only_pipeline
+from analyze import (ADS_MEASURES, DEFAULT_PARSE_BATCH_SIZE, analyze_utterances, is_ads_result,
+                     parse_texts)
+from models import configure_models, get_pipeline, preload, format_load_stats, model_identity
+from parse_cache import ParseCache, DEFAULT_MAX_DISK_MB, format_cache_stats
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WINDOW_MS = 10.0
+DEFAULT_MAX_BATCH_TEXTS = 512
+DEFAULT_MAX_IN_FLIGHT = 32
+MAX_BODY_BYTES = 16 * 1024 * 1024
+LATENCY_WINDOW = 2000
+
+
+class MicroBatcher:
+    """Coalesce parse calls from many threads into shared Stanza batches on one thread."""
+
+    def __init__(self, nlp=None, batch_size=DEFAULT_PARSE_BATCH_SIZE, window_ms=DEFAULT_WINDOW_MS,
+                 max_batch_texts=DEFAULT_MAX_BATCH_TEXTS, cache=None):
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.window = window_ms / 1000.0
+        self.max_batch_texts = max_batch_texts
+        self.cache = cache
+        self.batches = 0
+        self.batched_texts = 0
+        self.batched_requests = 0
+        self.parse_seconds = 0.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def parse(self, texts):
+        """Parser for analyze.iter_parsed(): blocks until texts are parsed in a shared batch."""
+        if not texts:
+            return []
+        job = {"texts": texts, "done": threading.Event(), "docs": None, "error": None}
+        self._queue.put(job)
+        job["done"].wait()
+        if job["error"] is not None:
+            raise job["error"]
+        return job["docs"]
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        # wait up to the window for more work, but never past max_batch_texts
+        jobs = [first]
+        total = len(first["texts"])
+        deadline = time.perf_counter() + self.window
+        while total < self.max_batch_texts:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            jobs.append(job)
+            total += len(job["texts"])
+        return jobs
+
+    def _run(self):
+        nlp = self.nlp or get_pipeline()
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            jobs = self._collect(first)
+            texts = [text for job in jobs for text in job["texts"]]
+            start = time.perf_counter()
+            try:
+                # the cache also dedupes texts shared by several requests, handing
+                # each one its own copy since the scoring rules retag documents
+                docs = parse_texts(nlp, texts, batch_size=self.batch_size, cache=self.cache)
+            except Exception as e:
+                for job in jobs:
+                    job["error"] = e
+                    job["done"].set()
+                continue
+            self.parse_seconds += time.perf_counter() - start
+            self.batches += 1
+            self.batched_texts += len(texts)
+            self.batched_requests += len(jobs)
+
+            offset = 0
+            for job in jobs:
+                job["docs"] = docs[offset:offset + len(job["texts"])]
+                offset += len(job["texts"])
+                job["done"].set()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ServiceMetrics:
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.utterances = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, utterances, ok=True):
+        with self._lock:
+            self.requests += 1
+            if ok:
+                self.utterances += utterances
+                self.latencies.append(seconds)
+            else:
+                self.errors += 1
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self, batcher, in_flight):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            uptime = max(time.time() - self.started, 1e-9)
+            snap = {
+                "uptime_seconds": round(uptime, 1),
+                "requests": self.requests,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "in_flight": in_flight,
+                "utterances": self.utterances,
+                "requests_per_second": round(self.requests / uptime, 3),
+                "utterances_per_second": round(self.utterances / uptime, 3),
+                "latency_ms": {
+                    "p50": round(percentile(latencies, 50) * 1000, 2),
+                    "p90": round(percentile(latencies, 90) * 1000, 2),
+                    "p99": round(percentile(latencies, 99) * 1000, 2),
+                    "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+                    "samples": len(latencies),
+                },
+            }
+        batches = batcher.batches
+        snap["batching"] = {
+            "batches": batches,
+            "texts_per_batch": round(batcher.batched_texts / batches, 2) if batches else 0.0,
+            "requests_per_batch": round(batcher.batched_requests / batches, 2) if batches else 0.0,
+            "parse_seconds": round(batcher.parse_seconds, 3),
+        }
+        if batcher.cache is not None:
+            snap["cache"] = batcher.cache.stats()
+        return snap
+
+
+def score_payload(payload, ads_only, parser):
+    """Score one request body; returns the per-utterance result dicts."""
+    options = {
+        "require_rr_code": bool(payload.get("require_rr_code", False)),
+        "parser": parser,
+    }
+    # only what the client asked for, so the ADS path keeps its own defaults (see below)
+    measures = payload.get("measures")
+    if measures is not None:
+        if not isinstance(measures, list) or not all(isinstance(m, str) for m in measures):
+            raise ValueError('"measures" must be a list of strings')
+        # is_ads needs its own measures too
+        options["measures"] = measures + ["ads"] if ads_only else measures
+    if "notes" in payload:
+        options["notes"] = bool(payload["notes"])
+    if "utterances" in payload:
+        utterances = payload["utterances"]
+        if not isinstance(utterances, list) or not all(isinstance(u, str) for u in utterances):
+            raise ValueError('"utterances" must be a list of strings')
+        if ads_only:
+            options.setdefault("measures", ADS_MEASURES)
+            options.setdefault("notes", False)
+        results = analyze_utterances(utterances, **options)
+        if ads_only:
+            for r in results:
+                r["is_ads"] = is_ads_result(r)
+        return results
+
+    text = payload.get("text")
+    if not isinstance(text, str):
+        raise ValueError('request needs "text" (a transcript) or "utterances" (a list)')
+    pipeline = run_ads_only_pipeline if ads_only else run_full_pipeline
+    return pipeline(text, extract_rr=bool(payload.get("extract_rr", False)), **options)
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_json(200, self.server.metrics_snapshot())
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path not in ("/score", "/score/ads"):
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+            return
+        body = self.rfile.read(length)
+
+        if not self.server.try_enter():
+            self.server.metrics.record_rejected()
+            self._send_json(503, {"error": "server busy, retry later"}, {"Retry-After": "1"})
+            return
+        start = time.perf_counter()
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("request body must be a JSON object")
+            results = score_payload(payload, self.path == "/score/ads", self.server.batcher.parse)
+        except ValueError as e:
+            self.server.metrics.record(time.perf_counter() - start, 0, ok=False)
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.server.metrics.record(time.perf_counter() - start, 0, ok=False)
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        finally:
+            self.server.leave()
+
+        seconds = time.perf_counter() - start
+        self.server.metrics.record(seconds, len(results))
+        self._send_json(200, {"results": result_dicts(results), "count": len(results),
+                              "seconds": round(seconds, 4)})
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default listen backlog of 5 resets connections under a burst of clients;
+    # overload is meant to be answered with 503 instead
+    request_queue_size = 128
+
+    def __init__(self, address, batcher, max_in_flight=DEFAULT_MAX_IN_FLIGHT, verbose=False):
+        super().__init__(address, ScoringHandler)
+        self.batcher = batcher
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.metrics = ServiceMetrics()
+        self.verbose = verbose
+        self._flight_lock = threading.Lock()
+
+    def try_enter(self):
+        """Claim a request slot, or return False when max_in_flight are already taken."""
+        with self._flight_lock:
+            if self.in_flight >= self.max_in_flight:
+                return False
+            self.in_flight += 1
+            return True
+
+    def leave(self):
+        with self._flight_lock:
+            self.in_flight -= 1
+
+    def metrics_snapshot(self):
+        return self.metrics.snapshot(self.batcher, self.in_flight)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP scoring service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_PARSE_BATCH_SIZE,
+        help=f"Utterances sent to Stanza per batch (default: {DEFAULT_PARSE_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--window-ms",
+        type=float,
+        default=DEFAULT_WINDOW_MS,
+        help=f"How long to wait for other requests to share a parse batch (default: {DEFAULT_WINDOW_MS:g})"
+    )
+    parser.add_argument(
+        "--max-batch-texts",
+        type=int,
+        default=DEFAULT_MAX_BATCH_TEXTS,
+        help=f"Stop collecting once a shared batch has this many texts (default: {DEFAULT_MAX_BATCH_TEXTS})"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f"Requests handled at once before answering 503 (default: {DEFAULT_MAX_IN_FLIGHT})"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the persistent parse cache (default: memory only)"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_DISK_MB,
+        help=f"Size limit of the on-disk parse cache in MB (default: {DEFAULT_MAX_DISK_MB})"
+    )
+    parser.add_argument("--model-dir", default=None, metavar="DIR",
+                        help="Folder with the Stanza models (default: Stanza's own)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Never download: check the model folder once and load from it")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+    configure_models(model_dir=args.model_dir, offline=args.offline)
+
+    print(format_load_stats(preload()))
+    cache = ParseCache(args.cache_dir, max_disk_mb=args.cache_max_mb, model_id=model_identity())
+    batcher = MicroBatcher(batch_size=args.batch_size, window_ms=args.window_ms,
+                           max_batch_texts=args.max_batch_texts, cache=cache)
+    server = ScoringServer((args.host, args.port), batcher,
+                           max_in_flight=args.max_in_flight, verbose=args.verbose)
+    print(f"Scoring service listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down.")
+    finally:
+        server.server_close()
+        batcher.close()
+        print(format_cache_stats(cache.stats()))
+
+
+if __name__ == "__main__":
+    main()
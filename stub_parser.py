@@ -0,0 +1,169 @@
+# Deterministic stand-in for the Stanza pipeline, for benchmarks and equivalence checks
+# on machines without the models (benchmark.py --parser stub).
+#
+# It tags from small word lists and a hash of each token, and builds a plausible
+# dependency tree (subjects, auxiliaries, copulas, passives, determiners, relative
+# clauses, compounds) so every branch of the scoring rules gets exercised. Its parses
+# are NOT linguistically meaningful; only compare stub results with other stub results.
+
+import re
+import zlib
+
+from parse_cache import ParsedDocument, ParsedSentence, ParsedWord
+
+_TOKEN = re.compile(r"'[a-z]+|[A-Za-z0-9_]+|[^\sA-Za-z0-9_]", re.IGNORECASE)
+
+AUXILIARIES = {"is", "are", "was", "were", "am", "be", "'s", "'re", "been", "being", "'m"}
+PRONOUNS = {"he", "she", "it", "they", "i", "we", "you", "him", "them", "this", "those"}
+POSSESSIVES = {"his", "my", "their", "our", "your", "its", "her"}
+PREPOSITIONS = {"in", "on", "at", "to", "of", "for", "with", "by", "from", "into", "over",
+                "under", "behind", "near", "after"}
+ADJECTIVES = {"big", "happy", "sad", "wet", "red", "little", "scared", "mad", "tall"}
+VERBS = {"run", "jump", "fall", "go", "see", "get", "look", "want", "swim", "fly",
+         "throw", "catch", "put", "take", "runs", "jumps", "falls", "goes", "sees",
+         "gets", "looks", "wants", "swims", "throws", "catches", "takes", "has", "said"}
+CONJUNCTIONS = {"and", "but", "or", "then"}
+WH_WORDS = {"what", "where", "who", "why", "how", "which", "when"}
+
+
+def _hash(text):
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def _tag(token):
+    # returns (upos, xpos, feats, lemma)
+    t = token.lower()
+    if t in {"a", "an", "the"}:
+        return "DET", "DT", None, t
+    if t in AUXILIARIES:
+        return "AUX", "VBZ", "Mood=Ind", "be"
+    if t in POSSESSIVES:
+        return "PRON", "PRP$", "Poss=Yes", t
+    if t in PRONOUNS:
+        return "PRON", "PRP", "Case=Nom", t
+    if t in PREPOSITIONS:
+        return "ADP", "IN", None, t
+    if t in CONJUNCTIONS:
+        return "CCONJ", "CC", None, t
+    if t in WH_WORDS:
+        return "PRON", "WP", None, t
+    if t in ADJECTIVES:
+        return "ADJ", "JJ", "Degree=Pos", t
+    if not re.match(r"\w", t):
+        return "PUNCT", ".", None, t
+    if t.endswith("ing") and len(t) > 4:
+        # most -ing words come out as VBG; the rest as nouns, for the verb retagger
+        if _hash(t) % 10 < 7:
+            return "VERB", "VBG", "VerbForm=Part", t[:-3]
+        return "NOUN", "NN", "Number=Sing", t
+    if t.endswith("ed") and len(t) > 3:
+        return "VERB", "VBN", "VerbForm=Part|Voice=Pass" if _hash(t) % 2 else "Tense=Past", t[:-2]
+    if t in VERBS:
+        return "VERB", "VBZ", "Tense=Pres", t.rstrip("s") or t
+    if _hash(t) % 13 == 0:
+        return "X", "FW", None, None if _hash(t) % 2 else t
+    return "NOUN", "NN", None, t[:-1] if t.endswith("s") and len(t) > 3 else t
+
+
+def _find_root(words):
+    root = next((w for w in words if w.upos == "VERB"), None)
+    if root is not None:
+        return root, None
+    aux = next((w for w in words if w.upos == "AUX"), None)
+    if aux is not None:
+        after = [w for w in words if w.id > aux.id and w.upos in {"ADJ", "NOUN"}]
+        if after:
+            return (after[0] if _hash(aux.text + after[0].text) % 3 else after[-1]), aux
+    return next((w for w in words if w.upos in {"NOUN", "ADJ", "PRON"}), words[0]), None
+
+
+def parse_sentence(tokens, tags=None):
+    # tags: optional (upos, xpos, feats) per token, as supplied in pretagged inference mode
+    words = []
+    for i, token in enumerate(tokens, 1):
+        upos, xpos, feats, lemma = _tag(token)
+        if tags is not None:
+            upos, xpos, feats = tags[i - 1]
+        words.append(ParsedWord(i, token, lemma, upos, xpos, feats, 0, "dep"))
+    if not words:
+        return ParsedSentence(words)
+
+    root, copula = _find_root(words)
+    root.head, root.deprel = 0, "root"
+    passive = root.upos == "VERB" and root.xpos == "VBN" and any(w.upos == "AUX" for w in words)
+    has_subject = False
+    for i, w in enumerate(words):
+        if w is root:
+            continue
+        following = words[i + 1:]
+        if w.upos == "DET":
+            target = next((x for x in following if x.upos in {"NOUN", "ADJ", "VERB"}), root)
+            w.head, w.deprel = target.id, "det"
+        elif w.upos == "AUX":
+            w.head = root.id
+            w.deprel = "cop" if w is copula else "aux:pass" if passive else "aux"
+        elif w.upos in {"NOUN", "PRON"} and w.xpos != "PRP$":
+            if following and following[0].upos == "NOUN" and _hash(w.text) % 2:
+                w.head, w.deprel = following[0].id, "compound"
+            elif w.id < root.id and not has_subject:
+                has_subject = True
+                w.head, w.deprel = root.id, "nsubj:pass" if passive else "nsubj"
+            elif i > 0 and words[i - 1].upos == "ADP":
+                w.head, w.deprel = root.id, "obl"
+            else:
+                w.head, w.deprel = root.id, "obj"
+        elif w.xpos == "PRP$":
+            target = next((x for x in following if x.upos in {"NOUN", "VERB"}), root)
+            w.head, w.deprel = target.id, "nmod:poss"
+        elif w.upos == "ADP":
+            target = next((x for x in following if x.upos in {"NOUN", "PRON"}), root)
+            w.head, w.deprel = target.id, "case"
+            if _hash(w.text + root.text) % 4 == 0:
+                w.head = root.id
+        elif w.upos == "VERB":
+            previous = words[i - 1].text.lower() if i else ""
+            if previous in {"who", "that"}:
+                w.head, w.deprel = root.id, "acl:relcl"
+            else:
+                w.head, w.deprel = root.id, "conj" if _hash(w.text) % 2 else "xcomp"
+        elif w.upos == "PUNCT":
+            w.head, w.deprel = root.id, "punct"
+        elif w.upos == "CCONJ":
+            w.head, w.deprel = root.id, "cc"
+        else:
+            w.head, w.deprel = root.id, "amod" if w.upos == "ADJ" else "dep"
+    return ParsedSentence(words)
+
+
+def stub_parse(text):
+    sentences, current = [], []
+    for token in _TOKEN.findall(text):
+        current.append(token)
+        if token in {".", "?", "!"}:
+            sentences.append(current)
+            current = []
+    if current:
+        sentences.append(current)
+    return ParsedDocument(text, [parse_sentence(tokens) for tokens in sentences])
+
+
+def stub_parse_pretagged(sentences, text):
+    return ParsedDocument(text, [
+        parse_sentence([w["text"] for w in words], [(w["upos"], w["xpos"], w.get("feats"))
+                                                    for w in words])
+        for words in sentences
+    ])
+
+
+class StubPipeline:
+    """Drop-in for stanza.Pipeline wherever the analyzer takes an nlp argument."""
+
+    def __call__(self, text):
+        return stub_parse(text)
+
+    def make_pretagged_document(self, sentences, text):
+        # inference.PretaggedPipeline hands the result back to bulk_process
+        return stub_parse_pretagged(sentences, text)
+
+    def bulk_process(self, texts):
+        return [text if isinstance(text, ParsedDocument) else stub_parse(text) for text in texts]